@@ -0,0 +1,195 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import http_client
+import metrics
+
+# --- AI 분석 (Gemini) ---
+# 페이지 렌더링 경로에서 LLM을 기다리지 않음:
+# - 입력(점수, 반올림한 지표, 뉴스, 일정)을 양자화해서 해시 -> 같은 시장 상황이면 저장된 결과 재사용
+# - 처음 보는 입력이면 백그라운드에서 분석을 시작하고 바로 'pending' 반환 (페이지는 기본 분석을 먼저 표시)
+# - 모델 경주: 첫 모델이 HEDGE_DELAY 안에 답이 없거나 실패하면 다음 모델도 같이 시작, 먼저 성공한 답 사용
+# - 서킷 브레이커: 연속 실패한 모델은 COOLDOWN 동안 건너뜀. (모델, API 키 해시)별이라 잘못된 키는 자기 요청만 막음
+# - 실패 기록은 (입력 해시, API 키 해시)별 -> 한 세션의 잘못된 키가 다른 키의 분석을 막지 않음.
+#   화면에 나가는 오류 메시지에서는 URL(요청 주소에 키가 들어 있음)을 지움
+
+MODELS = ["gemini-1.5-flash", "gemini-1.5-pro", "gemini-1.0-pro"]
+MODEL_TIMEOUT = 10      # 모델별 요청 timeout (초)
+HEDGE_DELAY = 3.0       # 이 시간 안에 답이 없으면 다음 모델도 출발 (초)
+FAIL_THRESHOLD = 2      # 연속 실패 횟수가 이만큼이면 차단
+COOLDOWN = 600          # 차단 유지 시간 (초)
+ERROR_RETRY = 60        # 실패한 입력은 이 시간 동안 다시 시도하지 않음 (초)
+MEMO_SIZE = 64          # 보관할 분석 결과 수
+ERRORS_SIZE = 64        # 보관할 실패 기록 수
+BREAKERS_SIZE = 64      # 서킷 브레이커 상태를 보관할 (모델, 키) 수
+
+_pool = ThreadPoolExecutor(max_workers=6, thread_name_prefix="gemini")
+_lock = threading.Lock()
+_memo = OrderedDict()   # 입력 해시 -> 분석 결과
+_errors = OrderedDict() # (입력 해시, 키 해시) -> (에러 메시지, 시각)
+_pending = set()        # 분석 진행 중인 입력 해시
+_breakers = OrderedDict()  # (모델, 키 해시) -> {"fails", "open_until", "ok", "err"}
+
+def _q(v, step):
+    # 지표 양자화 (step 단위로 반올림) - 미세한 호가 변화로 매번 새 분석을 하지 않도록
+    return None if v is None else round(round(v / step) * step, 4)
+
+def input_key(m, inv_kospi, inv_kosdaq, score, news_titles, calendar_str):
+    g = lambda k, f: m[k][f] if k in m else None
+    quantized = {
+        "score": score,
+        "tnx": _q(g('tnx', 'val'), 0.05),
+        "krw": _q(g('krw', 'val'), 5),
+        "sox_pct": _q(g('sox', 'pct'), 0.5),
+        "sox_dd": _q(g('sox', 'dd'), 0.5),
+        "inv": (_q(inv_kospi['val'], 100), _q(inv_kosdaq['val'], 100)),
+        "news": news_titles,
+        "calendar": calendar_str,
+    }
+    return hashlib.sha256(json.dumps(quantized, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+def _key_id(api_key):
+    # 실패 기록용 API 키 식별자 (키 자체는 보관하지 않음)
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+def _clean(e):
+    # 예외 메시지에서 URL과 key=... 값을 지움 (requests 예외는 요청 URL을 그대로 담음)
+    return re.sub(r"https?://[^\s'\"]+", "<url>", metrics.redact(str(e))) or type(e).__name__
+
+def build_prompt(m, inv_kospi, inv_kosdaq, score, news_titles, calendar_str):
+    return f"""당신은 20년 경력의 펀드매니저입니다.
+    현재 자체 알고리즘으로 산출된 시장 위험도는 {score}점(100점 만점)입니다.
+    (점수가 높을수록 위험, 50점 이상이면 경계 단계)
+
+    [핵심 지표]
+    - 미국채 10년물: {f"{m['tnx']['val']:.2f}% (전일대비 {m['tnx']['diff']:.2f})" if 'tnx' in m else "N/A"}
+    - 원/달러 환율: {f"{m['krw']['val']:.0f}원" if 'krw' in m else "N/A"}
+    - 필라델피아 반도체: {f"{m['sox']['pct']:.2f}% 등락 (5일 고점 대비 {m['sox']['dd']:.1f}%, 60일 고점 대비 {m['sox'].get('dd60', 0):.1f}% 하락 중)" if 'sox' in m else "N/A"}
+    - 외국인 코스피: {inv_kospi['val']}억원
+    - 외국인 코스닥: {inv_kosdaq['val']}억원
+
+    [오늘 주요 일정]
+    {calendar_str}
+
+    [뉴스 헤드라인]
+    {news_titles}
+
+    위 데이터를 종합하여 투자 가이드를 JSON으로 작성해주세요.
+    말투는 간결하고 전문적으로(해요체).
+    JSON 키: "headline"(시장 총평, 이모지 포함), "portfolio"(구체적 전략, HTML 태그 사용 가능)
+    """
+
+# --- 서킷 브레이커 ---
+def _breaker(model, key_id):
+    # _lock 안에서 호출. 없으면 만들고, 오래 안 쓴 키의 상태부터 버림
+    b = _breakers.get((model, key_id))
+    if b is None:
+        b = _breakers[(model, key_id)] = {"fails": 0, "open_until": 0.0, "ok": 0, "err": 0}
+        while len(_breakers) > BREAKERS_SIZE: _breakers.popitem(last=False)
+    _breakers.move_to_end((model, key_id))
+    return b
+
+def _allowed(model, key_id):
+    with _lock:
+        return time.time() >= _breaker(model, key_id)["open_until"]
+
+def _record(model, key_id, ok):
+    with _lock:
+        b = _breaker(model, key_id)
+        if ok:
+            b["fails"], b["ok"] = 0, b["ok"] + 1
+        else:
+            b["fails"], b["err"] = b["fails"] + 1, b["err"] + 1
+            if b["fails"] >= FAIL_THRESHOLD:
+                b["open_until"] = time.time() + COOLDOWN
+
+def breaker_stats(api_key):
+    # 이 키로 본 모델별 상태
+    now, key_id = time.time(), _key_id(api_key)
+    with _lock:
+        rows = {m: _breakers.get((m, key_id)) or {"fails": 0, "open_until": 0.0, "ok": 0, "err": 0} for m in MODELS}
+    return {m: {"ok": b["ok"], "err": b["err"], "fails": b["fails"],
+                "cooldown": max(0, int(b["open_until"] - now))} for m, b in rows.items()}
+
+def _call_model(api_key, model_name, prompt):
+    url = f"https://generativelanguage.googleapis.com/v1/models/{model_name}:generateContent?key={api_key}"
+    headers = {'Content-Type': 'application/json'}
+    try:
+        with metrics.span(f"gemini.{model_name}"):
+            res = http_client.post(url, headers=headers, json={"contents": [{"parts": [{"text": prompt}]}]}, timeout=MODEL_TIMEOUT)
+            if res.status_code != 200: raise RuntimeError(f"{res.status_code}")
+        text = res.json()['candidates'][0]['content']['parts'][0]['text']
+        match = re.search(r'\{.*\}', text, re.DOTALL)
+        if not match: raise ValueError("JSON 응답 없음")
+        result = json.loads(match.group(0))
+    except Exception:
+        _record(model_name, _key_id(api_key), False)
+        raise
+    _record(model_name, _key_id(api_key), True)
+    return result
+
+def _race(api_key, prompt):
+    # 모델을 순서대로 출발시키되, 앞 모델이 HEDGE_DELAY 안에 끝나지 않으면 다음 모델도 같이 달리게 함
+    models = [m for m in MODELS if _allowed(m, _key_id(api_key))]
+    if not models: return {"error": "모든 모델이 일시 차단 상태입니다 (쿨다운 중)."}
+
+    futures, last_error = [], ""
+    queue = list(models)
+    while queue or futures:
+        if queue:
+            futures.append(_pool.submit(_call_model, api_key, queue.pop(0), prompt))
+        done, _ = wait(futures, timeout=HEDGE_DELAY if queue else None, return_when=FIRST_COMPLETED)
+        for fut in done:
+            futures.remove(fut)
+            try:
+                return fut.result()
+            except Exception as e:
+                last_error = _clean(e)
+    return {"error": f"AI 연결 실패. Error: {last_error}"}
+
+def _run(key, api_key, prompt):
+    try:
+        result = _race(api_key, prompt)
+    except Exception as e:
+        result = {"error": f"AI 연결 실패. Error: {_clean(e)}"}
+    err_key = (key, _key_id(api_key))
+    with _lock:
+        _pending.discard(key)
+        if "error" in result:
+            _errors[err_key] = (result["error"], time.time())
+            _errors.move_to_end(err_key)
+            while len(_errors) > ERRORS_SIZE: _errors.popitem(last=False)
+        else:
+            _errors.pop(err_key, None)
+            _memo[key] = result
+            _memo.move_to_end(key)
+            while len(_memo) > MEMO_SIZE: _memo.popitem(last=False)
+
+def request_analysis(api_key, m, inv_kospi, inv_kosdaq, score, news_titles, calendar_str):
+    # 반환: ("off", None) 키 없음 / ("ready", 결과) / ("pending", None) 분석 중 / ("error", 메시지)
+    if not api_key: return "off", None
+    key = input_key(m, inv_kospi, inv_kosdaq, score, news_titles, calendar_str)
+    with _lock:
+        if key in _memo:
+            _memo.move_to_end(key)
+            return "ready", _memo[key]
+        if key in _pending: return "pending", None
+        err = _errors.get((key, _key_id(api_key)))
+        if err and time.time() - err[1] < ERROR_RETRY: return "error", err[0]
+        _pending.add(key)
+    prompt = build_prompt(m, inv_kospi, inv_kosdaq, score, news_titles, calendar_str)
+    threading.Thread(target=_run, args=(key, api_key, prompt), name="gemini-analysis", daemon=True).start()
+    return "pending", None
+
+def wait_analysis(api_key, m, inv_kospi, inv_kosdaq, score, news_titles, calendar_str, timeout=20, poll=0.2):
+    # request_analysis를 결과가 나올 때까지(최대 timeout초) 기다리는 버전 - 페이지가 아닌 CLI/스크립트용
+    deadline = time.monotonic() + timeout
+    while True:
+        status, value = request_analysis(api_key, m, inv_kospi, inv_kosdaq, score, news_titles, calendar_str)
+        if status != "pending" or time.monotonic() >= deadline: return status, value
+        time.sleep(poll)
@@ -0,0 +1,236 @@
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+
+import metrics
+import snapshot_store
+
+# --- 위험도 알림 ---
+# 페이지를 열어 두지 않아도 위험도/요인이 기준을 넘으면 웹훅·파일로 바로 알림.
+# - 규칙: 지표가 above 이상(또는 below 이하)이면 발생, clear 아래(위)로 돌아와야 해제 (히스테리시스)
+#   조건이 for초 동안 계속 유지돼야 상태를 바꿈 (디바운스 - 한 번 튄 값으로 울렸다 꺼지지 않게)
+# - 평가: 수집 데몬(collector.py)이 스냅샷을 저장한 직후 바로, 또는 이 모듈을 따로 띄우면 스냅샷 DB를 POLL_SECONDS마다 확인
+#   (--intraday면 장중 시세 틱이 들어올 때마다 시세 요인을 덮어써서 다시 평가)
+# - 전송: 평가 스레드를 막지 않도록 큐 + 전송 스레드. 실패하면 SEND_RETRIES번 다시 시도
+# 지표 이름: score(종합), factor.<요인>(0~100), risk.snapshot_inputs의 입력값 (krw, vix, sox_dd, inv, inv5, inv20 등)
+# 설정: MORNING_ALERT_WEBHOOK=url[,url...], MORNING_ALERT_FILE=alerts.jsonl, 규칙은 alert_rules.json (MORNING_ALERT_RULES)
+# 사용: python alerts.py [--intraday] [--webhook URL] [--file alerts.jsonl]
+
+RULES_FILE = os.environ.get(
+    "MORNING_ALERT_RULES",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "alert_rules.json"),
+)
+POLL_SECONDS = 2.0    # 스냅샷 DB에 새 행이 생겼는지 확인하는 주기
+SEND_RETRIES = 2      # 전송 실패 시 다시 시도 횟수 (0.5초, 1초 간격)
+SEND_TIMEOUT = 5
+
+# 규칙 이름 -> {"metric", "above" 또는 "below", "clear"(해제 기준, 없으면 발생 기준과 같음), "for"(초), "message"}
+# alert_rules.json에 같은 이름으로 넣으면 덮어쓰고, null이면 끔
+DEFAULT_RULES = {
+    "risk_50": {"metric": "score", "above": 50, "clear": 45, "message": "종합 위험도 50점 이상"},
+    "risk_70": {"metric": "score", "above": 70, "clear": 65, "message": "종합 위험도 70점 이상"},
+    "krw_1450": {"metric": "krw", "above": 1450, "clear": 1440, "message": "원/달러 환율 1,450원 이상"},
+    "vix_25": {"metric": "vix", "above": 25, "clear": 22, "for": 60, "message": "VIX 25 이상"},
+    "sox_dd": {"metric": "sox_dd", "above": 5, "clear": 3, "message": "반도체(SOX) 5일 고점 대비 5% 이상 하락"},
+    "inv_outflow": {"metric": "inv", "below": -3000, "clear": -1500, "message": "외국인 당일 3,000억 이상 순매도"},
+    "inv5_outflow": {"metric": "inv5", "below": -15000, "clear": -10000, "message": "외국인 5거래일 누적 1.5조 이상 순매도"},
+}
+
+def check_rule(name, rule):
+    # 설정 오류는 시작할 때 바로 드러나게 ValueError
+    if ("above" in rule) == ("below" in rule):
+        raise ValueError(f"{name}: above/below 중 하나만 지정")
+    if "metric" not in rule:
+        raise ValueError(f"{name}: metric 없음")
+    if "above" in rule and rule.get("clear", rule["above"]) > rule["above"]:
+        raise ValueError(f"{name}: clear는 above 이하여야 함")
+    if "below" in rule and rule.get("clear", rule["below"]) < rule["below"]:
+        raise ValueError(f"{name}: clear는 below 이상이어야 함")
+    return {"for": 0, "message": name, **rule, "clear": rule.get("clear", rule.get("above", rule.get("below")))}
+
+def load_rules(path=RULES_FILE):
+    rules = dict(DEFAULT_RULES)
+    try:
+        with open(path, encoding="utf-8") as f:
+            rules.update(json.load(f))
+    except (OSError, ValueError):
+        pass
+    return {name: check_rule(name, rule) for name, rule in rules.items() if rule}
+
+def snapshot_values(snapshot, live=None, since=0):
+    # 스냅샷 -> {지표 이름: 값}. live: 장중 엔진이면 since 버전 이후 틱으로 바뀐 시세 게이지와 그 시세 요인만 덮어씀
+    # (스냅샷보다 먼저 들어온 틱은 덮어쓰지 않음 -> 장 마감 후 새 스냅샷 값이 지난 틱 값에 가려지지 않게)
+    from risk import MARKET_FACTORS, compute_risk_score, market_factor, snapshot_inputs
+
+    results = snapshot['results']
+    data, factors, score = dict(results['market'] or {}), snapshot['risk_factors'], snapshot['risk_score']
+    if live is not None:
+        _, gauges = live.changes_since(since)
+        if gauges:
+            data.update({k: {**data.get(k, {}), **g} for k, g in gauges.items()})
+            factors = dict(factors)
+            for key, g in gauges.items():
+                if key in MARKET_FACTORS:
+                    name, value = market_factor(key, g)
+                    factors[name] = value
+            score = compute_risk_score(factors)
+    values = snapshot_inputs(data, results['inv_kospi'], results['inv_kosdaq'], snapshot['inv_missing'], results.get('flows'))
+    values.update({f"factor.{k}": v for k, v in factors.items() if v is not None})
+    values["score"] = score
+    return values
+
+
+# --- 전송 ---
+class FileSink:
+    # 알림을 JSON 한 줄씩 추가
+    def __init__(self, path):
+        self.path, self.name = path, "file"
+        self._lock = threading.Lock()
+
+    def send(self, event):
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+
+class WebhookSink:
+    # JSON POST. 본문의 "text"는 메신저 웹훅에서 바로 보이는 한 줄 요약
+    def __init__(self, url):
+        self.url, self.name = url, "webhook"
+
+    def send(self, event):
+        import http_client
+
+        res = http_client.post(self.url, json=event, timeout=SEND_TIMEOUT)
+        res.raise_for_status()
+
+
+class AlertEngine:
+    def __init__(self, rules, sinks):
+        self.rules, self.sinks = rules, sinks
+        self.state = {name: {"firing": False, "since": None, "value": None} for name in rules}
+        self.sent = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        threading.Thread(target=self._sender, name="alerts-send", daemon=True).start()
+
+    def _step(self, name, rule, value, now):
+        # 규칙 하나 평가. 상태가 바뀌면 알림 dict, 아니면 None. 값이 없으면(수집 실패) 상태 유지
+        st = self.state[name]
+        if value is None: return None
+        st["value"] = value
+        if "above" in rule:
+            change = value < rule["clear"] if st["firing"] else value >= rule["above"]
+        else:
+            change = value > rule["clear"] if st["firing"] else value <= rule["below"]
+        if not change:
+            st["since"] = None
+            return None
+        if st["since"] is None: st["since"] = now
+        if now - st["since"] < rule["for"]: return None
+        st["firing"], st["since"] = not st["firing"], None
+        threshold = rule.get("above", rule.get("below"))
+        sign = "≥" if "above" in rule else "≤"
+        text = (f"🚨 {rule['message']} ({rule['metric']} {value:,.2f} {sign} {threshold:,})" if st["firing"]
+                else f"✅ 해제: {rule['message']} ({rule['metric']} {value:,.2f})")
+        return {
+            "rule": name, "state": "firing" if st["firing"] else "resolved", "metric": rule["metric"],
+            "value": value, "threshold": threshold, "clear": rule["clear"], "ts": now,
+            "kst": (datetime.utcfromtimestamp(now) + timedelta(hours=9)).strftime('%Y-%m-%d %H:%M:%S'), "text": text,
+        }
+
+    def evaluate(self, values, now=None):
+        # values: {지표 이름: 값}. 상태가 바뀐 규칙의 알림을 전송 큐에 넣고 반환
+        now = time.time() if now is None else now
+        with self._lock, metrics.span("alerts.evaluate"):
+            events = [e for e in (self._step(name, rule, values.get(rule["metric"]), now)
+                                  for name, rule in self.rules.items()) if e]
+        for e in events:
+            self._queue.put(e)
+        return events
+
+    def evaluate_snapshot(self, snapshot, live=None, since=0):
+        # 데이터 시각은 스냅샷 수집 시각 (장중 틱을 덮어쓰면 지금)
+        return self.evaluate(snapshot_values(snapshot, live, since), None if live is not None else snapshot.get("ts"))
+
+    def _sender(self):
+        while True:
+            event = self._queue.get()
+            for sink in self.sinks:
+                for attempt in range(SEND_RETRIES + 1):
+                    try:
+                        with metrics.span(f"alerts.{sink.name}"):
+                            sink.send(event)
+                        break
+                    except Exception:
+                        metrics.count_error(f"alerts.{sink.name}")
+                        if attempt < SEND_RETRIES: time.sleep(0.5 * (attempt + 1))
+            with self._lock:
+                self.sent += 1
+            self._queue.task_done()
+
+    def flush(self, timeout=10):
+        # 큐에 쌓인 알림을 다 보낼 때까지 대기 (종료 전/테스트용). 반환: 다 보냈으면 True
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() > deadline: return False
+            time.sleep(0.01)
+        return True
+
+    def firing(self):
+        with self._lock:
+            return {name: st["value"] for name, st in self.state.items() if st["firing"]}
+
+
+def sinks_from_env(webhooks=None, path=None):
+    webhooks = webhooks or [u for u in os.environ.get("MORNING_ALERT_WEBHOOK", "").split(",") if u.strip()]
+    path = path or os.environ.get("MORNING_ALERT_FILE")
+    return [WebhookSink(u.strip()) for u in webhooks] + ([FileSink(path)] if path else [])
+
+def from_env():
+    # 전송할 곳이 하나도 설정되지 않았으면 None (수집 데몬은 알림 없이 동작)
+    sinks = sinks_from_env()
+    return AlertEngine(load_rules(), sinks) if sinks else None
+
+def watch(engine, db=snapshot_store.DEFAULT_DB, poll=POLL_SECONDS, live=None, stop=None):
+    # 스냅샷 DB를 poll초마다 확인해서 새 스냅샷이면 평가 (장중 엔진이 있어도 항상 - 장 마감 후엔 틱이 없음)
+    # live(장중 엔진)가 있으면 그 스냅샷 이후 틱으로 버전이 바뀔 때마다도 다시 평가
+    last_ts, last_version, since, snapshot = None, None, 0, None
+    while stop is None or not stop.is_set():
+        ts = snapshot_store.latest_ts(db)
+        if ts is not None and ts != last_ts:
+            snapshot = snapshot_store.load_latest(db)
+            last_ts = ts
+            if snapshot is not None:
+                since = last_version = live.version if live is not None else 0
+                engine.evaluate_snapshot(snapshot, live, since)
+        elif snapshot is not None and live is not None and live.version != last_version:
+            last_version = live.version
+            engine.evaluate_snapshot(snapshot, live, since)
+        time.sleep(poll)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="위험도 알림 (스냅샷 DB 감시)")
+    parser.add_argument("--db", default=snapshot_store.DEFAULT_DB, help="스냅샷 SQLite 경로")
+    parser.add_argument("--rules", default=RULES_FILE, help="규칙 JSON (기본 규칙에 덮어씀)")
+    parser.add_argument("--webhook", action="append", help="알림 POST 주소 (여러 번 가능, 기본: MORNING_ALERT_WEBHOOK)")
+    parser.add_argument("--file", help="알림 JSONL 파일 (기본: MORNING_ALERT_FILE)")
+    parser.add_argument("--poll", type=float, default=POLL_SECONDS, help="스냅샷 확인 주기 (초)")
+    parser.add_argument("--intraday", action="store_true", help="장중 시세 틱마다 다시 평가")
+    args = parser.parse_args()
+
+    sinks = sinks_from_env(args.webhook, args.file)
+    if not sinks: parser.error("--webhook 또는 --file (MORNING_ALERT_WEBHOOK / MORNING_ALERT_FILE) 필요")
+    rules = load_rules(args.rules)
+    print(f"알림 규칙 {len(rules)}개: {', '.join(rules)} -> {', '.join(s.name for s in sinks)}", flush=True)
+    live = None
+    if args.intraday:
+        import intraday
+        live = intraday.start()
+    try:
+        watch(AlertEngine(rules, sinks), args.db, args.poll, live)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,94 @@
+import os
+import sys
+import time
+from itertools import islice
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parsing
+
+# --- 파싱 속도 벤치마크 ---
+# HTML 픽스처(bench/fixtures)로 기존 BeautifulSoup(html.parser) 방식과 parsing 모듈의 결과(same)와 시간을 비교.
+# 픽스처는 실제 페이지가 아니라 표식만 맞춘 가짜 페이지(make_fixtures.py 참고)라서, 여기 시간 차이가
+# 실제 페이지에서의 속도 차이를 뜻하지는 않음
+# 사용: python bench/bench_parse.py [반복 횟수]
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def _read(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+# 기존(수정 전) 방식 - 비교 기준
+def old_index(content):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(content.decode('euc-kr', 'replace'), 'html.parser')
+    for dt, dd in zip(soup.select('.lst_kos_info dt'), soup.select('.lst_kos_info dd')):
+        if "외국인" in dt.text: return dd.select_one('span').text.strip()
+
+def old_daily(content):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(content.decode('euc-kr', 'replace'), 'html.parser')
+    row = soup.select_one('table.type_1 tr:nth-of-type(2)')
+    return row.select('td')[2].text.strip()
+
+def old_calendar(content):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(content, 'html.parser')
+    out = []
+    for row in soup.select_one('#economicCalendarData').select('tr'):
+        if not row.get('id', '').startswith('eventRowId'): continue
+        sentiment = row.select_one('.sentiment')
+        out.append({'time': row.select_one('.time').text.strip(), 'event': row.select_one('.event').text.strip(),
+                    'importance': len(sentiment.select('.grayFullBullishIcon')) if sentiment else 0})
+    return out
+
+def old_news(content):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(content.decode('euc-kr', 'replace'), 'html.parser')
+    out = []
+    for item in soup.select('.newsSchResult .newsList li dl'):
+        at = item.select_one('.articleSubject a')
+        if at: out.append((at.text.strip(), at['href']))
+        if len(out) >= 5: break
+    return out
+
+def new_news(content, limit=5):
+    # news.py와 같은 경로 (결과 목록만 잘라서 기사 순회) - 비교용으로 (제목, href) 앞 limit개
+    block = parsing.news_block(content.decode('euc-kr', 'replace'))
+    return [(title, href) for title, href, _, _ in islice(parsing.iter_news_entries(block), limit)]
+
+CASES = [
+    ("naver_sise_index.html", old_index, lambda c: parsing.parse_index_foreign(c.decode('euc-kr', 'replace'))),
+    ("naver_investor.html", old_daily, lambda c: parsing.parse_daily_foreign(c.decode('euc-kr', 'replace'))),
+    ("forexpros_calendar.html", old_calendar, lambda c: list(parsing.iter_calendar_rows(c))),
+    ("naver_news_search.html", old_news, new_news),
+]
+
+def _time(fn, arg, n):
+    start = time.perf_counter()
+    for _ in range(n): result = fn(arg)
+    return (time.perf_counter() - start) / n * 1000, result
+
+def run(n=20):
+    try:
+        import bs4  # noqa: F401
+        has_bs4 = True
+    except ImportError:
+        has_bs4 = False
+
+    rows = []
+    for name, old_fn, new_fn in CASES:
+        content = _read(name)
+        new_ms, new_res = _time(new_fn, content, n)
+        row = {"fixture": name, "kb": round(len(content) / 1024), "new_ms": round(new_ms, 2)}
+        if has_bs4:
+            old_ms, old_res = _time(old_fn, content, n)
+            row.update(old_ms=round(old_ms, 2), same=old_res == new_res)
+        rows.append(row)
+    return rows
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    for row in run(n):
+        print("  ".join(f"{k}={v}" for k, v in row.items()))
@@ -0,0 +1,257 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH = os.path.join(ROOT, "bench")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH)
+
+from upstream import FIXTURES, Upstream
+
+# --- 오프라인 벤치마크 ---
+# 실제 서비스 대신 로컬 업스트림 대역 서버(bench/upstream.py)와 yfinance 픽스처로 돌림 -> 네트워크 없이 재현 가능.
+# 측정: 수집 함수별 (뉴스는 빈 윈도 / 증분), 외국인 수급 히스토리 (빈 저장소 / 증분), 위험도 계산, 장중 1분봉 재생, 관심 종목 300개 갱신, AI 브리핑 호출, 알림 평가~웹훅 수신, 페이지 전체 실행(AppTest, 새 프로세스 cold / 같은 프로세스 warm),
+#       cli.py 시작~출력 (새로 수집 / 저장된 스냅샷 재사용)
+# 결과는 bench/results.jsonl(.gitignore, MORNING_BENCH_RESULTS로 위치 변경)에 git 커밋 해시와 함께 한 줄씩 추가
+# -> --compare로 이전 커밋과 비교
+# 준비: pip install -r bench/requirements.txt
+# 사용: python bench/bench_suite.py [-n 5] [--latency 0.05] [--fail-rate 0.1] [--only collect.] [--no-record] [--compare]
+
+RESULTS_FILE = os.environ.get("MORNING_BENCH_RESULTS", os.path.join(BENCH, "results.jsonl"))
+YF_FIXTURE = os.path.join(FIXTURES, "yf_daily.csv.gz")
+
+WATCHLIST_SIZE = 300
+
+def _watchlist_fixture(workdir):
+    # 가상 종목 WATCHLIST_SIZE개의 1년치 일봉 (yf_daily 픽스처에 이어 붙여 씀)
+    import make_fixtures
+
+    path = os.path.join(workdir, "watchlist_daily.csv.gz")
+    make_fixtures.yf_frame(make_fixtures.watchlist_levels(WATCHLIST_SIZE), years=1).to_csv(path, index=False, float_format="%.4f")
+    return path
+
+def _env(upstream_url, workdir):
+    # 저장소 모듈을 import하기 전에 설정해야 함 (모듈 상수로 읽음)
+    return {
+        "MORNING_UPSTREAM": upstream_url,
+        "MORNING_YF_FIXTURE": os.pathsep.join([YF_FIXTURE, _watchlist_fixture(workdir)]),
+        "MORNING_HISTORY_DIR": os.path.join(workdir, "price_history"),
+        "MORNING_SNAPSHOT_DB": os.path.join(workdir, "snapshots.db"),
+        "MORNING_FLOW_DB": os.path.join(workdir, "flows.db"),
+        "MORNING_METRICS_PORT": "0",
+    }
+
+def _time(fn, n):
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(samples), 2), "min_ms": round(min(samples), 2), "n": n}
+
+def _app_cold(env):
+    # 새 프로세스에서 import부터 첫 렌더까지 (스냅샷 DB가 비어 있으면 페이지가 직접 수집)
+    code = (
+        "import time; t = time.perf_counter()\n"
+        "from streamlit.testing.v1 import AppTest\n"
+        f"at = AppTest.from_file({os.path.join(ROOT, 'morning.py')!r}, default_timeout=120).run()\n"
+        "assert not at.exception, at.exception\n"
+        "print((time.perf_counter() - t) * 1000)\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], env={**os.environ, **env}, cwd=ROOT,
+                         capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+def _cli(env, *args):
+    # cli.py 한 번 실행하는 전체 시간 (인터프리터 시작 포함)
+    subprocess.run([sys.executable, os.path.join(ROOT, "cli.py"), *args], env={**os.environ, **env}, cwd=ROOT,
+                   stdout=subprocess.DEVNULL, check=True)
+
+def cases(env, up):
+    # 이름 -> (함수, 이 벤치 전에 한 번 실행할 준비 함수). 준비 함수가 없으면 첫 실행도 측정에 포함
+    import ai_analysis
+    import alerts
+    import collect
+    import flow_history
+    import news
+    import price_history
+    import risk
+    from source_cache import cache
+
+    closes = None
+
+    def full_closes():
+        nonlocal closes
+        if closes is None:
+            closes = price_history.closes(list(collect.TICKERS.values()), days=None)
+        return closes
+
+    def market_cold():
+        # 빈 히스토리 디렉터리에서 1년치 초기 다운로드부터
+        with tempfile.TemporaryDirectory() as d:
+            symbols = list(collect.TICKERS.values())
+            price_history.update(symbols, base=d)
+            collect.calc_metrics(price_history.closes(symbols, days=max(collect.DD_WINDOWS), base=d))
+
+    snapshot_data = {}
+
+    def snapshot_inputs():
+        if not snapshot_data:
+            snapshot_data.update(collect.get_all_data()[0] or {})
+        return snapshot_data
+
+    def flows_initial():
+        # 빈 저장소에서 두 시장 INITIAL_PAGES개 페이지씩 동시 수집
+        with tempfile.TemporaryDirectory() as d:
+            flow_history.update(path=os.path.join(d, "flows.db"))
+
+    def news_cold():
+        # 빈 윈도에서 전체 키워드 검색 + 파싱 + 중복 제거 (이후 collect.news는 바뀐 목록만 처리)
+        window = news.NewsWindow()
+        try:
+            window.refresh()
+        finally:
+            window._pool.shutdown()
+
+    inv = {"val": -1200, "str": "-1,200"}
+    prompt = ai_analysis.build_prompt({}, inv, inv, 45, "뉴스", "일정")
+
+    def intraday_day():
+        # 한국 장 하루치 1분봉 전체를 엔진에 통과 (틱당 증분 갱신 비용)
+        import intraday
+
+        engine = intraday.IntradayEngine(collect.TICKERS, windows=collect.DD_WINDOWS)
+        engine.seed(price_history.closes(list(collect.TICKERS.values()), days=max(collect.DD_WINDOWS)))
+        intraday.run(engine, intraday.ReplayFeed(os.path.join(FIXTURES, "intraday_1m.csv.gz"), speed=0))
+
+    import make_fixtures
+    watch_symbols = list(make_fixtures.watchlist_levels(WATCHLIST_SIZE))
+
+    def watchlist_cold():
+        # 빈 히스토리에서 WATCHLIST_SIZE개 종목 초기 수집 + 지표/범위 계산
+        with tempfile.TemporaryDirectory() as d:
+            price_history.update(watch_symbols, base=d)
+            collect.calc_metrics(price_history.closes(watch_symbols, days=max(collect.DD_WINDOWS), base=d))
+
+    def watchlist_warm():
+        import watchlist
+        watchlist.fetch_table(watch_symbols)
+
+    from upstream import RECEIVER_HOST
+
+    alert_engine = alerts.AlertEngine({"risk_70": alerts.check_rule("risk_70", alerts.DEFAULT_RULES["risk_70"])},
+                                      [alerts.WebhookSink(f"https://{RECEIVER_HOST}/bench")])
+
+    def alerts_push():
+        # 위험도 70 돌파 -> 해제를 평가해서 로컬 웹훅 수신 대역이 두 알림을 다 받을 때까지 (평가 + 큐 + HTTP POST)
+        received = len(up.received)
+        alert_engine.evaluate({"score": 72})
+        alert_engine.evaluate({"score": 40})
+        while len(up.received) < received + 2: time.sleep(0.001)
+
+    def app_warm_setup():
+        from streamlit.testing.v1 import AppTest
+        app = AppTest.from_file(os.path.join(ROOT, "morning.py"), default_timeout=120)
+        app.run()
+        return app
+
+    app = {}
+
+    return {
+        "collect.weather": (collect.get_weather, None),
+        "collect.inv_intraday": (lambda: collect._investors_intraday("KOSPI"), None),
+        "collect.inv_daily": (lambda: collect._investors_daily("KOSPI"), None),
+        "collect.calendar": (collect.get_economic_calendar, None),
+        "collect.news_cold": (news_cold, None),
+        "collect.news": (collect.get_financial_news, collect.get_financial_news),
+        "collect.flows_initial": (flows_initial, None),
+        "collect.flows_incremental": (flow_history.recent_sums, flow_history.update),
+        "collect.market_cold": (market_cold, None),
+        "collect.market_warm": (collect.get_all_data, collect.get_all_data),
+        "collect.all_uncached": (lambda: (cache.clear(), collect.collect_all()), None),
+        "collect.all_cached": (collect.collect_all, collect.collect_all),
+        "risk.snapshot": (lambda: risk.compute_risk(snapshot_inputs(), inv, inv), snapshot_inputs),
+        "risk.history_3y": (lambda: risk.score_history(risk.history_inputs(full_closes(), collect.TICKERS)),
+                            lambda: (price_history.extend(list(collect.TICKERS.values()), period="3y"), full_closes())),
+        "intraday.replay_day": (intraday_day, None),
+        f"watchlist.{WATCHLIST_SIZE}_cold": (watchlist_cold, None),
+        f"watchlist.{WATCHLIST_SIZE}_warm": (watchlist_warm, watchlist_warm),
+        "ai.race": (lambda: ai_analysis._race("bench-key", prompt), None),
+        "alerts.push": (alerts_push, alerts_push),
+        "app.cold": (lambda: _app_cold(env), None),
+        "app.warm": (lambda: app["at"].run(), lambda: app.setdefault("at", app_warm_setup())),
+        # 스케줄러 호출용 CLI: 새로 수집 / 직전 저장 스냅샷 재사용
+        "cli.collected": (lambda: _cli(env, "--fresh"), None),
+        "cli.stored": (lambda: _cli(env, "--max-age", "3600"), lambda: _cli(env, "--fresh")),
+    }
+
+def run(n=5, latency=0.0, fail_rate=0.0, only=None):
+    up = Upstream(latency=latency, fail_rate=fail_rate).start()
+    with tempfile.TemporaryDirectory() as workdir:
+        env = _env(up.url, workdir)
+        os.environ.update(env)
+        results = {}
+        try:
+            for name, (fn, setup) in cases(env, up).items():
+                if only and not any(name.startswith(p) for p in only): continue
+                if setup: setup()
+                # 새 프로세스 실행은 비싸므로 반복을 줄임
+                results[name] = _time(fn, max(1, n // 3) if name in ("app.cold", "cli.collected") else n)
+                print(f"{name:24s} {results[name]['median_ms']:10.2f} ms  (min {results[name]['min_ms']:.2f}, n={results[name]['n']})", flush=True)
+        finally:
+            up.stop()
+    return results, up.stats()
+
+# --- 커밋별 결과 기록 ---
+def git_rev():
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    return git("rev-parse", "--short", "HEAD") or "unknown", bool(git("status", "--porcelain", "--untracked-files=no"))
+
+def record(row):
+    row = {**row, "ts": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    with open(RESULTS_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    return row
+
+def compare(row):
+    # 같은 조건(params)으로 기록된 이전 커밋 중 가장 최근 결과와 비교
+    if not os.path.exists(RESULTS_FILE): return
+    with open(RESULTS_FILE, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    prev = next((r for r in reversed(rows) if r["params"] == row["params"] and r["commit"] != row["commit"]), None)
+    if prev is None:
+        print("비교할 이전 커밋 결과 없음")
+        return
+    print(f"\n{prev['commit']} -> {row['commit']}{' (dirty)' if row['dirty'] else ''}")
+    for name, cur in row["results"].items():
+        old = prev["results"].get(name)
+        if not old: continue
+        change = (cur["median_ms"] - old["median_ms"]) / old["median_ms"] * 100 if old["median_ms"] else 0.0
+        print(f"{name:24s} {old['median_ms']:10.2f} -> {cur['median_ms']:10.2f} ms  ({change:+.1f}%)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="오프라인 벤치마크")
+    parser.add_argument("-n", type=int, default=5, help="반복 횟수")
+    parser.add_argument("--latency", type=float, default=0.0, help="업스트림 응답 지연 (초)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="업스트림 실패 비율 (0~1)")
+    parser.add_argument("--only", action="append", help="이 접두사로 시작하는 벤치만 (예: collect.)")
+    parser.add_argument("--no-record", action="store_true", help="results.jsonl에 기록하지 않음")
+    parser.add_argument("--compare", action="store_true", help="이전 커밋 결과와 비교")
+    args = parser.parse_args()
+
+    results, upstream_stats = run(args.n, args.latency, args.fail_rate, args.only)
+    print("업스트림 요청:", upstream_stats)
+    params = {"n": args.n, "latency": args.latency, "fail_rate": args.fail_rate, "only": args.only}
+    commit, dirty = git_rev()
+    row = {"commit": commit, "dirty": dirty, "params": params, "results": results}
+    if not args.no_record:
+        row = record(row)
+    if args.compare:
+        compare(row)
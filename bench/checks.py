@@ -0,0 +1,411 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH = os.path.join(ROOT, "bench")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH)
+
+# --- 동작 확인 (오프라인) ---
+# bench_suite.py가 '얼마나 빠른지'를 재는 것과 달리, 여기는 결과가 맞는지를 assert로 확인.
+# 네트워크 없이 픽스처/대역 서버만 씀. 하나라도 실패하면 종료 코드 1
+# 사용: python bench/checks.py [--only alerts.]
+
+
+class _Sink:
+    # 받은 알림을 메모리에 모아 두는 전송 대역
+    name = "memory"
+
+    def __init__(self):
+        self.events = []
+
+    def send(self, event):
+        self.events.append(event)
+
+
+def _engine(rules):
+    import alerts
+
+    sink = _Sink()
+    return alerts.AlertEngine({name: alerts.check_rule(name, rule) for name, rule in rules.items()}, [sink]), sink
+
+def check_alerts_hysteresis():
+    # above에서 발생, clear 아래로 내려가야 해제. 그 사이 값으로는 상태가 안 바뀜
+    engine, sink = _engine({"r": {"metric": "x", "above": 10, "clear": 8}})
+    states = [[e["state"] for e in engine.evaluate({"x": v}, t)] for t, v in enumerate([9, 10, 9, 8.5, 11, 7.9, 9, 10])]
+    assert states == [[], ["firing"], [], [], [], ["resolved"], [], ["firing"]], states
+    # below 규칙 (외국인 순매도): -3000 이하 발생, -1500 초과로 올라와야 해제
+    engine, _ = _engine({"out": {"metric": "inv", "below": -3000, "clear": -1500}})
+    states = [[e["state"] for e in engine.evaluate({"inv": v}, t)] for t, v in enumerate([-2000, -3500, -2000, -1000])]
+    assert states == [[], ["firing"], [], ["resolved"]], states
+    # 값이 없으면(수집 실패) 상태 유지
+    assert engine.evaluate({}, 10) == [] and engine.state["out"]["firing"] is False
+    assert engine.flush() and len(sink.events) == 3
+
+def check_alerts_debounce():
+    # for초 동안 조건이 계속 유지돼야 발생/해제. 중간에 한 번이라도 조건이 깨지면 처음부터 다시
+    engine, _ = _engine({"r": {"metric": "x", "above": 10, "clear": 8, "for": 60}})
+    fired = {}
+    for t, v in [(0, 11), (30, 9), (40, 11), (90, 11), (100, 12), (110, 9), (120, 7), (150, 11), (170, 7.5), (230, 7.9)]:
+        for e in engine.evaluate({"x": v}, t): fired[t] = e["state"]
+    assert fired == {100: "firing", 230: "resolved"}, fired
+
+def check_alerts_rules():
+    import alerts
+
+    for bad in ({"metric": "x", "above": 1, "clear": 2}, {"metric": "x", "below": -1, "clear": -2},
+                {"metric": "x", "above": 1, "below": 0}, {"above": 1}):
+        try:
+            alerts.check_rule("bad", bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"잘못된 규칙이 통과함: {bad}")
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "rules.json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"vix_25": null, "krw_1450": {"metric": "krw", "above": 1480}}')
+        rules = alerts.load_rules(path)
+    assert "vix_25" not in rules and rules["krw_1450"]["clear"] == 1480 and "risk_70" in rules
+
+class _Live:
+    # 장중 엔진 대역 (changes_since / version만)
+    def __init__(self):
+        self.version, self.gauges = 0, {}
+
+    def tick(self, key, **gauge):
+        self.version += 1
+        self.gauges[key] = (self.version, gauge)
+
+    def changes_since(self, version):
+        return self.version, {k: g for k, (v, g) in self.gauges.items() if v > version}
+
+def _snapshot(ts, krw, score=40):
+    return {
+        "ts": ts, "inv_missing": False, "risk_factors": {"krw": 50.0}, "risk_score": score,
+        "results": {"market": {"krw": {"val": krw, "pct": 0.0, "dd": 0.0}}, "flows": {},
+                    "inv_kospi": {"val": 0, "str": "0"}, "inv_kosdaq": {"val": 0, "str": "0"}},
+    }
+
+def check_alerts_watch_with_live():
+    # 장중 엔진이 켜져 있어도 새 스냅샷은 틱과 상관없이 평가되고, 스냅샷 이전 틱 값이 새 스냅샷을 가리지 않음.
+    # 그 뒤 틱으로 버전이 바뀌면 다시 평가
+    import alerts
+    import snapshot_store
+
+    engine, sink = _engine({"krw": {"metric": "krw", "above": 1450, "clear": 1440}})
+    live = _Live()
+    live.tick("krw", val=1400.0, pct=0.0, dd=0.0)  # 장중 마지막 틱 (이후 장 마감)
+    with tempfile.TemporaryDirectory() as d:
+        db = os.path.join(d, "s.db")
+        snapshot_store.save_snapshot(_snapshot(time.time() - 10, 1400.0), db)
+        stop = threading.Event()
+        threading.Thread(target=alerts.watch, args=(engine, db, 0.02, live, stop), daemon=True).start()
+        time.sleep(0.2)
+        assert not engine.firing()
+        snapshot_store.save_snapshot(_snapshot(time.time(), 1500.0), db)  # 틱 없이 새 스냅샷만
+        time.sleep(0.2)
+        assert engine.firing() == {"krw": 1500.0}, engine.firing()
+        live.tick("krw", val=1430.0, pct=0.0, dd=0.0)  # 다시 장이 열려 틱이 들어옴
+        time.sleep(0.2)
+        stop.set()
+    assert engine.flush()
+    assert [(e["rule"], e["state"], e["value"]) for e in sink.events] == [("krw", "firing", 1500.0), ("krw", "resolved", 1430.0)], sink.events
+
+def check_alerts_webhook():
+    # 로컬 웹훅 수신 대역까지 실제 HTTP POST로 도착하는지 (본문 확인)
+    import json
+
+    import alerts
+    import http_client
+    from upstream import RECEIVER_HOST, Upstream
+
+    up, saved = Upstream().start(), http_client.UPSTREAM
+    try:
+        http_client.UPSTREAM = up.url
+        engine = alerts.AlertEngine({"risk_70": alerts.check_rule("risk_70", alerts.DEFAULT_RULES["risk_70"])},
+                                    [alerts.WebhookSink(f"https://{RECEIVER_HOST}/check")])
+        engine.evaluate({"score": 72}, 1.0)
+        engine.evaluate({"score": 68}, 2.0)
+        engine.evaluate({"score": 60}, 3.0)
+        assert engine.flush()
+        bodies = [json.loads(body) for _, path, body in up.received]
+        assert [(b["rule"], b["state"], b["value"]) for b in bodies] == [("risk_70", "firing", 72), ("risk_70", "resolved", 60)], bodies
+    finally:
+        http_client.UPSTREAM = saved
+        up.stop()
+
+def check_intraday_replay():
+    # 재생 피드 이틀치(픽스처 하루 + 하루 뒤로 민 복사본)를 엔진에 흘려, 매일 장 마감 시점의 pct/dd가
+    # '일봉 + 그날 마지막 가격'으로 calc_metrics를 돌린 값과 같은지. 둘째 날은 첫날 종가가 전일 종가여야 함 (재시드)
+    import gzip
+    from datetime import timedelta
+
+    import numpy as np
+    import pandas as pd
+
+    import collect
+    import intraday
+
+    daily = pd.read_csv(os.path.join(BENCH, "fixtures", "yf_daily.csv.gz"), parse_dates=['Date'])
+    history = daily.pivot(index='Date', columns='Ticker', values='Close').reindex(columns=list(collect.TICKERS.values()))
+    rows = list(intraday.ReplayFeed(os.path.join(BENCH, "fixtures", "intraday_1m.csv.gz"), speed=0))
+    rows += [(symbol, ts + timedelta(days=1), price * 1.01) for symbol, ts, price in rows]
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "replay.csv.gz")
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write("ts,symbol,price\n")
+            f.writelines(f"{ts.isoformat()},{symbol},{price}\n" for symbol, ts, price in rows)
+        feed = list(intraday.ReplayFeed(path, speed=0))
+
+    engine = intraday.IntradayEngine(collect.TICKERS, windows=collect.DD_WINDOWS, loader=lambda: history)
+    by_symbol = {symbol: key for key, symbol in collect.TICKERS.items()}
+    cols = ['val', 'pct', 'dd', *(f'dd{n}' for n in collect.DD_WINDOWS)]
+
+    def compare(day, last):
+        # 그날 종가를 일봉에 붙여 calc_metrics와 비교한 뒤, 다음 날 loader가 읽도록 히스토리에 남김 (price_history.update 대역)
+        nonlocal history
+        history = pd.concat([history, pd.DataFrame([last], index=[pd.Timestamp(day)])]).reindex(columns=history.columns)
+        expected = collect.calc_metrics(history)
+        for symbol, key in by_symbol.items():
+            got = [engine.gauges[key][c] for c in cols]
+            want = expected.loc[symbol, cols].to_numpy(dtype=float)
+            assert np.allclose(got, want, rtol=1e-9, atol=1e-9), (day, symbol, dict(zip(cols, got)), dict(zip(cols, want)))
+
+    day, last = None, {}
+    for symbol, ts, price in feed:
+        if day is not None and ts.date() != day:
+            compare(day, last)
+            last = {}
+        day = ts.date()
+        engine.on_tick(symbol, ts, price)
+        last[symbol] = price
+    compare(day, last)
+    assert engine._seed_day == np.datetime64(day, 'D') and len(history) == len(daily['Date'].unique()) + 2
+
+def check_history_download_batches():
+    # DOWNLOAD_CHUNK개 이하는 요청 하나, 넘으면 DOWNLOAD_CHUNK개 이하의 비슷한 크기 청크로
+    import price_history
+
+    parts, saved = [], price_history._download_chunk
+    price_history._download_chunk = lambda part, **kwargs: parts.append(len(part)) or {}
+    try:
+        for n in (12, price_history.DOWNLOAD_CHUNK, price_history.DOWNLOAD_CHUNK + 1, 300):
+            parts.clear()
+            price_history._download([f"S{i}" for i in range(n)], period="1y")
+            chunks = sorted(parts)
+            assert sum(chunks) == n and max(chunks) <= price_history.DOWNLOAD_CHUNK and chunks[-1] - chunks[0] <= 1, (n, chunks)
+            assert len(chunks) == -(-n // price_history.DOWNLOAD_CHUNK), (n, chunks)
+    finally:
+        price_history._download_chunk = saved
+
+def check_history_update_laggards():
+    # 증분 갱신: 최근 종목은 한 요청으로, 오래 밀린 종목만 자기 마지막 봉부터 따로. 마지막 봉은 새 값으로 덮어씀
+    import numpy as np
+
+    import price_history
+
+    def bars(start, n, close=1.0):
+        out = np.zeros(n, dtype=price_history.BAR_DTYPE)
+        out['date'] = np.datetime64(start) + np.arange(n)
+        out['close'] = close
+        return out
+
+    calls, saved = [], price_history._download
+    def download(symbols, start=None, **kwargs):
+        calls.append((sorted(symbols), start))
+        return {s: bars(start, 3, 2.0) for s in symbols}
+    price_history._download = download
+    try:
+        with tempfile.TemporaryDirectory() as d:
+            for symbol, last in (("A", "2026-10-16"), ("B", "2026-10-16"), ("BTC", "2026-10-18"), ("OLD", "2026-06-01")):
+                price_history._save(symbol, bars(np.datetime64(last) - np.timedelta64(9, 'D'), 10), d)
+            added = price_history.update(["A", "B", "BTC", "OLD"], d)
+            assert calls == [(["OLD"], "2026-06-01"), (["A", "B", "BTC"], "2026-10-16")], calls
+            assert added == {"OLD": 3, "A": 3, "B": 3, "BTC": 1}, added  # BTC는 자기 마지막 봉(10-18)부터만 반영
+            btc, a = price_history.load("BTC", d), price_history.load("A", d)
+            assert len(btc) == 10 and btc['close'][-1] == 2.0 and btc['close'][-2] == 1.0
+            assert len(a) == 12 and str(a['date'][-1]) == "2026-10-18" and list(a['close'][-4:]) == [1.0, 2.0, 2.0, 2.0]
+    finally:
+        price_history._download = saved
+
+def check_history_update_race():
+    # 처음 보는 종목을 받는 사이 다른 갱신(데몬/다른 세션)이 같은 파일을 먼저 저장해도 날짜가 두 번 들어가지 않음.
+    # 이미 중복이 저장된 파일도 다음 갱신 때 정리되어 closes()가 다시 동작
+    import numpy as np
+
+    import price_history
+
+    def bars(start, n, close):
+        out = np.zeros(n, dtype=price_history.BAR_DTYPE)
+        out['date'] = np.datetime64(start) + np.arange(n).astype('timedelta64[D]')
+        out['close'] = close
+        return out
+
+    saved = price_history._download
+    with tempfile.TemporaryDirectory() as d:
+        def download(symbols, **kwargs):
+            price_history._save("X", bars("2026-10-12", 5, 1.0), d)  # 먼저 끝난 다른 갱신
+            return {"X": bars("2026-10-12", 5, 2.0)}
+        price_history._download = download
+        try:
+            price_history.update(["X"], d)
+            x = price_history.load("X", d)
+            assert len(x) == 5 and list(x['close']) == [2.0] * 5, x
+            price_history._save("X", np.concatenate([x, x]), d)  # 예전 코드가 남긴 중복 파일
+            price_history._download = lambda symbols, start=None, **kwargs: {"X": bars(start, 1, 3.0)}
+            price_history.update(["X"], d)
+            x = price_history.load("X", d)
+            assert list(x['close']) == [2.0] * 4 + [3.0] and len(np.unique(x['date'])) == 5, x
+            assert len(price_history.closes(["X"], base=d)) == 5
+        finally:
+            price_history._download = saved
+
+def check_source_cache_evict():
+    # max_entries를 넘으면 가장 오래 안 쓴 인자 조합부터 버림. 다른 이름의 항목은 그대로
+    from source_cache import SourceCache
+
+    c, calls = SourceCache(), []
+    fetch = lambda x: calls.append(x) or x
+    c.get("other", fetch, 60, ("o",))
+    for x in ("a", "b", "c"):
+        c.get("wl", fetch, 60, (x,), max_entries=2)
+    assert sorted(k for k in c._entries if k[0] == "wl") == [("wl", ("b",)), ("wl", ("c",))]
+    c.get("wl", fetch, 60, ("b",), max_entries=2)  # hit -> b가 최근
+    c.get("wl", fetch, 60, ("d",), max_entries=2)
+    assert sorted(k[1][0] for k in c._entries if k[0] == "wl") == ["b", "d"] and ("other", ("o",)) in c._entries
+    assert calls == ["o", "a", "b", "c", "d"], calls
+
+def check_source_cache_wait_timeout():
+    # 다른 세션이 수집 중이면 timeout까지만 기다리고 TimeoutError. 수집이 끝나면 그 값을 받음
+    from source_cache import SourceCache
+
+    c, release = SourceCache(), threading.Event()
+    slow = lambda: release.wait(5) and "v"
+    owner = threading.Thread(target=c.get, args=("s", slow, 60), daemon=True)
+    owner.start()
+    time.sleep(0.05)
+    started = time.monotonic()
+    try:
+        c.get("s", slow, 60, timeout=0.1)
+        raise AssertionError("대기가 끝나지 않음")
+    except TimeoutError:
+        assert time.monotonic() - started < 1.0
+    release.set()
+    owner.join(1)
+    assert c.get("s", slow, 60, timeout=0.1) == "v" and c.stats()["s"]["wait"] == 1
+
+def check_source_cache_max_stale():
+    # TTL 지남: stale 값 + 백그라운드 갱신. max_stale 지남: 오래된 값 대신 직접 다시 수집 (실패하면 예외 -> FALLBACK)
+    from source_cache import SourceCache
+
+    c, values = SourceCache(), iter(["old", "new"])
+    c.get("s", lambda: next(values), 60)
+    c._entries[("s", ())].fetched_at -= 120  # 2분 전 값 (TTL 60초 지남, max_stale 600초 안)
+    c._entries[("s", ())].refreshing = True  # 백그라운드 갱신은 띄우지 않음
+    assert c.get("s", lambda: "x", 60, max_stale=600) == "old"
+    c._entries[("s", ())].fetched_at -= 3600
+    assert c.get("s", lambda: next(values), 60, max_stale=600) == "new"
+    c._entries[("s", ())].fetched_at -= 3600
+    try:
+        c.get("s", lambda: 1 / 0, 60, max_stale=600)
+        raise AssertionError("오래된 값이 반환됨")
+    except ZeroDivisionError:
+        pass
+
+class _Response:
+    status_code = 200
+
+    def __init__(self, body):
+        self.body = body
+
+    def json(self):
+        return self.body
+
+def check_ai_error_per_key():
+    # 잘못된 키의 실패가 다른 키 요청을 막지 않음 (같은 입력의 실패 기록도, 모델 서킷 브레이커도).
+    # 오류 메시지에 키/URL이 남지 않고, 실패 기록 수는 제한
+    import ai_analysis
+    import http_client
+
+    def post(url, **kwargs):
+        if "key=BAD" in url: raise ConnectionError(f"Max retries exceeded with url: {url} (Caused by NewConnectionError)")
+        return _Response({"candidates": [{"content": {"parts": [{"text": '{"headline": "h", "portfolio": "p"}'}]}}]})
+
+    m, inv = {}, {"val": 0}
+    saved = http_client.post, ai_analysis.HEDGE_DELAY
+    http_client.post, ai_analysis.HEDGE_DELAY = post, 0.01
+    try:
+        status, message = ai_analysis.wait_analysis("BAD", m, inv, inv, 41, "뉴스", "일정", timeout=5, poll=0.01)
+        assert status == "error" and "BAD" not in message and "http" not in message, (status, message)
+        assert ai_analysis.wait_analysis("GOOD", m, inv, inv, 41, "뉴스", "일정", timeout=5, poll=0.01) == ("ready", {"headline": "h", "portfolio": "p"})
+        # BAD가 모든 모델의 브레이커를 열 만큼 실패해도 GOOD은 그대로 분석됨
+        for score in range(ai_analysis.FAIL_THRESHOLD + 1):
+            ai_analysis.wait_analysis("BAD", m, inv, inv, 500 + score, "뉴스", "일정", timeout=5, poll=0.01)
+        assert all(s["cooldown"] > 0 for s in ai_analysis.breaker_stats("BAD").values()), ai_analysis.breaker_stats("BAD")
+        assert ai_analysis.wait_analysis("BAD", m, inv, inv, 600, "뉴스", "일정", timeout=5, poll=0.01)[1].startswith("모든 모델이")
+        assert ai_analysis.wait_analysis("GOOD", m, inv, inv, 600, "뉴스", "일정", timeout=5, poll=0.01) == ("ready", {"headline": "h", "portfolio": "p"})
+        assert all(s["cooldown"] == 0 for s in ai_analysis.breaker_stats("GOOD").values())
+        for score in range(ai_analysis.ERRORS_SIZE + 5):
+            ai_analysis.wait_analysis("BAD", m, inv, inv, 1000 + score, "뉴스", "일정", timeout=5, poll=0.01)
+        assert len(ai_analysis._errors) == ai_analysis.ERRORS_SIZE, len(ai_analysis._errors)
+    finally:
+        http_client.post, ai_analysis.HEDGE_DELAY = saved
+        ai_analysis._breakers.clear()
+
+def check_metrics_redact():
+    # span 오류 메시지(/traces로 노출)에 API 키가 남지 않음
+    import metrics
+
+    msg = ("HTTPSConnectionPool(host='generativelanguage.googleapis.com', port=443): Max retries exceeded with url: "
+           "/v1beta/models/gemini:generateContent?key=AIzaSECRET (Caused by ...)")
+    assert "SECRET" not in metrics.redact(msg), metrics.redact(msg)
+    msg = "404 Client Error: Not Found for url: https://example.com/api?symbol=KRW&apikey=SECRET"
+    assert metrics.redact(msg) == "404 Client Error: Not Found for url: https://example.com/api?…", metrics.redact(msg)
+    run = metrics.begin("check")
+    try:
+        with metrics.span("boom"):
+            raise RuntimeError("failed: key=SECRET")
+    except RuntimeError:
+        pass
+    trace = metrics.end(run)
+    assert "SECRET" not in str(trace), trace
+
+CHECKS = {
+    "alerts.hysteresis": check_alerts_hysteresis,
+    "alerts.debounce": check_alerts_debounce,
+    "alerts.rules": check_alerts_rules,
+    "alerts.watch_with_live": check_alerts_watch_with_live,
+    "alerts.webhook": check_alerts_webhook,
+    "intraday.replay": check_intraday_replay,
+    "history.download_batches": check_history_download_batches,
+    "history.update_laggards": check_history_update_laggards,
+    "history.update_race": check_history_update_race,
+    "source_cache.evict": check_source_cache_evict,
+    "source_cache.wait_timeout": check_source_cache_wait_timeout,
+    "source_cache.max_stale": check_source_cache_max_stale,
+    "ai.error_per_key": check_ai_error_per_key,
+    "metrics.redact": check_metrics_redact,
+}
+
+def run(only=None):
+    failed = []
+    for name, fn in CHECKS.items():
+        if only and not any(name.startswith(p) for p in only): continue
+        try:
+            fn()
+            print(f"ok    {name}", flush=True)
+        except Exception:
+            failed.append(name)
+            print(f"FAIL  {name}\n{traceback.format_exc()}", flush=True)
+    return failed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="오프라인 동작 확인")
+    parser.add_argument("--only", action="append", help="이 접두사로 시작하는 확인만 (예: alerts.)")
+    args = parser.parse_args()
+    sys.exit(1 if run(args.only) else 0)
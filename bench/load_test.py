@@ -0,0 +1,271 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH = os.path.join(ROOT, "bench")
+sys.path.insert(0, BENCH)
+
+from upstream import FIXTURES, Upstream
+
+# --- 동시 접속 부하 테스트 ---
+# 실제 Streamlit 서버(streamlit run morning.py)를 띄우고, 브라우저 대신 웹소켓 클라이언트 N개가 세션을 흉내냄.
+# 외부 서비스는 로컬 업스트림 대역 서버(bench/upstream.py) + yfinance 픽스처 -> 네트워크 없이 재현 가능.
+# 세션 동작 (브라우저와 같은 프로토콜 메시지):
+# - 접속 후 전체 실행 1번
+# - 서버가 알려준 fragment 자동 새로고침(auto_rerun, 60/300/600초)을 --time-scale배 빠르게 반복
+# - --click-every초마다 사이드바 '데이터 새로고침' 버튼 클릭 (버튼 -> st.rerun으로 전체 실행)
+# 측정:
+# - 실행 종류별 지연 p50/p95 (rerun 요청 보냄 -> script_finished 받음)
+# - 서버 프로세스 스레드 수 / RSS (/proc, 접속 전 / 최대 / 끝)
+# - 업스트림별 나간 요청 수 (대역 서버 집계, 야후는 서버 /metrics의 yf.download 횟수). 세션 수가 늘어도 거의 그대로여야 정상
+# 준비: pip install -r bench/requirements.txt
+# 사용: python bench/load_test.py --sessions 20 --duration 60 [--time-scale 60] [--latency 0.05] [--gemini] [--json out.json]
+#       --max-fanout N: 어느 업스트림이든 요청 수가 N을 넘으면 종료 코드 1 (fan-out 회귀 확인용)
+
+YF_FIXTURE = os.path.join(FIXTURES, "yf_daily.csv.gz")
+REFRESH_LABEL = "데이터 새로고침"
+UPSTREAM_NAMES = {
+    "finance.naver.com": "naver", "sslecal2.forexprostools.com": "forexprostools",
+    "generativelanguage.googleapis.com": "gemini", "wttr.in": "wttr",
+}
+
+def _free_port():
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+def _percentile(values, q):
+    if not values: return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))], 1)
+
+# --- 서버 ---
+class Server:
+    # streamlit run morning.py 프로세스 + 스레드/메모리 샘플링
+    def __init__(self, env, port):
+        self.port, self.metrics_port = port, int(env["MORNING_METRICS_PORT"])
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", os.path.join(ROOT, "morning.py"), "--server.headless", "true",
+             "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+            env={**os.environ, **env}, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        self.samples = []  # (시각, 스레드 수, RSS MB)
+        self._stop = threading.Event()
+
+    def wait_ready(self, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{self.port}/_stcore/health", timeout=1)
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError("서버가 시작되지 않음")
+
+    def usage(self):
+        # (스레드 수, RSS MB). /proc가 없는 OS면 (None, None)
+        try:
+            with open(f"/proc/{self.proc.pid}/status") as f:
+                status = dict(line.split(":", 1) for line in f if ":" in line)
+        except OSError:
+            return None, None
+        return int(status["Threads"]), round(int(status["VmRSS"].split()[0]) / 1024, 1)
+
+    def _sample(self, every):
+        while not self._stop.wait(every):
+            self.samples.append((time.time(), *self.usage()))
+
+    def start_sampling(self, every=0.5):
+        threading.Thread(target=self._sample, args=(every,), name="load-sample", daemon=True).start()
+
+    def stage_counts(self):
+        # 서버 /metrics의 단계별 실행 횟수 {단계 이름: 횟수}
+        try:
+            text = urllib.request.urlopen(f"http://127.0.0.1:{self.metrics_port}/metrics", timeout=5).read().decode()
+        except OSError:
+            return {}
+        return {m[1]: int(float(m[2])) for m in re.finditer(r'morning_stage_seconds_count\{stage="([^"]+)"\} (\S+)', text)}
+
+    def stop(self):
+        self._stop.set()
+        self.proc.terminate()
+        try:
+            self.proc.wait(10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+# --- 세션 (브라우저 흉내) ---
+class Session:
+    def __init__(self, url, end, time_scale, click_every, rng):
+        self.url, self.end, self.time_scale, self.click_every, self.rng = url, end, time_scale, click_every, rng
+        self.samples = []      # (실행 종류, ms)
+        self.fragments = {}    # fragment id -> 자동 새로고침 주기 (초, 실제 앱 기준)
+        self.button_id = None
+        self.error = ""        # 세션이 중간에 끊겼으면 그 예외
+
+    def _rerun(self, fragment_id=None, click=False):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        if fragment_id:
+            msg.rerun_script.fragment_id = fragment_id
+            msg.rerun_script.is_auto_rerun = True
+        if click and self.button_id:
+            widget = msg.rerun_script.widget_states.widgets.add()
+            widget.id, widget.trigger_value = self.button_id, True
+        return msg.SerializeToString()
+
+    async def _run(self, ws, kind, payload):
+        # rerun 요청 하나를 보내고 실행이 끝날 때까지 받음 (st.rerun으로 이어지는 실행은 끝까지 기다림)
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        started = time.perf_counter()
+        await ws.send(payload)
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(await asyncio.wait_for(ws.recv(), 120))
+            field = msg.WhichOneof("type")
+            if field == "auto_rerun":
+                self.fragments[msg.auto_rerun.fragment_id] = msg.auto_rerun.interval
+            elif field == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                el = msg.delta.new_element
+                if el.WhichOneof("type") == "button" and REFRESH_LABEL in el.button.label: self.button_id = el.button.id
+            elif field == "script_finished" and msg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                self.samples.append((kind, (time.perf_counter() - started) * 1000))
+                return
+
+    async def run(self, delay):
+        import websockets
+
+        await asyncio.sleep(delay)
+        try:
+            async with websockets.connect(self.url, subprotocols=["streamlit"], max_size=None, open_timeout=30) as ws:
+                await self._run(ws, "full", self._rerun())
+                now = time.monotonic()
+                # 다음 실행 시각: fragment마다 주기/time_scale, 클릭은 click_every (세션마다 시작 위치를 흩뜨림)
+                due = {fid: now + iv / self.time_scale for fid, iv in self.fragments.items()}
+                next_click = now + self.rng.uniform(0, self.click_every) if self.click_every else None
+                while True:
+                    target, when = min(due.items(), key=lambda x: x[1], default=(None, float("inf")))
+                    if next_click is not None and next_click < when: target, when = "click", next_click
+                    if when >= self.end: return
+                    await asyncio.sleep(max(0.0, when - time.monotonic()))
+                    if target == "click":
+                        await self._run(ws, "click", self._rerun(click=True))
+                        next_click = time.monotonic() + self.click_every
+                    else:
+                        await self._run(ws, f"fragment.{self.fragments[target]:g}s", self._rerun(fragment_id=target))
+                        due[target] = time.monotonic() + self.fragments[target] / self.time_scale
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+
+
+async def _drive(url, sessions, duration, ramp, time_scale, click_every, seed):
+    end = time.monotonic() + ramp + duration
+    rng = random.Random(seed)
+    clients = [Session(url, end, time_scale, click_every, random.Random(rng.random())) for _ in range(sessions)]
+    await asyncio.gather(*(c.run(ramp * i / max(1, sessions)) for i, c in enumerate(clients)))
+    return clients
+
+def run(sessions=10, duration=60, ramp=5, time_scale=60, click_every=30, latency=0.0, gemini=False, seed=0):
+    up = Upstream(latency=latency).start()
+    with tempfile.TemporaryDirectory() as workdir:
+        env = {
+            "MORNING_UPSTREAM": up.url,
+            "MORNING_YF_FIXTURE": YF_FIXTURE,
+            "MORNING_HISTORY_DIR": os.path.join(workdir, "price_history"),
+            "MORNING_SNAPSHOT_DB": os.path.join(workdir, "snapshots.db"),
+            "MORNING_FLOW_DB": os.path.join(workdir, "flows.db"),
+            "MORNING_METRICS_PORT": str(_free_port()),
+            "GEMINI_API_KEY": "bench-key" if gemini else "",
+        }
+        server = Server(env, _free_port())
+        try:
+            server.wait_ready()
+            idle = server.usage()
+            server.start_sampling()
+            started = time.perf_counter()
+            clients = asyncio.run(_drive(f"ws://127.0.0.1:{server.port}/_stcore/stream", sessions, duration, ramp,
+                                         time_scale, click_every, seed))
+            elapsed = time.perf_counter() - started
+            end_usage, stages = server.usage(), server.stage_counts()
+        finally:
+            server.stop()
+            up.stop()
+
+    by_kind = {}
+    for c in clients:
+        for kind, ms in c.samples:
+            by_kind.setdefault(kind, []).append(ms)
+    requests = {UPSTREAM_NAMES.get(h, h): n for h, n in up.stats()["requests"].items()}
+    requests["yahoo"] = stages.get("yf.download", 0)
+    samples = [s for s in server.samples if s[1] is not None]
+    return {
+        "params": {"sessions": sessions, "duration": duration, "ramp": ramp, "time_scale": time_scale,
+                   "click_every": click_every, "latency": latency, "gemini": gemini},
+        "elapsed_s": round(elapsed, 1),
+        "latency_ms": {kind: {"n": len(v), "p50": _percentile(v, 50), "p95": _percentile(v, 95), "max": round(max(v), 1)}
+                       for kind, v in sorted(by_kind.items())},
+        "server": {
+            "threads": {"idle": idle[0], "peak": max((s[1] for s in samples), default=None), "end": end_usage[0]},
+            "rss_mb": {"idle": idle[1], "peak": max((s[2] for s in samples), default=None), "end": end_usage[1]},
+        },
+        "requests": requests,
+        "requests_per_session": {k: round(v / sessions, 2) for k, v in requests.items()},
+        "session_errors": [c.error for c in clients if c.error],
+    }
+
+def print_report(report):
+    p = report["params"]
+    print(f"세션 {p['sessions']}개, {report['elapsed_s']}초 (자동 새로고침 {p['time_scale']:g}배속, 클릭 {p['click_every']:g}초마다)")
+    print(f"\n{'실행 종류':20s} {'n':>6s} {'p50 ms':>10s} {'p95 ms':>10s} {'max ms':>10s}")
+    for kind, s in report["latency_ms"].items():
+        print(f"{kind:20s} {s['n']:6d} {s['p50']:10.1f} {s['p95']:10.1f} {s['max']:10.1f}")
+    t, m = report["server"]["threads"], report["server"]["rss_mb"]
+    print(f"\n서버 스레드: 접속 전 {t['idle']} / 최대 {t['peak']} / 끝 {t['end']}")
+    print(f"서버 RSS(MB): 접속 전 {m['idle']} / 최대 {m['peak']} / 끝 {m['end']}")
+    print(f"\n{'업스트림':20s} {'요청':>8s} {'세션당':>8s}")
+    for name, n in sorted(report["requests"].items()):
+        print(f"{name:20s} {n:8d} {report['requests_per_session'][name]:8.2f}")
+    if report["session_errors"]:
+        print(f"\n끊긴 세션 {len(report['session_errors'])}개 (예: {report['session_errors'][0]})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="동시 접속 부하 테스트 (로컬 업스트림 대역)")
+    parser.add_argument("--sessions", type=int, default=10, help="동시 세션 수")
+    parser.add_argument("--duration", type=float, default=60, help="측정 시간 (초, 접속 램프 이후)")
+    parser.add_argument("--ramp", type=float, default=5, help="세션 접속을 이 시간(초)에 걸쳐 나눠서")
+    parser.add_argument("--time-scale", type=float, default=60, help="자동 새로고침 주기 배속 (60이면 5분 -> 5초)")
+    parser.add_argument("--click-every", type=float, default=30, help="세션별 새로고침 버튼 클릭 간격 (초, 0이면 안 누름)")
+    parser.add_argument("--latency", type=float, default=0.0, help="업스트림 응답 지연 (초)")
+    parser.add_argument("--gemini", action="store_true", help="GEMINI_API_KEY를 넣어 AI 브리핑 경로까지")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="결과 JSON 저장 경로")
+    parser.add_argument("--max-fanout", type=int, help="업스트림 하나의 요청 수가 이보다 많으면 종료 코드 1")
+    args = parser.parse_args()
+
+    report = run(args.sessions, args.duration, args.ramp, args.time_scale, args.click_every, args.latency, args.gemini, args.seed)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+    over = {k: v for k, v in report["requests"].items() if args.max_fanout is not None and v > args.max_fanout}
+    if over:
+        print(f"\nfan-out 초과 (> {args.max_fanout}): {over}")
+        sys.exit(1)
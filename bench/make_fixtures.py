@@ -0,0 +1,87 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# --- 벤치마크 픽스처 생성 ---
+# HTML 픽스처(네이버/forexprostools)는 실제 페이지를 저장한 것이 아니라 손으로 만든 가짜 페이지임:
+# 파서가 찾는 클래스/표식과 표 구조만 실제와 같고, 나머지는 크기(~110KB)를 맞추려고 채운 내용(var cfg_N, 메뉴 목록).
+# 이 스크립트로 다시 만들지 않으며, 파서 결과 확인과 대역 서버(upstream.py) 응답용으로만 씀.
+# 나머지는 여기서 고정 시드로 만듦:
+# - wttr.txt: 날씨 한 줄
+# - gemini.json: generateContent 응답 (JSON 브리핑이 text에 들어 있는 형태)
+# - yf_daily.csv.gz: yf.download 대신 쓰는 일봉 (Date, Ticker, OHLCV 세로형, 3년치)
+# - intraday_1m.csv.gz: 일봉 다음 거래일 한국 장중(09:00~15:30) 1분봉 재생용 (ts, symbol, price)
+# 사용: python bench/make_fixtures.py
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+END_DATE = "2026-10-16"
+YEARS = 3
+
+# 심볼: (시작 레벨, 일간 변동성)
+LEVELS = {
+    "^TNX": (4.2, 0.015), "CL=F": (72, 0.02), "KRW=X": (1420, 0.004),
+    "^IXIC": (21000, 0.013), "^GSPC": (6000, 0.01), "^SOX": (7000, 0.022),
+    "^KS11": (4000, 0.012), "^KQ11": (900, 0.014),
+    "GC=F": (4000, 0.009), "SI=F": (60, 0.018), "BTC-USD": (90000, 0.03), "^VIX": (17, 0.06),
+}
+
+def yf_frame(levels=LEVELS, years=YEARS, seed=7):
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp(END_DATE)
+    all_days = pd.date_range(end - pd.DateOffset(years=years), end, freq="D")
+    frames = []
+    for symbol, (level, vol) in levels.items():
+        days = all_days if symbol == "BTC-USD" else all_days[all_days.dayofweek < 5]
+        if symbol in ("^KS11", "^KQ11"):
+            # 국내 휴장일 흉내 (미국 시장과 거래일이 다르도록)
+            days = days[rng.random(len(days)) > 0.03]
+        walk = np.cumsum(rng.normal(0, vol, len(days)))
+        close = level * np.exp(walk - walk[-1])  # 마지막 날이 시작 레벨이 되도록
+        open_ = close * (1 + rng.normal(0, vol / 3, len(days)))
+        spread = np.abs(rng.normal(0, vol / 2, len(days))) * close
+        frames.append(pd.DataFrame({
+            "Date": days, "Ticker": symbol,
+            "Open": open_, "High": np.maximum(open_, close) + spread, "Low": np.minimum(open_, close) - spread,
+            "Close": close, "Volume": rng.integers(1e5, 1e7, len(days)).astype(float),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+def watchlist_levels(n=300, seed=3):
+    # 관심 종목 벤치용 가상 종목 n개 (W001.KS ...). 파일로 저장하지 않고 벤치에서 바로 만들어 씀
+    rng = np.random.default_rng(seed)
+    return {f"W{i:03d}.KS": (float(rng.uniform(5_000, 500_000)), float(rng.uniform(0.01, 0.04))) for i in range(1, n + 1)}
+
+def intraday_frame(seed=11):
+    rng = np.random.default_rng(seed)
+    day = pd.Timestamp(END_DATE) + pd.offsets.BDay(1)
+    minutes = pd.date_range(day + pd.Timedelta(hours=9), day + pd.Timedelta(hours=15, minutes=30), freq="min", tz="Asia/Seoul")
+    rows = []
+    for symbol, (level, vol) in LEVELS.items():
+        minute_vol = vol / np.sqrt(len(minutes))
+        price = level * np.exp(rng.normal(0, vol / 2) + np.cumsum(rng.normal(0, minute_vol, len(minutes))))
+        rows.append(pd.DataFrame({"ts": minutes, "symbol": symbol, "price": price}))
+    out = pd.concat(rows).sort_values(["ts", "symbol"], kind="stable")
+    out["ts"] = out["ts"].map(lambda t: t.isoformat())
+    return out
+
+def gemini_response():
+    briefing = {
+        "headline": "⚠️ 환율 부담 속 반도체 숨고르기",
+        "portfolio": "현금 비중 30% 유지, 반도체는 분할 매수로 접근해요.<br>환율이 1,450원을 넘으면 추가 매수를 미뤄요.",
+    }
+    text = "```json\n" + json.dumps(briefing, ensure_ascii=False) + "\n```"
+    return {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP"}]}
+
+def main():
+    os.makedirs(FIXTURES, exist_ok=True)
+    with open(os.path.join(FIXTURES, "wttr.txt"), "w", encoding="utf-8") as f:
+        f.write("Partly cloudy +12°C")
+    with open(os.path.join(FIXTURES, "gemini.json"), "w", encoding="utf-8") as f:
+        json.dump(gemini_response(), f, ensure_ascii=False)
+    yf_frame().to_csv(os.path.join(FIXTURES, "yf_daily.csv.gz"), index=False, float_format="%.4f", compression={"method": "gzip", "mtime": 0})
+    intraday_frame().to_csv(os.path.join(FIXTURES, "intraday_1m.csv.gz"), index=False, float_format="%.4f", compression={"method": "gzip", "mtime": 0})
+
+if __name__ == "__main__":
+    main()
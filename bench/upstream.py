@@ -0,0 +1,177 @@
+import argparse
+import os
+import random
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+# --- 로컬 업스트림 대역 서버 ---
+# 실제 서비스 대신 저장된 픽스처를 돌려주는 HTTP 서버. http_client.UPSTREAM(MORNING_UPSTREAM)을 이 주소로 두면
+# 모든 요청이 /<원래 호스트>/<경로> 형태로 들어옴. 호스트별 지연/실패를 주입해서 마감·재시도 동작을 재현.
+# 사용: python bench/upstream.py --port 8765 --latency 0.2 --fail-rate 0.1
+#       MORNING_UPSTREAM=http://127.0.0.1:8765 MORNING_YF_FIXTURE=bench/fixtures/yf_daily.csv.gz streamlit run morning.py
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# (호스트, 경로 접두사) -> (픽스처 파일, Content-Type)
+ROUTES = {
+    ("wttr.in", "/"): ("wttr.txt", "text/plain; charset=utf-8"),
+    ("finance.naver.com", "/sise/sise_index.naver"): ("naver_sise_index.html", "text/html; charset=euc-kr"),
+    ("finance.naver.com", "/sise/investor.naver"): ("naver_investor.html", "text/html; charset=euc-kr"),
+    ("finance.naver.com", "/news/news_search.naver"): ("naver_news_search.html", "text/html; charset=euc-kr"),
+    ("sslecal2.forexprostools.com", "/"): ("forexpros_calendar.html", "text/html; charset=utf-8"),
+    ("generativelanguage.googleapis.com", "/"): ("gemini.json", "application/json"),
+}
+
+# 쿼리에 따라 본문을 만드는 경로: (호스트, 경로 접두사, 쿼리 키) -> 함수(쿼리 dict) -> (Content-Type, 본문)
+INVESTOR_END = date(2026, 10, 16)  # 일별 매매동향 첫 페이지의 가장 최근 날짜 (yf_daily 픽스처 마지막 날)
+INVESTOR_PAGES = 60               # 이보다 뒤 페이지는 빈 표
+
+def investor_page(query):
+    # 네이버 일별 매매동향 page=N: 페이지당 10거래일(평일), 날짜·시장별로 고정된 가상 순매수
+    sosok, page = query.get("sosok", ["0"])[0], int(query.get("page", ["1"])[0])
+    days, day = [], INVESTOR_END
+    while len(days) < page * 10:
+        if day.weekday() < 5: days.append(day)
+        day -= timedelta(days=1)
+    rows = []
+    for d in (days[-10:] if page <= INVESTOR_PAGES else []):
+        rng = random.Random(f"{sosok}{d}")
+        vals = [rng.randint(-9000, 9000) for _ in range(5)]
+        rows.append(f'<tr><td class="date2">{d:%y.%m.%d}</td>' + "".join(f"<td>{v:,}</td>" for v in vals) + "</tr>")
+    body = ('<html><head><meta http-equiv="Content-Type" content="text/html; charset=euc-kr"></head><body>'
+            '<table class="type_1"><tr><th>날짜</th><th>개인</th><th>외국인</th><th>기관계</th><th>금융투자</th><th>보험</th></tr>'
+            + "".join(rows) + "</table></body></html>")
+    return "text/html; charset=euc-kr", body.encode("euc-kr")
+
+# 여러 키워드 검색에 같이 걸리는 소식 (언론사마다 말머리만 다른 제목)
+SHARED_NEWS = ["삼성전자, HBM4 양산 앞당긴다", "원·달러 환율 1,450원 돌파", "외국인 코스피 5거래일 연속 순매도"]
+
+def news_page(query):
+    # 네이버 뉴스 검색 q=키워드: 공통 소식 3건(키워드마다 다른 언론사·말머리) + 키워드 고유 기사 7건, 최신이 위
+    keyword = query.get("q", [""])[0]
+    rng = random.Random(keyword)
+    office = rng.randint(1, 999)
+    titles = [f"{rng.choice(['[속보] ', '', '[단독] '])}{t}{rng.choice(['', ' (종합)', '…시장 촉각'])}" for t in SHARED_NEWS]
+    topics = rng.sample(["수출 회복세", "3분기 실적 발표", "설비 투자 확대", "규제 논란", "목표주가 상향", "공급망 재편",
+                         "가격 협상 난항", "수요 둔화 우려", "신규 수주 잇따라", "인력 확보 경쟁"], 7)
+    titles += [f"{keyword} {topic}, {rng.choice(['업계', '증권가', '정부'])} 주목" for topic in topics]
+    rows = []
+    for i, title in enumerate(titles):
+        rows.append(f'<li><dl><dt class="articleSubject"><a href="/news/news_read.naver?article_id={9100000 + office * 100 + i}'
+                    f'&office_id={office:03d}&mode=search">{title}</a></dt><dd class="articleSummary">요약 {i}'
+                    f'<span class="press">언론사{office}</span><span class="wdate">2026-10-16 {15 - i // 6:02d}:{59 - i * 3:02d}</span></dd></dl></li>')
+    body = ('<html><head><meta http-equiv="Content-Type" content="text/html; charset=euc-kr"></head><body>'
+            '<div class="newsSchResult"><ul class="newsList">' + "".join(rows) + "</ul></div></body></html>")
+    return "text/html; charset=euc-kr", body.encode("euc-kr", "replace")
+
+# 웹훅 수신 대역: 이 호스트로 온 POST 본문을 Upstream.received에 시각과 함께 쌓아 둠 (alerts.py 전송 확인용)
+# 예: MORNING_ALERT_WEBHOOK=https://hooks.local/morning (MORNING_UPSTREAM을 거쳐 여기로 들어옴)
+RECEIVER_HOST = "hooks.local"
+
+DYNAMIC = {
+    ("finance.naver.com", "/sise/investor.naver", "page"): investor_page,
+    ("finance.naver.com", "/news/news_search.naver", "q"): news_page,
+}
+
+
+class Upstream:
+    # latency / fail_rate: 숫자(전체 공통) 또는 {호스트: 값}. fail_rate 확률로 fail_status 응답
+    def __init__(self, latency=0.0, fail_rate=0.0, fail_status=503, port=0, seed=0):
+        self.latency, self.fail_rate, self.fail_status = latency, fail_rate, fail_status
+        self.requests = Counter()  # 호스트별 받은 요청 수
+        self.failures = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._bodies = {}
+        self.received = []  # 웹훅 수신: (받은 시각 epoch, 경로, 본문 bytes)
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _per_host(self, value, host):
+        return value.get(host, 0.0) if isinstance(value, dict) else value
+
+    def _body(self, name):
+        if name not in self._bodies:
+            with open(os.path.join(FIXTURES, name), "rb") as f:
+                self._bodies[name] = f.read()
+        return self._bodies[name]
+
+    def respond(self, method, path, body=b""):
+        # 반환: (상태 코드, Content-Type, 본문)
+        host, _, rest = path.lstrip("/").partition("/")
+        rest, _, qs = rest.partition("?")
+        rest, query = "/" + rest, parse_qs(qs, encoding="euc-kr", errors="replace")
+        with self._lock:
+            self.requests[host] += 1
+            fail = self._rng.random() < self._per_host(self.fail_rate, host)
+            if fail: self.failures[host] += 1
+        delay = self._per_host(self.latency, host)
+        if delay: time.sleep(delay)
+        if fail: return self.fail_status, "text/plain", b"injected failure"
+        if host == RECEIVER_HOST and method == "POST":
+            with self._lock:
+                self.received.append((time.time(), rest, body))
+            return 200, "application/json", b'{"ok":true}'
+        for (h, prefix, key), fn in DYNAMIC.items():
+            if h == host and rest.startswith(prefix) and key in query:
+                return (200, *fn(query))
+        route = max((k for k in ROUTES if k[0] == host and rest.startswith(k[1])), key=lambda k: len(k[1]), default=None)
+        if route is None: return 404, "text/plain", b"no fixture"
+        name, ctype = ROUTES[route]
+        return 200, ctype, self._body(name)
+
+    def _handler(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive (실제 서비스처럼 커넥션 재사용)
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                status, ctype, body = upstream.respond(self.command, self.path, self.rfile.read(length) if length else b"")
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = _serve
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name="upstream", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self):
+        with self._lock:
+            return {"requests": dict(self.requests), "failures": dict(self.failures)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="픽스처 기반 로컬 업스트림 서버")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="응답 지연 (초)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="실패 응답 비율 (0~1)")
+    parser.add_argument("--fail-status", type=int, default=503)
+    args = parser.parse_args()
+    up = Upstream(args.latency, args.fail_rate, args.fail_status, args.port)
+    print(f"업스트림 대역 서버: {up.url}  (MORNING_UPSTREAM={up.url})", flush=True)
+    try:
+        up.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
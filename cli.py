@@ -0,0 +1,71 @@
+import time
+
+_STARTED = time.perf_counter()
+
+import argparse
+import json
+import os
+import sys
+
+import snapshot_store
+from report import briefing_inputs, get_basic_report
+
+# --- 헤드리스 스냅샷 CLI ---
+# Streamlit 없이 수집 -> 위험도 -> 브리핑을 JSON 하나로 출력. 스케줄러(cron 등)에서 매분 호출하는 용도.
+# - 수집 데몬(collector.py)이나 직전 호출이 저장한 스냅샷이 max_age 안이면 그대로 씀
+#   -> 이 경로는 pandas/yfinance/requests를 import하지 않아 수십 ms 안에 끝남
+# - 없으면 직접 수집하고 저장해서 다음 호출이 재사용
+# - GEMINI_API_KEY가 있으면 AI 브리핑을 --ai-wait 초까지만 기다리고, 안 끝나면 기본 분석
+# 사용: python cli.py [--max-age 120] [--fresh] [--ai-wait 20] [--pretty]
+
+def load_or_collect(max_age=120, fresh=False, db=snapshot_store.DEFAULT_DB, save=True):
+    # 반환: (스냅샷, "stored" | "collected")
+    snapshot = None if fresh else snapshot_store.load_latest(db, max_age=max_age)
+    if snapshot is not None: return snapshot, "stored"
+    from collector import build_snapshot
+
+    snapshot = build_snapshot()
+    if save: snapshot_store.save_snapshot(snapshot, db)
+    return snapshot, "collected"
+
+def briefing(snapshot, api_key=None, ai_wait=20):
+    results = snapshot['results']
+    data = results['market'] or {}
+    inv_kospi, inv_kosdaq = results['inv_kospi'], results['inv_kosdaq']
+    news, calendar = results['news'], results['calendar']
+    ai_status = "off"
+    if api_key:
+        import ai_analysis
+
+        news_summary, calendar_str = briefing_inputs(news, calendar)
+        ai_status, value = ai_analysis.wait_analysis(api_key, data, inv_kospi, inv_kosdaq, snapshot['risk_score'],
+                                                     news_summary, calendar_str, timeout=ai_wait)
+        if ai_status == "ready": return {"mode": "ai", **value}
+        if ai_status == "error": ai_status = f"error: {value}"
+    report = get_basic_report(data, inv_kospi, inv_kosdaq, snapshot['risk_score'], news, calendar)
+    return {"mode": "basic", "ai_status": ai_status, **report}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="위험도 스냅샷 JSON 출력 (Streamlit 없이)")
+    parser.add_argument("--max-age", type=float, default=120, help="이 시간(초) 안에 저장된 스냅샷이면 재사용")
+    parser.add_argument("--fresh", action="store_true", help="저장된 스냅샷을 무시하고 새로 수집")
+    parser.add_argument("--no-save", action="store_true", help="새로 수집한 스냅샷을 저장하지 않음")
+    parser.add_argument("--db", default=snapshot_store.DEFAULT_DB, help="스냅샷 SQLite 경로")
+    parser.add_argument("--ai-wait", type=float, default=20, help="AI 브리핑 최대 대기 (초, GEMINI_API_KEY 필요)")
+    parser.add_argument("--no-briefing", action="store_true", help="브리핑 생략 (지표/위험도만)")
+    parser.add_argument("--pretty", action="store_true", help="들여쓰기해서 출력")
+    args = parser.parse_args(argv)
+
+    snapshot, source = load_or_collect(args.max_age, args.fresh, args.db, not args.no_save)
+    out = dict(snapshot, source=source)
+    if not args.no_briefing:
+        out["briefing"] = briefing(snapshot, os.environ.get("GEMINI_API_KEY"), args.ai_wait)
+    out["elapsed_ms"] = round((time.perf_counter() - _STARTED) * 1000, 1)
+    print(json.dumps(out, ensure_ascii=False, indent=2 if args.pretty else None))
+    return 0
+
+if __name__ == "__main__":
+    code = main()
+    sys.stdout.flush()
+    # 마감을 넘긴 수집/AI 요청 스레드가 끝나기를 기다리지 않고 바로 종료 (스냅샷은 이미 저장됨)
+    os._exit(code)
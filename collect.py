@@ -0,0 +1,250 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import contextvars
+import time
+from datetime import datetime, timedelta
+
+import flow_history
+import http_client
+import metrics
+import news
+import parsing
+import price_history
+from source_cache import cache
+from source_health import health
+
+# --- 데이터 수집 함수 ---
+def get_weather(city="Daejeon"):
+    try:
+        url = f"https://wttr.in/{city}?format=%C+%t"
+        res = http_client.get(url, timeout=2)
+        return res.text.strip() if res.status_code == 200 else "N/A"
+    except: return "N/A"
+
+# [수급 데이터] 수동 입력값 우선 적용 로직 추가
+def _investors_intraday(market_code):
+    # 네이버 금융 메인 (장중 실시간) - dl.lst_kos_info 구조 대응
+    url = f"https://finance.naver.com/sise/sise_index.naver?code={market_code}"
+    res = http_client.get(url, timeout=5)
+    with metrics.span("parse.naver_index"):
+        raw = parsing.parse_index_foreign(res.content.decode('euc-kr', 'replace'))
+    return raw if raw and parsing.parse_amount(raw) != 0 else None
+
+def _investors_daily(market_code):
+    # '일별 매매동향' 페이지 (장 마감 후 확정치)
+    sosok = '0' if market_code == "KOSPI" else '1'
+    url = f"https://finance.naver.com/sise/investor.naver?sosok={sosok}"
+    res = http_client.get(url, timeout=5)
+    with metrics.span("parse.naver_investor_daily"):
+        raw = parsing.parse_daily_foreign(res.content.decode('euc-kr', 'replace'))
+    return raw if raw and parsing.parse_amount(raw) != 0 else None
+
+INVESTOR_SOURCES = {
+    "naver_index": _investors_intraday,
+    "naver_investor_daily": _investors_daily,
+}
+
+def kst_now():
+    return datetime.utcnow() + timedelta(hours=9)
+
+def is_krx_open(now=None):
+    # 정규장 평일 09:00 ~ 15:30 (KST). 공휴일은 따로 보지 않음
+    now = now or kst_now()
+    return now.weekday() < 5 and (9, 0) <= (now.hour, now.minute) < (15, 30)
+
+def investor_route(now=None):
+    # 장중에는 실시간 페이지 먼저, 장 마감 후/개장 전에는 일별 페이지만.
+    # 연속 실패 중인 소스는 건너뛰되, 전부 죽었으면 그래도 순서대로 시도
+    route = ["naver_index", "naver_investor_daily"] if is_krx_open(now) else ["naver_investor_daily"]
+    alive = [name for name in route if not health.is_dead(name)]
+    return alive or route
+
+def get_market_investors(market_code="KOSPI"):
+    for name in investor_route():
+        try:
+            raw_val = health.call(name, INVESTOR_SOURCES[name], market_code)
+        except Exception:
+            continue
+        if raw_val:
+            return {"val": parsing.parse_amount(raw_val), "str": raw_val}
+    return {"val": 0, "str": "0"}
+
+def get_economic_calendar():
+    calendar_data = []
+    try:
+        url = "https://sslecal2.forexprostools.com/?columns=exc_flags,exc_currency,exc_importance,exc_actual,exc_forecast,exc_previous&features=datepicker,timezone&countries=5&calType=day&timeZone=88&lang=18"
+        headers = {'User-Agent': 'Mozilla/5.0'}
+        res = http_client.get(url, headers=headers, timeout=5)
+        
+        # 표 전체를 트리로 만들지 않고 행 단위로 스트림 처리
+        with metrics.span("parse.calendar"):
+            for row in parsing.iter_calendar_rows(res.content):
+                event_name = row['event']
+                if row['importance'] >= 2 or any(k in event_name for k in ["GDP", "CPI", "PCE", "고용", "금리", "연준", "FOMC", "판매"]):
+                    calendar_data.append(row)
+            
+    except Exception as e:
+        pass
+    return calendar_data
+
+def get_financial_news():
+    # 섹터별 키워드 검색을 동시에 하고 새 기사만 윈도에 합침 (news.py). 반환: {섹터: [기사, ...]}
+    try:
+        return news.window.refresh()
+    except Exception:
+        return {sector: [] for sector in news.KEYWORDS}
+
+TICKERS = {
+    "tnx": "^TNX", "oil": "CL=F", "krw": "KRW=X",
+    "nas": "^IXIC", "sp5": "^GSPC", "sox": "^SOX",
+    "kospi": "^KS11", "kosdaq": "^KQ11",
+    "gold": "GC=F", "silver": "SI=F", "btc": "BTC-USD", "vix": "^VIX"
+}
+DD_WINDOWS = (20, 60, 200)  # 로컬 히스토리 덕분에 추가 비용 없이 계산하는 중장기 고점 대비 하락률
+
+def nice_range(lo, hi):
+    # 게이지 양 끝: 기간 최저/최고를 변동폭 자릿수 단위로 내림/올림 (예: 3,412~5,980 -> 3,000~6,000)
+    import numpy as np
+
+    span = (hi - lo).where(hi > lo, hi.abs() * 0.1)
+    step = 10 ** np.floor(np.log10(span.where(span > 0, 1.0)))
+    return np.floor(lo / step) * step, np.ceil(hi / step) * step
+
+def calc_metrics(closes, window=5, windows=DD_WINDOWS):
+    # 종목별 휴장일이 달라 NaN이 섞여 있으므로, 종목마다 '유효한 봉' 기준으로 최신/전일/N일 고점을 계산
+    import pandas as pd
+
+    valid = closes.notna()
+    back = (valid.sum() - valid.cumsum()).where(valid)  # 0 = 최신 봉, 1 = 전일 봉 ...
+
+    curr = closes.where(back == 0).max()
+    prev = closes.where(back == 1).max().fillna(curr)  # 봉이 하나뿐이면 전일 = 최신
+
+    def drawdown(n):
+        # 고점 대비 하락률 (Drawdown) - 양수로 변환 (예: 5% 하락이면 5.0)
+        high = closes.where(back < n).max()
+        return ((high - curr) / high * 100).where(high > 0, 0.0)
+
+    diff = curr - prev
+    pct = diff / prev * 100
+
+    cols = {'val': curr, 'diff': diff, 'pct': pct, 'dd': drawdown(window)}
+    for n in windows:
+        cols[f'dd{n}'] = drawdown(n)
+    cols['lo'], cols['hi'] = nice_range(closes.min(), closes.max())  # 게이지 범위 (받은 기간 전체)
+    return pd.DataFrame(cols).dropna(subset=['val'])
+
+def get_all_data():
+    symbols = list(TICKERS.values())
+    try:
+        # 로컬 히스토리에 마지막 저장 봉 이후만 받아 붙이고, 계산은 저장소에서 읽어서 함
+        with metrics.span("market.history_update"):
+            price_history.update(symbols)
+        with metrics.span("market.metrics"):
+            closes = price_history.closes(symbols, days=max(DD_WINDOWS))
+            table = calc_metrics(closes)
+    except Exception as e: return None, e
+
+    # 실패한 종목은 빠진 채로 반환 -> 해당 게이지만 비어 보임
+    rows = table.to_dict('index')
+    data = {key: rows[symbol] for key, symbol in TICKERS.items() if symbol in rows}
+    if not data: return None, RuntimeError("시세 데이터를 가져오지 못했습니다.")
+    return data, None
+
+# --- 병렬 수집 단계 ---
+# Streamlit은 rerun마다 스크립트를 새로 실행하므로 풀은 모듈(프로세스) 단위로 하나만 유지.
+# 마감 시간을 넘긴 작업은 풀에서 계속 돌다가 자체 timeout으로 끝나고, 페이지는 기다리지 않음.
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="collect")
+
+PAGE_DEADLINE = 8.0  # 페이지 전체 수집 마감 (초)
+
+def _market_source():
+    data, err = get_all_data()
+    if err: raise err
+    return data
+
+# 이름: (함수, 인자, 소스별 마감(초))
+SOURCES = {
+    "weather": (get_weather, (), 3.0),
+    "market": (_market_source, (), 8.0),
+    "inv_kospi": (get_market_investors, ("KOSPI",), 6.0),
+    "inv_kosdaq": (get_market_investors, ("KOSDAQ",), 6.0),
+    "news": (get_financial_news, (), 6.0),
+    "calendar": (get_economic_calendar, (), 6.0),
+    "flows": (flow_history.recent_sums, (), 6.0),
+}
+
+# 소스별 캐시 유효시간 (초) - 모든 세션이 공유, 만료 후에는 stale 값을 주면서 백그라운드 갱신
+SOURCE_TTL = {
+    "weather": 3600,     # 날씨: 1시간
+    "market": 180,       # 시세: 3분
+    "inv_kospi": 60,     # 수급: 1분
+    "inv_kosdaq": 60,
+    "news": 300,         # 뉴스: 5분
+    "calendar": 3600,    # 경제 일정: 하루 몇 번 바뀌는 수준
+    "flows": 600,        # 누적 순매수: 10분 (갱신은 새 날짜 페이지만)
+}
+
+# 갱신이 계속 실패할 때 stale 값을 계속 보여줄 최대 나이 (초). 넘으면 캐시가 없는 것처럼 다시 수집 (실패하면 FALLBACK)
+SOURCE_MAX_STALE = {
+    "weather": 6 * 3600,
+    "market": 1800,
+    "inv_kospi": 600,
+    "inv_kosdaq": 600,
+    "news": 3600,
+    "calendar": 12 * 3600,
+    "flows": 86400,
+}
+
+# 실패 시 반환되는 기본값(N/A, 0, 빈 목록)은 캐시에 넣지 않음
+CACHE_ACCEPT = {
+    "weather": lambda r: r != "N/A",
+    "market": bool,
+    "inv_kospi": lambda r: r["val"] != 0,
+    "inv_kosdaq": lambda r: r["val"] != 0,
+    "news": lambda r: any(r.values()),
+    "calendar": bool,
+    "flows": bool,
+}
+
+# 늦거나 실패한 소스 자리에 들어가는 기본값
+FALLBACK = {
+    "weather": "N/A",
+    "market": {},
+    "inv_kospi": {"val": 0, "str": "N/A"},
+    "inv_kosdaq": {"val": 0, "str": "N/A"},
+    "news": {sector: [] for sector in news.KEYWORDS},
+    "calendar": [],
+    "flows": {},
+}
+
+def collect_all(deadline=PAGE_DEADLINE, sources=None):
+    # 모든 소스를 동시에 시작하고 마감 안에 끝난 결과만 모아서 반환.
+    # 반환: (results, missing) - missing은 {소스명: 사유}, results의 빠진 자리는 FALLBACK 값
+    sources = sources or SOURCES
+    start = time.monotonic()
+    def run(name, fn, args):
+        # 다른 세션의 수집을 기다릴 때도 이 소스의 남은 마감까지만 기다림
+        remaining = max(0.0, min(sources[name][2], deadline) - (time.monotonic() - start))
+        with metrics.span(f"collect.{name}"):
+            return cache.get(name, fn, SOURCE_TTL.get(name, 0), args, CACHE_ACCEPT.get(name),
+                             timeout=remaining, max_stale=SOURCE_MAX_STALE.get(name))
+
+    # 현재 실행의 trace가 수집 스레드에서도 이어지도록 context를 복사해서 넘김
+    futures = {
+        name: _executor.submit(contextvars.copy_context().run, run, name, fn, args)
+        for name, (fn, args, _) in sources.items()
+    }
+
+    results, missing = {}, {}
+    for name, fut in futures.items():
+        limit = min(sources[name][2], deadline)
+        try:
+            results[name] = fut.result(timeout=max(0.0, limit - (time.monotonic() - start)))
+        except FutureTimeout:
+            missing[name] = "timeout"
+        except Exception as e:
+            missing[name] = str(e) or type(e).__name__
+        if name in missing:
+            metrics.count_error(f"collect.{name}")
+            results[name] = FALLBACK.get(name)
+    return results, missing
@@ -0,0 +1,74 @@
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import metrics
+import snapshot_store
+
+# --- 수집 데몬 ---
+# 페이지 렌더링과 분리된 headless 프로세스. 정해진 주기로 수집 -> 위험도 산정 -> 스냅샷 저장.
+# 사용: python collector.py --interval 60
+# 페이지는 snapshot_store.load_latest()만 읽으므로 접속자 수와 관계없이 외부 요청량이 일정함.
+# 수집 모듈(pandas/requests/lxml)은 실제로 수집할 때 import -> 저장된 스냅샷만 읽는 cli.py가 빨리 뜸
+# 알림(MORNING_ALERT_WEBHOOK / MORNING_ALERT_FILE)이 설정돼 있으면 저장 직후 바로 규칙 평가 (alerts.py)
+
+def build_snapshot(deadline=None):
+    from collect import collect_all, PAGE_DEADLINE
+    from risk import compute_risk
+    from source_health import health
+
+    results, missing = collect_all(deadline or PAGE_DEADLINE)
+    inv_missing = 'inv_kospi' in missing and 'inv_kosdaq' in missing
+    risk_factors, risk_score = compute_risk(results['market'] or {}, results['inv_kospi'], results['inv_kosdaq'], inv_missing,
+                                            results['flows'])
+    now = time.time()
+    return {
+        "ts": now,
+        "kst": (datetime.utcfromtimestamp(now) + timedelta(hours=9)).strftime('%Y-%m-%d %H:%M:%S'),
+        "results": results,
+        "missing": missing,
+        "inv_missing": inv_missing,
+        "risk_factors": risk_factors,
+        "risk_score": risk_score,
+        "health": health.stats(),
+    }
+
+def run(interval=60, db=snapshot_store.DEFAULT_DB, keep_days=30, once=False):
+    import alerts
+
+    last_prune = 0.0
+    alert_engine = alerts.from_env()
+    while True:
+        started = time.monotonic()
+        try:
+            with metrics.trace("collector.cycle"):
+                snap = build_snapshot()
+            snapshot_store.save_snapshot(snap, db)
+            print(f"[{snap['kst']}] 위험도 {snap['risk_score']}점 저장 (누락: {', '.join(snap['missing']) or '-'})", flush=True)
+        except Exception as e:
+            print(f"수집 실패: {e}", flush=True)
+            snap = None
+        if alert_engine and snap:
+            try:
+                for alert in alert_engine.evaluate_snapshot(snap):
+                    print(f"  알림: {alert['text']}", flush=True)
+            except Exception as e:
+                print(f"알림 평가 실패: {e}", flush=True)
+        if once:
+            if alert_engine: alert_engine.flush()
+            return
+        if time.time() - last_prune > 3600:
+            snapshot_store.prune(db, keep_days)
+            last_prune = time.time()
+        time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="위험도 대시보드 수집 데몬")
+    parser.add_argument("--interval", type=float, default=60, help="수집 주기 (초)")
+    parser.add_argument("--db", default=snapshot_store.DEFAULT_DB, help="스냅샷 SQLite 경로")
+    parser.add_argument("--keep-days", type=int, default=30, help="스냅샷 보관 기간 (일)")
+    parser.add_argument("--once", action="store_true", help="한 번만 수집하고 종료")
+    parser.add_argument("--metrics-port", type=int, default=None, help="/metrics, /traces HTTP 포트 (기본: MORNING_METRICS_PORT, 없으면 띄우지 않음)")
+    args = parser.parse_args()
+    if not args.once: metrics.start_server(args.metrics_port)
+    run(args.interval, args.db, args.keep_days, args.once)
@@ -0,0 +1,53 @@
+import json
+import os
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+import metrics
+
+# --- 대시보드 컴포넌트 (게이지 / 일정·뉴스를 한 번에) ---
+# 카드마다 st.markdown(인라인 HTML+CSS)을 따로 보내던 것을 컴포넌트 하나로 묶음:
+# - 마크업/CSS/그리는 코드는 dashboard_frontend/index.html (정적 파일, 브라우저가 한 번 받아 캐시)
+# - 실행마다 보내는 건 값만 담은 JSON. 그것도 세션이 지난번에 보낸 값과 비교해서 바뀐 키만 (diff)
+# - 프론트가 diff를 이어 붙일 기준(버전)을 잃으면(새로고침 등) resync 값을 돌려보내고, 다음 실행에 전체를 다시 보냄
+# 실행마다 보낸 바이트 수는 metrics.size("payload.<view>")로 기록 (/metrics, 사이드바 trace)
+
+_FRONTEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dashboard_frontend")
+_component = components.declare_component("morning_dashboard", path=_FRONTEND)
+
+def _encode(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+def diff(old, new):
+    # 반환: (바뀐 값, 지워진 경로 목록). dict는 키 단위로 내려가서 비교하고, 그 밖의 값(리스트 포함)은 통째로 비교
+    changed, removed = {}, []
+    for k, v in new.items():
+        if k not in old:
+            changed[k] = v
+        elif isinstance(v, dict) and isinstance(old[k], dict):
+            sub, sub_removed = diff(old[k], v)
+            if sub: changed[k] = sub
+            removed += [[k, *path] for path in sub_removed]
+        elif v != old[k]:
+            changed[k] = v
+    removed += [[k] for k in old if k not in new]
+    return changed, removed
+
+def render(view, data, key):
+    # view: 프론트에서 그릴 화면 이름 ("market" / "events"), data: JSON으로 보낼 값 dict
+    sent = st.session_state.setdefault(f"_{key}_sent", {"v": 0, "data": None, "resync": None})
+    ack = st.session_state.get(key) or {}
+    data = json.loads(_encode(data))  # 튜플/숫자 형식을 JSON과 같게 맞춰서 비교
+    if sent["data"] is None or ack.get("resync") not in (None, sent["resync"]):
+        sent["resync"] = ack.get("resync")
+        sent["v"] += 1
+        payload = {"view": view, "v": sent["v"], "full": data}
+    else:
+        changed, removed = diff(sent["data"], data)
+        base = sent["v"]
+        if changed or removed: sent["v"] += 1
+        payload = {"view": view, "v": sent["v"], "base": base, "set": changed, "del": removed}
+    sent["data"] = data
+    metrics.size(f"payload.{view}", len(_encode(payload).encode()))
+    return _component(payload=payload, key=key, default=None)
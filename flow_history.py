@@ -0,0 +1,159 @@
+import argparse
+import math
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import http_client
+import metrics
+import parsing
+
+# --- 외국인 순매수 히스토리 (일별 매매동향 페이지) ---
+# 네이버 '투자자별 매매동향' 일별 페이지(페이지당 약 10거래일)를 SQLite에 날짜별로 쌓아 둠.
+# - 처음: KOSPI/KOSDAQ의 INITIAL_PAGES개 페이지를 FETCH_WORKERS개씩 동시에 받음
+# - 이후: 마지막 저장 날짜 이후만. 지난 거래일 수로 필요한 페이지 수를 어림해서 그만큼만 (보통 시장당 1페이지)
+#   마지막 저장 날짜 행은 장중에 바뀌므로 항상 다시 받아 덮어씀
+# - 누적 순매수(5/20일)는 저장된 값으로 계산 -> 위험도 inv 요인과 차트에 씀 (수십 페이지를 매번 긁지 않음)
+# 사용: python flow_history.py [--pages 30]
+
+FLOW_DB = os.environ.get(
+    "MORNING_FLOW_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "morning_flows.db"),
+)
+MARKETS = {"KOSPI": "0", "KOSDAQ": "1"}
+ROWS_PER_PAGE = 10
+INITIAL_PAGES = 25   # 처음 받을 페이지 수 (약 250거래일)
+MAX_PAGES = 60       # 한 번에 따라갈 최대 페이지 수 (오래 쉬었다 켠 경우)
+FETCH_WORKERS = 8
+ROLLING = (5, 20)    # 누적 순매수 구간 (거래일)
+
+_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="flows")
+_update_lock = threading.Lock()
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=5)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS flows (market TEXT, date TEXT, foreign_net INTEGER, "
+                 "PRIMARY KEY (market, date))")
+    return conn
+
+def fetch_page(market, page):
+    # 반환: [(날짜 'YYYY-MM-DD', 외국인 순매수(억)), ...] 최근 날짜부터. 같은 날짜가 두 번 나오면 위(최신) 행 사용
+    url = f"https://finance.naver.com/sise/investor.naver?sosok={MARKETS[market]}&page={page}"
+    res = http_client.get(url, timeout=5)
+    with metrics.span("parse.naver_investor_pages"):
+        rows = parsing.parse_daily_flows(res.content.decode('euc-kr', 'replace'))
+    out = {}
+    for day, amount in rows:
+        try:
+            day = datetime.strptime(day, "%y.%m.%d").strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+        out.setdefault(day, parsing.parse_amount(amount))
+    return list(out.items())
+
+def latest_dates(path=FLOW_DB):
+    # 시장별 마지막 저장 날짜 {시장: 'YYYY-MM-DD'} (없는 시장은 빠짐)
+    if not os.path.exists(path): return {}
+    conn = _connect(path)
+    rows = conn.execute("SELECT market, MAX(date) FROM flows GROUP BY market").fetchall()
+    conn.close()
+    return dict(rows)
+
+def _pages_needed(latest, today=None):
+    # 마지막 저장 날짜 이후 지난 평일 수로 받아야 할 페이지 수 어림 (그 날짜 행까지 포함되도록 +1)
+    if latest is None: return INITIAL_PAGES
+    today = today or (datetime.utcnow() + timedelta(hours=9)).date()
+    gap = sum(1 for i in range((today - date.fromisoformat(latest)).days) if (today - timedelta(days=i)).weekday() < 5)
+    return min(MAX_PAGES, math.ceil((gap + 1) / ROWS_PER_PAGE))
+
+def update(markets=tuple(MARKETS), path=FLOW_DB):
+    # 새 날짜만 받아 저장. 반환: 시장별 받은 페이지 수
+    with _update_lock, metrics.span("flows.update"):
+        latest = latest_dates(path)
+        fetched, rows = {}, []
+        pending = {m: range(1, _pages_needed(latest.get(m)) + 1) for m in markets}
+        while pending:
+            futures = {(m, p): _pool.submit(fetch_page, m, p) for m, pages in pending.items() for p in pages}
+            results = {}
+            for (m, p), fut in futures.items():
+                try:
+                    results[(m, p)] = fut.result()
+                except Exception:
+                    results[(m, p)] = []
+            nxt = {}
+            for m, pages in pending.items():
+                fetched[m] = fetched.get(m, 0) + len(pages)
+                page_rows = [row for p in pages for row in results[(m, p)]]
+                rows += [(m, day, val) for day, val in page_rows]
+                # 어림보다 휴장일이 적었으면(저장된 날짜까지 못 내려감) 다음 페이지를 이어서 받음
+                oldest = min((day for day, _ in page_rows), default=None)
+                last = pages[-1]
+                if latest.get(m) and oldest and oldest > latest[m] and results[(m, last)] and last < MAX_PAGES:
+                    nxt[m] = range(last + 1, min(MAX_PAGES, last + 2) + 1)
+            pending = nxt
+        if rows:
+            with _connect(path) as conn:
+                conn.executemany("INSERT OR REPLACE INTO flows (market, date, foreign_net) VALUES (?, ?, ?)", rows)
+            conn.close()
+        return fetched
+
+def history(days=None, path=FLOW_DB):
+    # 날짜별 외국인 순매수(억) DataFrame (열: KOSPI, KOSDAQ, total). 저장된 게 없으면 빈 DataFrame
+    import pandas as pd
+
+    if not os.path.exists(path): return pd.DataFrame(columns=[*MARKETS, "total"])
+    conn = _connect(path)
+    df = pd.read_sql_query("SELECT market, date, foreign_net FROM flows", conn)
+    conn.close()
+    table = df.pivot(index="date", columns="market", values="foreign_net").reindex(columns=list(MARKETS))
+    table.index = pd.to_datetime(table.index)
+    table = table.sort_index()
+    table["total"] = table[list(MARKETS)].sum(axis=1, min_count=len(MARKETS))  # 두 시장이 다 있는 날만
+    return table.tail(days) if days else table
+
+def rolling_sums(flows, windows=ROLLING):
+    # flows: 날짜별 순매수 Series -> {'inv5': 5거래일 누적, 'inv20': ...} Series (구간을 다 못 채운 앞부분은 NaN)
+    return {f"inv{n}": flows.rolling(n, min_periods=n).sum() for n in windows}
+
+def sums(path=FLOW_DB):
+    # 저장된 마지막 날짜 기준 누적 순매수 합계(KOSPI+KOSDAQ, 억). 반환: {"inv5", "inv20", "date"} (데이터 부족하면 빈 dict)
+    flows = history(max(ROLLING), path)["total"].dropna()
+    if len(flows) < min(ROLLING): return {}
+    out = {k: float(v.iloc[-1]) for k, v in rolling_sums(flows).items() if not math.isnan(v.iloc[-1])}
+    out["date"] = flows.index[-1].strftime("%Y-%m-%d")
+    return out
+
+def recent_sums(path=FLOW_DB):
+    # 수집 소스 (collect.SOURCES): 증분 갱신 후 누적 합계
+    update(path=path)
+    return sums(path)
+
+def plot_flows(table, market="total"):
+    # 일별 순매수 막대 + 5/20일 누적선 (plotly). 매도 빨강 / 매수 파랑 (게이지 색과 같은 의미)
+    import plotly.graph_objects as go
+
+    s = table[market].dropna()
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=s.index, y=s, name="일별", marker_color=["#d32f2f" if v < 0 else "#1565c0" for v in s]))
+    for (name, line), color in zip(rolling_sums(s).items(), ("#FF9800", "#6A1B9A")):
+        fig.add_trace(go.Scatter(x=line.index, y=line, name=f"{name[3:]}일 누적", yaxis="y2", line=dict(color=color)))
+    fig.update_layout(
+        height=320, margin=dict(l=10, r=10, t=30, b=10), legend=dict(orientation="h"),
+        yaxis=dict(title="일별 (억)"), yaxis2=dict(title="누적 (억)", overlaying="y", side="right", showgrid=False),
+    )
+    return fig
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="외국인 순매수 히스토리 갱신")
+    parser.add_argument("--pages", type=int, help="처음 받을 페이지 수 (기본: INITIAL_PAGES)")
+    parser.add_argument("--db", default=FLOW_DB)
+    args = parser.parse_args()
+    if args.pages: INITIAL_PAGES = args.pages
+
+    print("받은 페이지:", update(path=args.db))
+    table = history(path=args.db)
+    print(f"저장된 날짜: {len(table)}일 ({table.index.min():%Y-%m-%d} ~ {table.index.max():%Y-%m-%d})" if len(table) else "저장된 날짜 없음")
+    print("누적 순매수:", sums(args.db))
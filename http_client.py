@@ -0,0 +1,82 @@
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import metrics
+
+# --- 공용 HTTP 클라이언트 ---
+# 모든 수집 함수가 하나의 Session을 공유 -> 호스트별 커넥션 풀 + keep-alive로 매번 TCP/TLS 핸드셰이크를 하지 않음.
+# - GET/HEAD만 짧은 backoff로 재시도 (POST는 재시도하지 않음)
+# - gzip/deflate 압축 응답 수락
+# - 서버가 ETag/Last-Modified를 주면 다음 요청에 If-None-Match/If-Modified-Since를 붙이고,
+#   304면 이전 응답 본문을 그대로 재사용
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0',
+    'Accept-Encoding': 'gzip, deflate',
+}
+
+# 벤치마크/오프라인 실행용: 설정하면 모든 요청을 이 주소의 /<원래 호스트>/<경로>로 보냄 (bench/upstream.py)
+UPSTREAM = os.environ.get("MORNING_UPSTREAM")
+
+POOL_SIZE = 10  # 호스트당 유지할 연결 수 (수집 스레드 풀 크기와 비슷하게)
+
+RETRY = Retry(
+    total=2, connect=2, read=1,
+    backoff_factor=0.3,                      # 0.3s, 0.6s
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset({"GET", "HEAD"}),
+    respect_retry_after_header=False,        # Retry-After로 페이지 마감을 넘기지 않도록
+    raise_on_status=False,
+)
+
+def _make_session():
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=RETRY)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    s.headers.update(DEFAULT_HEADERS)
+    return s
+
+session = _make_session()
+
+def _route(url):
+    if not UPSTREAM: return url
+    parts = urlsplit(url)
+    return f"{UPSTREAM.rstrip('/')}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+
+_validators = {}  # url -> (etag, last_modified, 이전 응답)
+_lock = threading.Lock()
+
+def get(url, headers=None, timeout=5, conditional=True):
+    # requests.get 대신 사용. conditional=True면 ETag/Last-Modified 재검증
+    req_headers = dict(headers or {})
+    cached = None
+    if conditional:
+        with _lock:
+            cached = _validators.get(url)
+        if cached:
+            etag, last_modified, _ = cached
+            if etag: req_headers['If-None-Match'] = etag
+            if last_modified: req_headers['If-Modified-Since'] = last_modified
+
+    with metrics.span(f"http.{urlsplit(url).hostname}"):
+        res = session.get(_route(url), headers=req_headers, timeout=timeout)
+    if res.status_code == 304 and cached:
+        return cached[2]
+
+    if conditional and res.status_code == 200:
+        etag, last_modified = res.headers.get('ETag'), res.headers.get('Last-Modified')
+        if etag or last_modified:
+            _ = res.content  # 본문을 미리 읽어서 304 때 재사용할 수 있게 함
+            with _lock:
+                _validators[url] = (etag, last_modified, res)
+    return res
+
+def post(url, timeout=10, **kwargs):
+    with metrics.span(f"http.{urlsplit(url).hostname}"):
+        return session.post(_route(url), timeout=timeout, **kwargs)
@@ -0,0 +1,209 @@
+import argparse
+import gzip
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+import metrics
+from risk import MARKET_FACTORS, RISK_WEIGHTS, compute_risk_score, market_factor
+
+# --- 장중 실시간 모드 ---
+# 1분봉/시세를 틱 단위 스트림으로 받아 게이지 지표(val/diff/pct/dd*)와 위험도를 증분 갱신.
+# - 종목별로 '오늘 이전' 일봉에서 전일 종가와 N일 고점(오늘 봉 제외)을 한 번만 계산해 두고,
+#   틱마다 가격 하나로 pct/dd를 O(1)로 계산 (calc_metrics와 같은 정의: 오늘 가격이 N일 창의 마지막 봉)
+# - 틱 날짜가 마지막으로 일봉을 읽은 날짜를 넘어가면(날이 바뀌면) loader로 일봉을 다시 읽음 -> 어제 종가가 기준에 들어감
+# - 해당 시세가 쓰이는 위험도 요인 하나만 다시 계산 (risk.market_factor)
+# - 바뀐 게이지마다 버전을 붙여 두고, 세션은 changes_since(자기 버전)로 바뀐 것만 받아감
+# 피드: ReplayFeed(저장된 1분봉 재생, 테스트/데모용) 또는 YahooMinuteFeed(yfinance 1분봉 폴링)
+# 사용: python intraday.py --replay bench/fixtures/intraday_1m.csv.gz --speed 0
+
+REPLAY_FILE = os.environ.get("MORNING_INTRADAY_REPLAY")        # 설정하면 실제 시세 대신 재생
+REPLAY_SPEED = float(os.environ.get("MORNING_INTRADAY_SPEED", 60))  # 재생 배속 (0 = 대기 없이)
+POLL_SECONDS = 60  # YahooMinuteFeed 폴링 주기
+
+
+class IntradayEngine:
+    def __init__(self, tickers, window=5, windows=(20, 60, 200), loader=None):
+        self.keys = {symbol: key for key, symbol in tickers.items()}  # 심볼 -> 게이지 키
+        self.window, self.windows = window, windows
+        self.version = 0
+        self.gauges = {}     # 게이지 키 -> {"val", "diff", "pct", "dd", "dd20", ..., "ts"}
+        self.factors = {}    # 시세 기반 위험도 요인 (tnx/oil/krw/vix/sox/mkt)
+        self.ticks = 0
+        self.loader = loader  # 일봉 종가 표를 돌려주는 함수 (price_history.closes 모양). 날이 바뀌면 다시 부름
+        self._daily = {}     # 심볼 -> (날짜 배열, 종가 배열)
+        self._seed_day = None  # 일봉을 마지막으로 읽은 틱 날짜
+        self._base = {}      # 심볼 -> (기준 날짜, 전일 종가, {창 길이: 오늘 제외 고점})
+        self._changed = {}   # 게이지 키 -> 마지막으로 바뀐 버전
+        self._lock = threading.Lock()
+
+    def seed(self, closes, day=None):
+        # closes: price_history.closes() 결과 (행: 날짜, 열: 심볼). 틱 날짜보다 이전 봉만 기준으로 씀
+        with self._lock:
+            for symbol in closes:
+                s = closes[symbol].dropna()
+                self._daily[symbol] = (s.index.values.astype('datetime64[D]'), s.to_numpy(dtype=float))
+                self._base.pop(symbol, None)
+            if day is not None: self._seed_day = day
+
+    def _base_for(self, symbol, day):
+        base = self._base.get(symbol)
+        if base is not None and base[0] == day: return base
+        dates, values = self._daily.get(symbol, (np.empty(0, 'datetime64[D]'), np.empty(0)))
+        prior = values[dates < day]
+        highs = {n: float(prior[-(n - 1):].max()) if n > 1 and len(prior) else -np.inf
+                 for n in (self.window, *self.windows)}
+        base = (day, float(prior[-1]) if len(prior) else None, highs)
+        self._base[symbol] = base
+        return base
+
+    def on_tick(self, symbol, ts, price):
+        # 틱 하나 반영. 반환: 바뀐 게이지 dict (모르는 심볼이거나 값이 같으면 None)
+        key = self.keys.get(symbol)
+        if key is None or price is None or np.isnan(price): return None
+        day = np.datetime64(ts.date() if hasattr(ts, "date") else ts, 'D')
+        if self.loader is not None and (self._seed_day is None or day > self._seed_day):
+            # 그날 첫 틱: 일봉을 다시 읽음 (피드 스레드에서 하루 한 번)
+            self._seed_day = day
+            self.seed(self.loader(), day)
+        with self._lock:
+            self.ticks += 1
+            _, prev, highs = self._base_for(symbol, day)
+            prev = price if prev is None else prev
+            gauge = {"val": price, "diff": price - prev, "pct": (price - prev) / prev * 100 if prev else 0.0}
+            for n, high in highs.items():
+                high = max(high, price)
+                gauge["dd" if n == self.window else f"dd{n}"] = (high - price) / high * 100 if high else 0.0
+            old = self.gauges.get(key)
+            if old is not None and old["val"] == price: return None
+            gauge["ts"] = str(ts)
+            self.version += 1
+            self.gauges[key] = gauge
+            self._changed[key] = self.version
+            if key in MARKET_FACTORS:
+                name, value = market_factor(key, gauge)
+                self.factors[name] = value
+            return gauge
+
+    def changes_since(self, version):
+        # 세션이 마지막으로 본 버전 이후 바뀐 게이지만. 반환: (현재 버전, {키: 게이지})
+        with self._lock:
+            return self.version, {k: self.gauges[k] for k, v in self._changed.items() if v > version}
+
+    def risk(self, base_factors, weights=RISK_WEIGHTS):
+        # 스냅샷 요인(수급 등)에 장중 시세 요인을 덮어써서 점수 계산 (요인 7개 가중합)
+        with self._lock:
+            factors = {**base_factors, **self.factors}
+        return factors, compute_risk_score(factors, weights)
+
+
+# --- 피드 ---
+class ReplayFeed:
+    # 저장된 1분봉 CSV(ts,symbol,price, gzip 가능)를 시간 순서대로 재생. speed 배속으로 대기 (0이면 바로)
+    def __init__(self, path, speed=60.0):
+        self.path, self.speed = path, speed
+
+    def _rows(self):
+        opener = gzip.open if self.path.endswith(".gz") else open
+        with opener(self.path, "rt", encoding="utf-8") as f:
+            next(f)  # 헤더
+            for line in f:
+                ts, symbol, price = line.rstrip("\n").split(",")
+                yield datetime.fromisoformat(ts), symbol, float(price)
+
+    def __iter__(self):
+        prev_ts = None
+        for ts, symbol, price in self._rows():
+            if self.speed and prev_ts is not None and ts > prev_ts:
+                time.sleep((ts - prev_ts).total_seconds() / self.speed)
+            prev_ts = ts
+            yield symbol, ts, price
+
+
+class YahooMinuteFeed:
+    # yfinance 1분봉을 주기적으로 받아 새로 생긴 봉(과 갱신 중인 마지막 봉)만 내보냄
+    def __init__(self, symbols, poll=POLL_SECONDS):
+        self.symbols, self.poll = list(symbols), poll
+
+    def __iter__(self):
+        import yfinance as yf
+
+        last = {}
+        while True:
+            try:
+                with metrics.span("intraday.download"):
+                    df = yf.download(self.symbols, period="1d", interval="1m", progress=False,
+                                     group_by='column', auto_adjust=False, threads=True)
+                close = df['Close'] if df is not None and not df.empty else None
+            except Exception:
+                close = None
+            if close is not None:
+                for symbol in close:
+                    s = close[symbol].dropna()
+                    s = s[s.index >= last.get(symbol, s.index.min())] if len(s) else s
+                    for ts, price in s.items():
+                        yield symbol, ts.to_pydatetime(), float(price)
+                    if len(s): last[symbol] = s.index[-1]
+            time.sleep(self.poll)
+
+
+def run(engine, feed, stop=None):
+    for symbol, ts, price in feed:
+        if stop is not None and stop.is_set(): return
+        engine.on_tick(symbol, ts, price)
+
+
+# --- 프로세스 공용 엔진 (Streamlit 세션들이 같이 씀) ---
+engine = None
+_thread = None
+_start_lock = threading.Lock()
+
+def load_closes():
+    # 로컬 히스토리를 갱신하고(실패하면 저장된 것 그대로) 최근 일봉 종가를 읽음
+    import price_history
+    from collect import DD_WINDOWS, TICKERS
+
+    symbols = list(TICKERS.values())
+    try:
+        with metrics.span("intraday.history_update"):
+            price_history.update(symbols)
+    except Exception:
+        pass
+    return price_history.closes(symbols, days=max(DD_WINDOWS))
+
+def start(feed=None):
+    # 처음 호출될 때 엔진과 피드 스레드를 띄움 (일봉 기준값은 첫 틱과 날이 바뀔 때마다 읽음). 이후 호출은 같은 엔진 반환
+    global engine, _thread
+    with _start_lock:
+        if engine is not None: return engine
+        from collect import DD_WINDOWS, TICKERS
+
+        engine = IntradayEngine(TICKERS, windows=DD_WINDOWS, loader=load_closes)
+        if feed is None:
+            feed = ReplayFeed(REPLAY_FILE, REPLAY_SPEED) if REPLAY_FILE else YahooMinuteFeed(TICKERS.values())
+        _thread = threading.Thread(target=run, args=(engine, feed), name="intraday-feed", daemon=True)
+        _thread.start()
+        return engine
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="장중 실시간 모드 (재생 피드로 확인)")
+    parser.add_argument("--replay", default=REPLAY_FILE, help="1분봉 CSV (ts,symbol,price)")
+    parser.add_argument("--speed", type=float, default=0, help="재생 배속 (0 = 대기 없이)")
+    args = parser.parse_args()
+
+    from collect import DD_WINDOWS, TICKERS
+
+    eng = IntradayEngine(TICKERS, windows=DD_WINDOWS, loader=load_closes)
+    feed = ReplayFeed(args.replay, args.speed) if args.replay else YahooMinuteFeed(TICKERS.values())
+    started, last_score = time.perf_counter(), None
+    for symbol, ts, price in feed:
+        if eng.on_tick(symbol, ts, price) is None: continue
+        _, score = eng.risk({})
+        if score != last_score:
+            print(f"{ts} 위험도 {score}점 ({symbol} {price:,.2f})", flush=True)
+            last_score = score
+    elapsed = time.perf_counter() - started
+    print(f"틱 {eng.ticks}개, {elapsed:.2f}초 ({eng.ticks / elapsed:,.0f} 틱/초)")
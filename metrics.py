@@ -0,0 +1,230 @@
+import contextvars
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- 단계별 시간 측정 ---
+# span(name): 코드 구간의 소요 시간/성공 여부를 기록
+#  - 프로세스 공용 히스토그램(단계별 지연 분포, 에러 수)에 누적 -> Prometheus 텍스트 형식으로 내보냄
+#  - 실행(rerun) 단위 trace가 열려 있으면 거기에도 추가 -> 실행별 JSON trace
+# trace는 contextvar로 전달되므로 수집 스레드 풀에는 contextvars.copy_context().run으로 넘겨야 함.
+# size(name, n): 실행마다 브라우저로 보내는 데이터 크기(바이트) 기록 (dashboard.py 컴포넌트 payload)
+# /metrics, /traces HTTP 서버는 MORNING_METRICS_PORT(또는 collector.py --metrics-port)를 줄 때만 127.0.0.1에 띄움
+# span 오류 메시지에서는 URL 쿼리(?key=API키 등)를 지우고 기록 -> /traces, trace 파일에 키가 남지 않게
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # 초
+RECENT_TRACES = 20
+TRACE_FILE = os.environ.get("MORNING_TRACE_FILE")  # 설정하면 trace를 JSONL로 계속 추가
+
+_current = contextvars.ContextVar("morning_trace", default=None)
+_lock = threading.Lock()
+_hist = {}     # 단계 이름 -> {"buckets": [...], "sum": 초, "count": n}
+_errors = {}   # 단계 이름 -> 에러 수
+_sizes = {}    # 이름 -> {"sum": 바이트, "count": n}
+_recent = deque(maxlen=RECENT_TRACES)
+
+_URL_QUERY = re.compile(r"(https?://[^\s?#'\"]+)\?[^\s'\")]*")
+_KEY_PARAM = re.compile(r"((?:api_?)?key=)[^&\s'\")]+", re.IGNORECASE)
+
+def redact(text):
+    # 오류 메시지 속 URL의 쿼리 문자열과 key=... 값을 지움 (requests/urllib3 예외는 요청 URL을 그대로 담음)
+    return _KEY_PARAM.sub(r"\1***", _URL_QUERY.sub(r"\1?…", text))
+
+
+class Trace:
+    def __init__(self, name):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.started = time.time()
+        self.total_ms = None
+        self.spans = []
+        self.sizes = {}   # 이름 -> 바이트 (이번 실행에서 보낸 payload)
+        self._lock = threading.Lock()
+
+    def add(self, name, ms, ok, error=""):
+        with self._lock:
+            self.spans.append({"name": name, "ms": round(ms, 2), "ok": ok, "error": error,
+                               "thread": threading.current_thread().name})
+
+    def add_size(self, name, nbytes):
+        with self._lock:
+            self.sizes[name] = self.sizes.get(name, 0) + nbytes
+
+    def to_dict(self):
+        with self._lock:
+            return {"id": self.id, "name": self.name, "started": self.started,
+                    "total_ms": self.total_ms, "spans": list(self.spans), "sizes": dict(self.sizes)}
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+
+def observe(name, seconds, ok=True):
+    with _lock:
+        h = _hist.setdefault(name, {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0})
+        for i, b in enumerate(BUCKETS):
+            if seconds <= b: h["buckets"][i] += 1
+        h["sum"] += seconds
+        h["count"] += 1
+        if not ok: _errors[name] = _errors.get(name, 0) + 1
+
+def count_error(name):
+    with _lock:
+        _errors[name] = _errors.get(name, 0) + 1
+
+def size(name, nbytes):
+    with _lock:
+        s = _sizes.setdefault(name, {"sum": 0, "count": 0})
+        s["sum"] += nbytes
+        s["count"] += 1
+    tr = _current.get()
+    if tr is not None: tr.add_size(name, nbytes)
+
+@contextmanager
+def span(name):
+    start = time.perf_counter()
+    ok, error = True, ""
+    try:
+        yield
+    except Exception as e:
+        ok, error = False, redact(str(e)) or type(e).__name__
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        observe(name, elapsed, ok)
+        tr = _current.get()
+        if tr is not None: tr.add(name, elapsed * 1000, ok, error)
+
+@contextmanager
+def trace(name):
+    # 열린 trace가 없으면 새 trace를 시작하고 끝날 때 보관, 이미 있으면 그 안의 span으로 동작
+    if _current.get() is not None:
+        with span(name):
+            yield _current.get()
+        return
+    tr = Trace(name)
+    token = _current.set(tr)
+    start = time.perf_counter()
+    try:
+        with span(name):
+            yield tr
+    finally:
+        tr.total_ms = round((time.perf_counter() - start) * 1000, 2)
+        _current.reset(token)
+        _finish(tr)
+
+def traced(name):
+    # 함수 전체를 trace로 감싸는 데코레이터 (Streamlit fragment 본문용)
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with trace(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+def _finish(tr):
+    with _lock:
+        _recent.append(tr)
+    if TRACE_FILE:
+        try:
+            with open(TRACE_FILE, "a", encoding="utf-8") as f:
+                f.write(tr.to_json() + "\n")
+        except OSError:
+            pass
+
+def begin(name):
+    # with 블록으로 감싸기 어려운 곳(스크립트 전체)용. end(token)과 짝으로 사용
+    tr = Trace(name)
+    return tr, _current.set(tr), time.perf_counter()
+
+def end(token):
+    tr, ctx_token, start = token
+    elapsed = time.perf_counter() - start
+    tr.total_ms = round(elapsed * 1000, 2)
+    observe(tr.name, elapsed)
+    _current.reset(ctx_token)
+    _finish(tr)
+    return tr
+
+def current_trace():
+    return _current.get()
+
+def recent_traces():
+    with _lock:
+        return [tr.to_dict() for tr in _recent]
+
+# --- Prometheus 내보내기 ---
+def _label(v):
+    return v.replace("\\", "\\\\").replace('"', '\\"')
+
+def prometheus_text():
+    lines = [
+        "# HELP morning_stage_seconds Stage latency",
+        "# TYPE morning_stage_seconds histogram",
+    ]
+    with _lock:
+        hist = {k: {"buckets": list(v["buckets"]), "sum": v["sum"], "count": v["count"]} for k, v in _hist.items()}
+        errors = dict(_errors)
+        sizes = {k: dict(v) for k, v in _sizes.items()}
+    for name, h in sorted(hist.items()):
+        lbl = _label(name)
+        for b, n in zip(BUCKETS, h["buckets"]):
+            lines.append(f'morning_stage_seconds_bucket{{stage="{lbl}",le="{b}"}} {n}')
+        lines.append(f'morning_stage_seconds_bucket{{stage="{lbl}",le="+Inf"}} {h["count"]}')
+        lines.append(f'morning_stage_seconds_sum{{stage="{lbl}"}} {h["sum"]:.6f}')
+        lines.append(f'morning_stage_seconds_count{{stage="{lbl}"}} {h["count"]}')
+    lines += ["# HELP morning_stage_errors_total Stage errors", "# TYPE morning_stage_errors_total counter"]
+    for name, n in sorted(errors.items()):
+        lines.append(f'morning_stage_errors_total{{stage="{_label(name)}"}} {n}')
+    lines += ["# HELP morning_payload_bytes Bytes sent to the browser per render", "# TYPE morning_payload_bytes summary"]
+    for name, s in sorted(sizes.items()):
+        lines.append(f'morning_payload_bytes_sum{{payload="{_label(name)}"}} {s["sum"]}')
+        lines.append(f'morning_payload_bytes_count{{payload="{_label(name)}"}} {s["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/metrics"):
+            body, ctype = prometheus_text().encode(), "text/plain; version=0.0.4"
+        elif self.path.startswith("/traces"):
+            body, ctype = json.dumps(recent_traces(), ensure_ascii=False).encode(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+_server = None
+_server_tried = False
+
+def start_server(port=None, host=None):
+    # /metrics (Prometheus), /traces (최근 trace JSON). 포트를 주지 않았고 MORNING_METRICS_PORT도 없으면 띄우지 않음.
+    # 기본은 로컬(127.0.0.1)에서만 접속 (MORNING_METRICS_HOST로 변경). 프로세스당 한 번만 시도하고, 포트가 이미 쓰이면 조용히 건너뜀
+    global _server, _server_tried
+    port = port if port is not None else os.environ.get("MORNING_METRICS_PORT")
+    if port in (None, ""): return None
+    host = host or os.environ.get("MORNING_METRICS_HOST", "127.0.0.1")
+    with _lock:
+        if _server_tried: return _server
+        _server_tried = True
+        try:
+            _server = ThreadingHTTPServer((host, int(port)), _Handler)
+        except OSError:
+            return None
+    threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    return _server
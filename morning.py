@@ -1,12 +1,25 @@
+import os
 import streamlit as st
-import yfinance as yf
-import pandas as pd
-import requests
-from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
-import re
-import time
-import json
+
+import ai_analysis
+import dashboard
+import flow_history
+import intraday
+import metrics
+import news as news_feed
+import watchlist
+from collect import TICKERS
+from report import briefing_inputs, get_basic_report
+from collector import build_snapshot
+from risk import RISK_WEIGHTS, backfill, compute_risk, evaluate, plot_risk_history
+from snapshot_store import load_latest
+from source_cache import cache
+from source_health import health
+from watchlist import chart_url
+
+SNAPSHOT_MAX_AGE = 600  # 이보다 오래된 스냅샷은 무시하고 직접 수집 (초)
+NEWS_ITEMS = 12         # 뉴스 목록에 보여줄 기사 수
 
 # =========================================================
 # 🔑 사장님 전용 설정
@@ -21,12 +34,17 @@ st.set_page_config(
     layout="wide"
 )
 
-# --- 세션 상태 초기화 (API 키 유지용) ---
-if 'api_key' not in st.session_state:
-    st.session_state.api_key = MY_GEMINI_API_KEY
-
-# --- 스타일링 (CSS) ---
-st.markdown("""
+# 페이지 전체 실행(rerun) 단위 trace. fragment만 다시 실행될 때는 각 render.* 가 자기 trace를 가짐
+metrics.start_server()
+page_run = metrics.begin("page")
+try:
+    # --- 세션 상태 초기화 (API 키 유지용) ---
+    if 'api_key' not in st.session_state:
+        st.session_state.api_key = MY_GEMINI_API_KEY or os.environ.get("GEMINI_API_KEY", "")  # cli.py와 같은 환경 변수
+
+    # --- 스타일링 (CSS) ---
+    # 게이지/일정/뉴스 스타일은 대시보드 컴포넌트 쪽(dashboard_frontend/index.html)에 있음
+    st.markdown("""
     <style>
     html, body, p, h1, h2, h3, h4, div, span, label, li, a {
         font-family: 'Pretendard', sans-serif !important;
@@ -34,18 +52,6 @@ st.markdown("""
     .header-title { font-size: 26px !important; font-weight: bold; color: #1e1e1e; margin-bottom: 5px; }
     .sub-info { font-size: 14px; color: #666; margin-bottom: 20px; }
     
-    .mini-gauge-container {
-        margin-bottom: 15px; padding: 12px; background-color: #fff; border-radius: 10px;
-        border: 1px solid #eee; box-shadow: 0 2px 4px rgba(0,0,0,0.02);
-    }
-    .mini-gauge-title { font-size: 13px; font-weight: bold; color: #444; margin-bottom: 6px; display: flex; justify-content: space-between; align-items: center; }
-    .mini-gauge-track { position: relative; width: 100%; height: 8px; background-color: #f0f0f0; border-radius: 4px; }
-    .mini-gauge-pointer {
-        position: absolute; top: -5px; width: 10px; height: 18px; background-color: #222;
-        border: 2px solid #fff; border-radius: 2px; transform: translateX(-50%);
-    }
-    .mini-gauge-labels { display: flex; justify-content: space-between; font-size: 10px; color: #aaa; margin-top: 4px; }
-    
     /* 링크 스타일 */
     a { text-decoration: none; color: inherit; }
     a:hover { color: #1565c0; text-decoration: underline; }
@@ -55,446 +61,217 @@ st.markdown("""
     .guide-section-title { font-size: 16px; font-weight: 700; margin-top: 20px; margin-bottom: 10px; color: #1565c0 !important; }
     .guide-text { font-size: 15px; line-height: 1.7; margin-bottom: 10px; color: #333 !important; }
     .portfolio-card { background-color: #f0f4f8; padding: 15px; border-radius: 10px; margin-top: 15px; border-left: 5px solid #1565c0; }
-    
-    .news-item { padding: 10px 0; border-bottom: 1px solid #f0f0f0; font-size: 14px; }
-    .news-title { font-weight: 600; text-decoration: none; color: #333; }
-    .news-title:hover { color: #1565c0; text-decoration: underline; }
-    .cal-badge { background-color: #fff3e0; color: #ef6c00; padding: 2px 6px; border-radius: 4px; font-size: 11px; font-weight: bold; margin-right: 8px; }
-    .semi-badge { background-color: #e3f2fd; color: #1565c0; padding: 2px 6px; border-radius: 4px; font-size: 11px; font-weight: bold; margin-right: 8px; }
-    
-    .cal-time { font-weight: bold; color: #ef6c00; min-width: 45px; display: inline-block; }
-    .cal-star { color: #ffca28; font-size: 12px; margin-left: 4px; }
     </style>
     """, unsafe_allow_html=True)
 
-# --- 사이드바 ---
-with st.sidebar:
-    st.header("⚙️ 위험도 분석 V0.65")
+    # --- 사이드바 ---
+    with st.sidebar:
+        st.header("⚙️ 위험도 분석 V0.65")
     
-    api_input = st.text_input("🔑 Gemini API 키 입력", type="password", value=st.session_state.api_key, placeholder="여기에 키를 입력하세요")
-    if api_input:
-        st.session_state.api_key = api_input.strip()
-        st.success("✅ API 키 적용됨")
+        api_input = st.text_input("🔑 Gemini API 키 입력", type="password", value=st.session_state.api_key, placeholder="여기에 키를 입력하세요")
+        if api_input:
+            st.session_state.api_key = api_input.strip()
+            st.success("✅ API 키 적용됨")
         
-    st.markdown("---")
-    # [NEW] 수동 데이터 입력 섹션 추가
-    with st.expander("🔧 수동 데이터 입력 (크롤링 실패 시)"):
-        st.caption("자동 수집이 0으로 뜰 때, HTS나 네이버 금융을 보고 직접 입력하면 분석에 반영됩니다.")
-        manual_kospi = st.number_input("KOSPI 외인 순매수 (억)", value=0, step=100)
-        manual_kosdaq = st.number_input("KOSDAQ 외인 순매수 (억)", value=0, step=100)
+        st.markdown("---")
+        # [NEW] 수동 데이터 입력 섹션 추가
+        with st.expander("🔧 수동 데이터 입력 (크롤링 실패 시)"):
+            st.caption("자동 수집이 0으로 뜰 때, HTS나 네이버 금융을 보고 직접 입력하면 분석에 반영됩니다.")
+            st.number_input("KOSPI 외인 순매수 (억)", value=0, step=100, key="manual_kospi")
+            st.number_input("KOSDAQ 외인 순매수 (억)", value=0, step=100, key="manual_kosdaq")
     
-    if st.button('🔄 데이터 새로고침'):
-        st.rerun()
+        if st.button('🔄 데이터 새로고침'):
+            st.rerun()
+        st.toggle("⚡ 장중 실시간 모드", key="intraday", help="1분봉 시세로 게이지와 위험도를 틱마다 갱신합니다.")
     
-    if st.session_state.api_key:
-        st.caption("AI 분석 모드가 활성화되었습니다.")
-    else:
-        st.info("ℹ️ 키가 없으면 기본 분석이 실행됩니다.")
-
-# --- 데이터 수집 함수 ---
-def get_weather(city="Daejeon"):
-    try:
-        url = f"https://wttr.in/{city}?format=%C+%t&_={int(time.time())}"
-        res = requests.get(url, timeout=2)
-        return res.text.strip() if res.status_code == 200 else "N/A"
-    except: return "N/A"
-
-# [수급 데이터] 수동 입력값 우선 적용 로직 추가
-def get_market_investors(market_code="KOSPI"):
-    headers = { 'User-Agent': 'Mozilla/5.0' }
-    result = 0
-    raw_val = "0"
+        with st.expander("📦 캐시 상태"):
+            cache_rows = [{"source": name, **counters} for name, counters in cache.stats().items()]
+            if cache_rows: st.dataframe(cache_rows, hide_index=True)
+            else: st.caption("아직 수집된 데이터가 없습니다.")
     
-    def parse_amount(text):
-        try: 
-            text = re.sub(r'[^\d\-]', '', text)
-            return int(text) if text else 0
-        except: return 0
-
-    # 1차 시도: 네이버 금융 메인 (장중 실시간)
-    try:
-        url = f"https://finance.naver.com/sise/sise_index.naver?code={market_code}"
-        res = requests.get(url, headers=headers, timeout=5)
-        soup = BeautifulSoup(res.content.decode('euc-kr', 'replace'), 'html.parser')
-        
-        # dl.lst_kos_info 구조 대응
-        dts = soup.select('.lst_kos_info dt')
-        dds = soup.select('.lst_kos_info dd')
-        
-        found = False
-        for dt, dd in zip(dts, dds):
-             if "외국인" in dt.text:
-                 raw_val = dd.select_one('span').text.strip()
-                 result = parse_amount(raw_val)
-                 found = True
-                 break
-
-    except Exception as e: pass
-
-    # 2차 시도: 값이 0이면 '일별 매매동향' 페이지 확인 (장 마감 후 확정치)
-    if result == 0:
-        try:
-            sosok = '0' if market_code == "KOSPI" else '1'
-            url_backup = f"https://finance.naver.com/sise/investor.naver?sosok={sosok}"
-            res_backup = requests.get(url_backup, headers=headers, timeout=5)
-            soup_backup = BeautifulSoup(res_backup.content.decode('euc-kr', 'replace'), 'html.parser')
-            
-            row = soup_backup.select_one('table.type_1 tr:nth-of-type(2)') 
-            if row:
-                cols = row.select('td')
-                if len(cols) >= 3:
-                    val_str_backup = cols[2].text.strip()
-                    parsed_val = parse_amount(val_str_backup)
-                    
-                    if parsed_val != 0:
-                        result = parsed_val
-                        raw_val = val_str_backup
-        except Exception as e: pass
-
-    return {"val": result, "str": raw_val}
-
-def get_economic_calendar():
-    calendar_data = []
-    try:
-        url = "https://sslecal2.forexprostools.com/?columns=exc_flags,exc_currency,exc_importance,exc_actual,exc_forecast,exc_previous&features=datepicker,timezone&countries=5&calType=day&timeZone=88&lang=18"
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        res = requests.get(url, headers=headers, timeout=5)
-        soup = BeautifulSoup(res.content, 'html.parser')
-        
-        table = soup.select_one('#economicCalendarData')
-        if not table: return []
-        
-        rows = table.select('tr')
-        for row in rows:
-            if not row.get('id', '').startswith('eventRowId'): continue
-            
-            time_str = row.select_one('.time').text.strip()
-            event_name = row.select_one('.event').text.strip()
-            sentiment_cell = row.select_one('.sentiment')
-            importance = 0
-            if sentiment_cell:
-                importance = len(sentiment_cell.select('.grayFullBullishIcon'))
-            
-            if importance >= 2 or any(k in event_name for k in ["GDP", "CPI", "PCE", "고용", "금리", "연준", "FOMC", "판매"]):
-                calendar_data.append({
-                    'time': time_str,
-                    'event': event_name,
-                    'importance': importance
-                })
-            
-    except Exception as e:
-        pass
-    return calendar_data
-
-def get_financial_news():
-    news = {"semi": []} 
-    headers = {'User-Agent': 'Mozilla/5.0'}
+        with st.expander("🩺 소스 상태"):
+            # 데몬이 수집 중이면 데몬 쪽 통계(스냅샷에 포함), 아니면 이 프로세스 통계
+            latest = load_latest()
+            health_stats = (latest or {}).get('health') or health.stats()
+            if health_stats:
+                st.dataframe([{"source": name, **row} for name, row in health_stats.items()], hide_index=True)
+            else: st.caption("아직 기록이 없습니다.")
     
-    try:
-        search_url = "https://finance.naver.com/news/news_search.naver?q=%B9%DD%B5%B5%C3%BC" 
-        res = requests.get(search_url, headers=headers, timeout=5)
-        soup = BeautifulSoup(res.content.decode('euc-kr', 'replace'), 'html.parser')
-        items = soup.select('.newsSchResult .newsList li dl')
-        
-        count = 0
-        for item in items:
-            at = item.select_one('.articleSubject a')
-            if at:
-                news["semi"].append({"title": at.text.strip(), "link": "https://finance.naver.com" + at['href']})
-                count += 1
-            if count >= 5: break
-    except: pass
-    
-    return news
-
-def get_all_data():
-    tickers = {
-        "tnx": "^TNX", "oil": "CL=F", "krw": "KRW=X",
-        "nas": "^IXIC", "sp5": "^GSPC", "sox": "^SOX",
-        "kospi": "^KS11", "kosdaq": "^KQ11",
-        "gold": "GC=F", "silver": "SI=F", "btc": "BTC-USD", "vix": "^VIX"
+        if st.session_state.api_key:
+            st.caption("AI 분석 모드가 활성화되었습니다.")
+            with st.expander("🤖 AI 모델 상태"):
+                st.dataframe([{"model": m, **s} for m, s in ai_analysis.breaker_stats(st.session_state.api_key).items()], hide_index=True)
+        else:
+            st.info("ℹ️ 키가 없으면 기본 분석이 실행됩니다.")
+
+    # --- 실행부 ---
+    # 섹션별 자동 새로고침 주기 (초). st.fragment가 타이머로 해당 섹션만 다시 실행하므로
+    # 페이지 전체(CSS 포함)를 다시 그리지 않고, 새로고침 사이에 스레드를 붙잡고 있지도 않음.
+    REFRESH_SECONDS = {
+        "header": 60,     # 날씨/시각/수집 상태
+        "market": 300,    # 지표 게이지, 위험도
+        "briefing": 300,  # 브리핑 (AI 분석 대기 중에는 AI_POLL_SECONDS 간격으로 확인)
+        "events": 600,    # 경제 일정, 뉴스
+        "intraday": 5,    # 장중 실시간 모드일 때 지표 게이지, 위험도
+        "watchlist": 300, # 관심 종목 히트맵
     }
-    data = {}
-    try:
-        for key, symbol in tickers.items():
-            df = yf.download(symbol, period="10d", progress=False) # 10일치로 늘려서 추세 확인
-            if len(df) < 2: df = pd.concat([df, df])
-            
-            # 최신값
-            curr = df['Close'].iloc[-1].item() if isinstance(df['Close'].iloc[-1], pd.Series) else df['Close'].iloc[-1]
-            # 전일값
-            prev = df['Close'].iloc[-2].item() if isinstance(df['Close'].iloc[-2], pd.Series) else df['Close'].iloc[-2]
-            
-            # 5일 최고가 (추세 확인용)
-            high_5d = df['Close'].iloc[-5:].max().item() if len(df) >= 5 else curr
-            
-            diff = curr - prev
-            pct = (diff / prev) * 100
-            
-            # 고점 대비 하락률 (Drawdown) - 양수로 변환 (예: 5% 하락이면 5.0)
-            dd = ((high_5d - curr) / high_5d) * 100 if high_5d > 0 else 0
-            
-            data[key] = {'val': curr, 'diff': diff, 'pct': pct, 'dd': dd}
-        return data, None
-    except Exception as e: return None, e
-
-# --- 기본 분석 알고리즘 ---
-def get_basic_report(m, inv_kospi, inv_kosdaq, score, news, calendar):
-    res = {"headline": "", "portfolio": ""}
-    
-    if score >= 70: res["headline"] = "🚨 [매우 위험] 현금 100% 확보 권장. 소나기는 피해야 합니다."
-    elif score >= 50: res["headline"] = "⚠️ [경계] 시장 변동성 확대. 방어적 포지션 및 헷지 필요."
-    elif score >= 30: res["headline"] = "⚖️ [혼조세] 방향성 탐색 구간. 주도주 위주의 선별적 접근."
-    else: res["headline"] = "⛅ [양호] 투자 심리 안정. 조정 시 매수 관점 유효."
-
-    top_issue = ""
-    if calendar:
-        sorted_cal = sorted(calendar, key=lambda x: (-x['importance'], x['time']))
-        top_event = sorted_cal[0]
-        top_issue = f"오늘밤 {top_event['event']} 발표"
-    elif news['semi']:
-        top_issue = news['semi'][0]['title']
-    
-    if top_issue:
-        if len(top_issue) > 35: top_issue = top_issue[:35] + "..."
-        res["headline"] += f"<br><span style='font-size:15px; color:#1565c0; font-weight:normal;'>📢 주요 이슈: {top_issue}</span>"
-
-    # [수정된 로직] 수치 나열 대신 전문적인 코멘트 생성
-    lines = []
-    
-    # 1. 대외 환경 (반도체/나스닥)
-    if m['sox']['pct'] > 1.0:
-        lines.append("🇺🇸 <b>대외 환경:</b> 간밤 美 필라델피아 반도체 지수의 강세는 국내 반도체 투심에 긍정적인 훈풍으로 작용할 전망입니다.")
-    elif m['sox']['pct'] < -1.0:
-        lines.append("🇺🇸 <b>대외 환경:</b> 美 반도체 지수 조정으로 인해 국내 기술주 전반에 차익 실현 매물 출회 가능성이 높습니다.")
-    else:
-        lines.append("🇺🇸 <b>대외 환경:</b> 글로벌 증시가 뚜렷한 방향성 없이 혼조세를 보이고 있어, 장 초반 눈치보기 장세가 예상됩니다.")
-
-    # 2. 수급 전망 (수치 대신 해석)
-    total_net = inv_kospi['val'] + inv_kosdaq['val']
-    if total_net > 500:
-        lines.append("💰 <b>수급 전망:</b> 외국인 투자자들의 의미 있는 유동성 유입이 포착되고 있어 지수 하방 경직성은 확보된 모습입니다.")
-    elif total_net < -500:
-        lines.append("💸 <b>수급 전망:</b> 외국인 매도 우위가 지속될 경우, 대형주 중심의 수급 공백이 발생할 수 있어 주의가 필요합니다.")
-    else:
-        # 데이터가 0이거나 미미할 때 자연스러운 문구
-        lines.append("👀 <b>수급 전망:</b> 아직 외국인의 뚜렷한 수급 방향이 결정되지 않았습니다. 장중 외국인 선물 및 현물 매매 동향을 예의주시해야 합니다.")
-
-    # 3. 대응 전략
-    if score >= 50:
-        lines.append("🛡️ <b>전략 가이드:</b> 리스크 관리가 최우선입니다. 추격 매수보다는 현금 비중을 유지하며 보수적으로 접근하십시오.")
-    elif score >= 30:
-        lines.append("⚖️ <b>전략 가이드:</b> 지수보다는 종목 장세가 예상됩니다. 실적 기반의 주도주(반도체/2차전지 등)로 압축 대응하는 것이 유리합니다.")
-    else:
-        lines.append("🚀 <b>전략 가이드:</b> 시장 에너지가 양호합니다. 조정 시 분할 매수 관점으로 접근하되, 외국인 수급이 쏠리는 섹터에 집중하십시오.")
-
-    res["portfolio"] = "<br><br>".join(lines)
-    return res
-
-# --- AI 분석 함수 ---
-def get_ai_portfolio_analysis(api_key, m, inv_kospi, inv_kosdaq, score, news_titles, calendar_str):
-    if not api_key: return None
-    
-    models = ["gemini-1.5-flash", "gemini-1.5-pro", "gemini-1.0-pro"]
-    headers = {'Content-Type': 'application/json'}
-    
-    prompt = f"""당신은 20년 경력의 펀드매니저입니다.
-    현재 자체 알고리즘으로 산출된 시장 위험도는 {score}점(100점 만점)입니다.
-    (점수가 높을수록 위험, 50점 이상이면 경계 단계)
-    
-    [핵심 지표]
-    - 미국채 10년물: {m['tnx']['val']:.2f}% (전일대비 {m['tnx']['diff']:.2f})
-    - 원/달러 환율: {m['krw']['val']:.0f}원
-    - 필라델피아 반도체: {m['sox']['pct']:.2f}% 등락 (고점 대비 {m['sox']['dd']:.1f}% 하락 중)
-    - 외국인 코스피: {inv_kospi['val']}억원
-    - 외국인 코스닥: {inv_kosdaq['val']}억원
-    
-    [오늘 주요 일정]
-    {calendar_str}
-    
-    [뉴스 헤드라인]
-    {news_titles}
-
-    위 데이터를 종합하여 투자 가이드를 JSON으로 작성해주세요.
-    말투는 간결하고 전문적으로(해요체).
-    JSON 키: "headline"(시장 총평, 이모지 포함), "portfolio"(구체적 전략, HTML 태그 사용 가능)
-    """
-    
-    last_error = ""
-    for model_name in models:
-        url = f"https://generativelanguage.googleapis.com/v1/models/{model_name}:generateContent?key={api_key}"
-        try:
-            res = requests.post(url, headers=headers, json={"contents": [{"parts": [{"text": prompt}]}]}, timeout=10)
-            if res.status_code == 200:
-                text = res.json()['candidates'][0]['content']['parts'][0]['text']
-                match = re.search(r'\{.*\}', text, re.DOTALL)
-                if match: return json.loads(match.group(0))
-            else:
-                last_error = f"{res.status_code}"
-                continue
-        except Exception as e:
-            last_error = str(e)
-            continue
-            
-    return {"error": f"AI 연결 실패. Error: {last_error}"}
-
-# --- 실행부 ---
-weather = get_weather()
-kst_now = datetime.utcnow() + timedelta(hours=9)
-st.markdown(f"""<div class="header-title">📊 위험도 분석 V0.65 (애널리스트 리포트)</div><div class="sub-info">📍 대전: {weather} | 🕒 {kst_now.strftime('%Y-%m-%d %H:%M')} (한국시간)</div>""", unsafe_allow_html=True)
-
-data, err = get_all_data()
-inv_kospi = get_market_investors("KOSPI")
-inv_kosdaq = get_market_investors("KOSDAQ")
-
-# [수정] 수동 입력값 우선 적용
-if 'manual_kospi' in locals() and manual_kospi != 0:
-    inv_kospi = {"val": manual_kospi, "str": f"{manual_kospi}억(수동)"}
-if 'manual_kosdaq' in locals() and manual_kosdaq != 0:
-    inv_kosdaq = {"val": manual_kosdaq, "str": f"{manual_kosdaq}억(수동)"}
-
-news = get_financial_news()
-calendar = get_economic_calendar() 
-
-if data:
-    def mini_gauge(title, d, min_v, max_v, mode='risk', unit='', url_key=None):
-        val = d['val']
-        pct = max(0, min(100, (val - min_v) / (max_v - min_v) * 100))
-        grad = "linear-gradient(90deg, #4CAF50 0%, #FFEB3B 50%, #F44336 100%)" if mode=='risk' else "linear-gradient(90deg, #2196F3 0%, #EEEEEE 50%, #F44336 100%)"
-        
-        display_title = title
-        if url_key and url_key in chart_urls:
-            display_title = f'<a href="{chart_urls[url_key]}" target="_blank" title="차트 보기">{title} <span style="font-size:10px;">🔗</span></a>'
-        
-        st.markdown(f"""<div class="mini-gauge-container"><div class="mini-gauge-title"><span>{display_title}</span><span>{val:,.2f}{unit} ({d['pct']:+.2f}%)</span></div><div class="mini-gauge-track" style="background:{grad}"><div class="mini-gauge-pointer" style="left:{pct}%"></div></div><div class="mini-gauge-labels"><span>{min_v}</span><span>{max_v}</span></div></div>""", unsafe_allow_html=True)
-
-    chart_urls = {
-        "tnx": "https://finance.yahoo.com/quote/%5ETNX", "oil": "https://finance.yahoo.com/quote/CL=F",
-        "krw": "https://finance.yahoo.com/quote/KRW=X", "nas": "https://finance.yahoo.com/quote/%5EIXIC",
-        "sp5": "https://finance.yahoo.com/quote/%5EGSPC", "sox": "https://finance.yahoo.com/quote/%5ESOX",
-        "kospi": "https://finance.yahoo.com/quote/%5EKS11", "kosdaq": "https://finance.yahoo.com/quote/%5EKQ11",
-        "gold": "https://finance.yahoo.com/quote/GC=F", "silver": "https://finance.yahoo.com/quote/SI=F",
-        "btc": "https://finance.yahoo.com/quote/BTC-USD", "vix": "https://finance.yahoo.com/quote/%5EVIX"
+    AI_POLL_SECONDS = 3
+
+    @st.cache_data(ttl=30, show_spinner=False)
+    def collect_snapshot():
+        # 데몬이 없을 때 직접 수집한 스냅샷을 잠깐 공유 -> 여러 fragment/세션이 각자 다시 수집하지 않음
+        return build_snapshot()
+
+    def load_snapshot():
+        # 수집 데몬(collector.py)이 저장한 최신 스냅샷을 읽기만 함.
+        # 데몬이 없거나 스냅샷이 오래됐으면 이 프로세스에서 직접 수집 (마감 안에 끝난 소스만 사용)
+        with metrics.span("snapshot.load"):
+            snapshot = load_latest(max_age=SNAPSHOT_MAX_AGE)
+        if snapshot: return snapshot
+        with metrics.span("snapshot.collect"):
+            return collect_snapshot()
+
+    def investor_inputs(snapshot):
+        # [수정] 수동 입력값 우선 적용 (사이드바 위젯 값은 fragment 재실행 때도 session_state로 읽음)
+        results = snapshot['results']
+        inv_kospi, inv_kosdaq, inv_missing = results['inv_kospi'], results['inv_kosdaq'], snapshot['inv_missing']
+        manual_kospi = st.session_state.get('manual_kospi', 0)
+        manual_kosdaq = st.session_state.get('manual_kosdaq', 0)
+        if manual_kospi != 0:
+            inv_kospi = {"val": manual_kospi, "str": f"{manual_kospi}억(수동)"}
+            inv_missing = False
+        if manual_kosdaq != 0:
+            inv_kosdaq = {"val": manual_kosdaq, "str": f"{manual_kosdaq}억(수동)"}
+            inv_missing = False
+        return inv_kospi, inv_kosdaq, inv_missing
+
+    def market_state(snapshot):
+        # 게이지/브리핑 fragment가 같이 쓰는 시세·수급·위험도
+        # 스냅샷에 저장된 위험도를 그대로 쓰고, 수동 수급 입력이 있을 때만 다시 계산 (risk.py)
+        results = snapshot['results']
+        data = results['market'] or {}
+        inv_kospi, inv_kosdaq, inv_missing = investor_inputs(snapshot)
+        risk_factors, risk_score = snapshot['risk_factors'], snapshot['risk_score']
+        if (inv_kospi, inv_kosdaq) != (results['inv_kospi'], results['inv_kosdaq']):
+            risk_factors, risk_score = compute_risk(data, inv_kospi, inv_kosdaq, inv_missing, results.get('flows'))
+        if st.session_state.get('intraday'):
+            # 장중 모드: 틱으로 갱신된 시세 게이지를 덮어쓰고, 시세 요인만 엔진 값으로 바꿔 점수 계산
+            engine, live = intraday_view()
+            data = {**data, **{k: {**data.get(k, {}), **g} for k, g in live.items()}}  # 게이지 범위(lo/hi)는 스냅샷 값 유지
+            risk_factors, risk_score = engine.risk(risk_factors)
+        return data, inv_kospi, inv_kosdaq, risk_factors, risk_score
+
+    def intraday_view():
+        # 엔진에서 이 세션이 마지막으로 본 버전 이후 바뀐 게이지만 받아 세션 사본에 합침
+        engine = intraday.start()
+        version, changed = engine.changes_since(st.session_state.get('intraday_version', 0))
+        live = st.session_state.setdefault('intraday_gauges', {})
+        live.update(changed)
+        st.session_state.intraday_version = version
+        return engine, live
+
+    # 게이지 키 -> (제목, 모드, 단위, 고정 범위). 범위가 없으면 히스토리에서 계산한 범위(d['lo'], d['hi'])를 씀
+    # 위험 게이지는 위험도 산정 구간을 그대로 줌. VIX(50) 상향, 자산 게이지는 히스토리 범위
+    GAUGES = {
+        "tnx": ("🇺🇸 국채 10년", 'risk', '%', (3.2, 4.8)),
+        "oil": ("🛢️ WTI 유가", 'risk', '$', (60, 90)),
+        "krw": ("🇰🇷 환율", 'risk', '원', (1300, 1500)),
+        "nas": ("🇺🇸 나스닥", 'stock', '', None),
+        "sp5": ("🇺🇸 S&P 500", 'stock', '', None),
+        "sox": ("💾 반도체(SOX)", 'stock', '', None),
+        "kospi": ("🇰🇷 코스피", 'stock', '', None),
+        "kosdaq": ("🇰🇷 코스닥", 'stock', '', None),
+        "gold": ("🟡 금(Gold)", 'stock', '$', None),
+        "silver": ("⚪ 은(Silver)", 'stock', '$', None),
+        "btc": ("₿ 비트코인", 'stock', '$', None),
+        "vix": ("😨 VIX(공포)", 'risk', '', (10, 50)),
     }
 
-    # 섹션 1: 주요 지표 현황
-    st.subheader("📈 주요 지표 현황")
-
-    # 1. 주요 거시 지표 (Macro)
-    st.markdown("##### 🌏 주요 거시 지표")
-    m1, m2, m3 = st.columns(3)
-    with m1: mini_gauge("🇺🇸 국채 10년", data['tnx'], 3.2, 4.8, 'risk', '%', 'tnx')
-    with m2: mini_gauge("🛢️ WTI 유가", data['oil'], 60, 90, 'risk', '$', 'oil')
-    with m3: mini_gauge("🇰🇷 환율", data['krw'], 1300, 1500, 'risk', '원', 'krw') 
-
-    # 2. 미국 증시 - 나스닥(30000), S&P(7500) 상향
-    st.markdown("##### 🇺🇸 미국 증시")
-    u1, u2, u3 = st.columns(3)
-    with u1: mini_gauge("🇺🇸 나스닥", data['nas'], 18000, 30000, 'stock', url_key='nas') # 범위 조정
-    with u2: mini_gauge("🇺🇸 S&P 500", data['sp5'], 5000, 7500, 'stock', url_key='sp5') # 범위 조정
-    with u3: mini_gauge("💾 반도체(SOX)", data['sox'], 5000, 10000, 'stock', url_key='sox') 
-
-    # 3. 한국 증시
-    st.markdown("##### 🇰🇷 한국 증시")
-    k1, k2, k3 = st.columns(3)
-    with k1: mini_gauge("🇰🇷 코스피", data['kospi'], 3000, 6000, 'stock', url_key='kospi')
-    with k2: mini_gauge("🇰🇷 코스닥", data['kosdaq'], 800, 1500, 'stock', url_key='kosdaq')
-    with k3:
-        # 코스피/코스닥 외국인 수급 표시
-        k_val = inv_kospi['str']
-        k_color = "#d32f2f" if inv_kospi['val'] < 0 else "#1565c0" 
-        kq_val = inv_kosdaq['str']
-        kq_color = "#d32f2f" if inv_kosdaq['val'] < 0 else "#1565c0"
-        
-        st.markdown(f"""
-        <div style="background:#f9f9f9; padding:15px; border-radius:10px; border:1px solid #ddd; margin-top:5px;">
-            <div style="display:flex; justify-content:space-between; margin-bottom:5px;">
-                <span style="font-size:13px; color:#333;"><b>코스피 外</b></span>
-                <span style="font-size:14px; font-weight:bold; color:{k_color};">{k_val}</span>
-            </div>
-            <div style="display:flex; justify-content:space-between;">
-                <span style="font-size:13px; color:#333;"><b>코스닥 外</b></span>
-                <span style="font-size:14px; font-weight:bold; color:{kq_color};">{kq_val}</span>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-
-    st.markdown("---")
-    
-    # 섹션 2: 대체 자산 & 공포지수 - 은(100), VIX(50) 상향
-    st.subheader("🛡️ 대체 자산 & 공포지수")
-    c7, c8, c9, c10 = st.columns(4)
-    with c7: mini_gauge("🟡 금(Gold)", data['gold'], 3000, 6000, 'stock', '$', 'gold') 
-    with c8: mini_gauge("⚪ 은(Silver)", data['silver'], 40, 100, 'stock', '$', 'silver') # 범위 조정
-    with c9: mini_gauge("₿ 비트코인", data['btc'], 40000, 120000, 'stock', '$', 'btc') 
-    with c10: mini_gauge("😨 VIX(공포)", data['vix'], 10, 50, 'risk', url_key='vix') # 범위 조정
-
-    # --- 위험도 산정 로직 강화 (V0.64: 종합 40~45 타겟팅) ---
-    def calc_r(v, min_v, max_v): return max(0, min(100, (v - min_v) / (max_v - min_v) * 100))
-    
-    # [수정 전략]
-    # 주가 상승(호재)이 위험도를 0으로 만드는 것을 방지하기 위해, 환율과 금리의 위험 비중을 대폭 높임.
-    # 현재: 환율(~1455원) -> 고위험 / 금리(TNX) -> 중위험 / 주가 -> 저위험(0)
-    # 목표: 이들을 섞어서 40점대가 나오게 하려면 환율과 금리 가중치가 주가의 3~4배가 되어야 함.
-    
-    sox_risk = max(calc_r(data['sox']['dd'], 0, 8), calc_r(-data['sox']['pct'], 0, 3))
-    mkt_risk = max(calc_r(data['kospi']['dd'], 0, 5), calc_r(-data['kospi']['pct'], 0, 2))
-
-    risk_factors = {
-        'tnx': calc_r(data['tnx']['val'], 3.2, 4.8),     # 3.2~4.8%
-        'oil': calc_r(data['oil']['val'], 65, 90),
-        'krw': calc_r(data['krw']['val'], 1300, 1500),   # 1300~1500 (1455면 약 77점)
-        'vix': calc_r(data['vix']['val'], 10, 30),       # [중요] 계산용 max는 30 유지 (50은 너무 널널함)
-        'sox': sox_risk,                                
-        'mkt': mkt_risk,                                
-        'inv': calc_r(-(inv_kospi['val'] + inv_kosdaq['val'])/10, 0, 500)
-    }
-    
-    # 가중치 재조정 (종합점수 40~45 목표)
-    weighted_score = (
-        risk_factors['tnx'] * 2.0 +     # 금리 압박 가중치 증가
-        risk_factors['oil'] * 0.5 +
-        risk_factors['krw'] * 3.5 +     # [핵심] 환율 가중치 3.5배 (시장 하락 방어 요인을 상쇄)
-        risk_factors['vix'] * 1.0 +
-        risk_factors['sox'] * 1.0 +     
-        risk_factors['mkt'] * 1.0 +
-        risk_factors['inv'] * 1.0    
-    ) / 10.0 # 총합
+    # 게이지 화면 배치 (제목 행 / 게이지 행 / 구분선). 'inv'는 외국인 수급 카드
+    MARKET_LAYOUT = [
+        {"h": "📈 주요 지표 현황", "lv": 3},
+        {"live": 1},
+        {"h": "🌏 주요 거시 지표", "lv": 5}, {"items": ["tnx", "oil", "krw"]},
+        {"h": "🇺🇸 미국 증시", "lv": 5}, {"items": ["nas", "sp5", "sox"]},
+        {"h": "🇰🇷 한국 증시", "lv": 5}, {"items": ["kospi", "kosdaq", "inv"]},
+        {"hr": 1},
+        {"h": "🛡️ 대체 자산 & 공포지수", "lv": 3}, {"items": ["gold", "silver", "btc", "vix"]},
+        {"score": 1},
+    ]
+
+    def gauge_value(d, fixed=None):
+        # 컴포넌트로 보낼 게이지 값 [현재가, 등락률, 최소, 최대] (표시 자릿수로 반올림 -> 의미 없는 변화는 diff에 안 잡힘)
+        # 해당 종목만 수집 실패면 현재가 None (고정 범위만 표시), 범위도 없으면 None
+        if not d: return [None, None, *fixed] if fixed else None
+        # 범위가 없는 예전 스냅샷이면 현재가 ±10%
+        lo, hi = fixed or (d.get('lo', d['val'] * 0.9), d.get('hi', d['val'] * 1.1))
+        return [round(d['val'], 2), round(d['pct'], 2), lo, hi]
+
+    @st.fragment(run_every=REFRESH_SECONDS["header"])
+    @metrics.traced("render.header")
+    def render_header():
+        snapshot = load_snapshot()
+        results, missing = snapshot['results'], snapshot['missing']
+        weather = results['weather']
+        kst_now = datetime.utcnow() + timedelta(hours=9)
+        st.markdown(f"""<div class="header-title">📊 위험도 분석 V0.65 (애널리스트 리포트)</div><div class="sub-info">📍 대전: {weather} | 🕒 {kst_now.strftime('%Y-%m-%d %H:%M')} (한국시간) | 데이터 기준 {snapshot['kst'][11:16]}</div>""", unsafe_allow_html=True)
+        if missing:
+            st.caption("⏳ 수집 지연/실패: " + ", ".join(f"{k}({v})" for k, v in missing.items()))
+
+    @metrics.traced("render.market")
+    def render_market():
+        data, inv_kospi, inv_kosdaq, risk_factors, risk_score = market_state(load_snapshot())
+
+        live = st.session_state.get('intraday_gauges') if st.session_state.get('intraday') else None
+        live_caption = ""
+        if live:
+            live_caption = f"⚡ 실시간 {len(live)}개 지표 | 마지막 틱 {max(g['ts'] for g in live.values())[11:19]}"
+        elif live is not None:
+            live_caption = "⚡ 실시간 시세 대기 중..."
+
+        # 위험도 색상 표시
+        score_color = "#4CAF50" # Green
+        if risk_score >= 70: score_color = "#D32F2F" # Red
+        elif risk_score >= 50: score_color = "#FF9800" # Orange
+        elif risk_score >= 30: score_color = "#FFC107" # Yellow
+
+        # 게이지 12개 + 수급 카드 + 위험도 막대를 컴포넌트 하나로 (바뀐 값만 전송)
+        dashboard.render("market", {
+            "layout": MARKET_LAYOUT,
+            "meta": {k: [title, chart_url(TICKERS[k]), mode[0], unit] for k, (title, mode, unit, _) in GAUGES.items()},
+            "g": {k: gauge_value(data.get(k), fixed) for k, (_, _, _, fixed) in GAUGES.items()},
+            # 코스피/코스닥 외국인 수급 표시
+            "inv": [["코스피 外", inv_kospi['str'], inv_kospi['val']], ["코스닥 外", inv_kosdaq['str'], inv_kosdaq['val']]],
+            "live": live_caption,
+            "score": {
+                "n": risk_score, "color": score_color, "title": f"📊 종합 시장 위험도: : {risk_score}점",
+                "warn": "위험도 산정에 필요한 데이터를 하나도 수집하지 못했습니다." if all(v is None for v in risk_factors.values()) else "",
+            },
+        }, key="dashboard_market")
+
+    @metrics.traced("render.briefing")
+    def render_briefing():
+        # 기본 분석을 바로 그리고, AI 분석은 백그라운드에서 끝나면 다음 확인 때 교체
+        snapshot = load_snapshot()
+        results = snapshot['results']
+        data, inv_kospi, inv_kosdaq, risk_factors, risk_score = market_state(snapshot)
+        news, calendar = results['news'], results['calendar']
+
+        # --- 보고서 출력 ---
+        news_summary, calendar_str = briefing_inputs(news, calendar)
     
-    risk_score = int(weighted_score)
+        status, ai_report = ai_analysis.request_analysis(st.session_state.api_key, data, inv_kospi, inv_kosdaq, risk_score, news_summary, calendar_str)
+        was_pending = st.session_state.get('ai_pending', False)
+        st.session_state.ai_pending = status == "pending"
+
+        mode_label = "🤖 AI 애널리스트" if status == "ready" else "⚙️ 기본 분석 엔진"
+        if status != "ready": 
+            error_msg = ai_report if status == "error" else ""
+            ai_report = get_basic_report(data, inv_kospi, inv_kosdaq, risk_score, news, calendar)
+            if status == "error": st.error(f"AI 연결 실패 ({error_msg}). 기본 분석 모드로 전환합니다.") 
+            if status == "pending": st.caption("🤖 AI 브리핑 생성 중... 완료되면 자동으로 교체됩니다.")
     
-    # 위험도 색상 표시
-    score_color = "#4CAF50" # Green
-    if risk_score >= 70: score_color = "#D32F2F" # Red
-    elif risk_score >= 50: score_color = "#FF9800" # Orange
-    elif risk_score >= 30: score_color = "#FFC107" # Yellow
-    
-    st.subheader(f"📊 종합 시장 위험도: : {risk_score}점")
-    st.markdown(f"""
-    <div style="width:100%; height:20px; background:#eee; border-radius:10px; margin-bottom:10px;">
-        <div style="width:{risk_score}%; height:100%; background:{score_color}; border-radius:10px; transition:1s;"></div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # --- 보고서 출력 ---
-    news_summary = " / ".join([n['title'] for n in news['semi'][:3]])
-    calendar_str = "\n".join([f"{c['time']} {c['event']} (★{c['importance']})" for c in calendar])
-    
-    ai_report = get_ai_portfolio_analysis(st.session_state.api_key, data, inv_kospi, inv_kosdaq, risk_score, news_summary, calendar_str)
-    
-    is_error = False
-    error_msg = ""
-    if ai_report and "error" in ai_report:
-        is_error = True
-        error_msg = ai_report['error']
-        ai_report = None
-
-    mode_label = "🤖 AI 애널리스트" if ai_report else "⚙️ 기본 분석 엔진"
-    if not ai_report: 
-        ai_report = get_basic_report(data, inv_kospi, inv_kosdaq, risk_score, news, calendar)
-        if is_error: st.error(f"AI 연결 실패 ({error_msg}). 기본 분석 모드로 전환합니다.") 
-    
-    st.markdown(f"""
+        st.markdown(f"""
     <div class="guide-box">
         <div class="guide-header">📊 {mode_label} 브리핑</div>
         <div class="guide-section-title">1. 시장 총평</div>
@@ -504,31 +281,123 @@ if data:
     </div>
     """, unsafe_allow_html=True)
 
-    st.markdown("---")
-    n1, n2 = st.columns(2)
-    with n1:
-        st.markdown("### 🇺🇸 오늘 주요 경제 일정 (미국)")
-        st.caption("📅 [전체 일정 보기](https://kr.investing.com/economic-calendar/) (Investing.com)")
-        
-        if not calendar:
-            st.info("오늘 예정된 주요 미국 경제 지표 발표가 없거나 데이터를 가져오지 못했습니다.")
+        # 대기 상태가 바뀌면 앱 전체를 한 번 다시 실행해서 확인 주기(AI_POLL_SECONDS <-> 일반)를 바꿈
+        if was_pending != st.session_state.ai_pending:
+            st.rerun()
+
+    @st.fragment(run_every=REFRESH_SECONDS["events"])
+    @metrics.traced("render.events")
+    def render_events():
+        results = load_snapshot()['results']
+        news, calendar = results['news'], results['calendar']
+
+        # 일정/뉴스 목록도 같은 컴포넌트로 (뉴스는 섹터별 최신 기사를 한 목록으로, 중복 기사는 수집 단계에서 합쳐져 'N곳'으로 표시)
+        items = sorted(((sector, n) for sector, items in news.items() for n in items), key=lambda x: x[1].get('date', ''), reverse=True)
+        dashboard.render("events", {
+            "text": {
+                "cal_h": "🇺🇸 오늘 주요 경제 일정 (미국)",
+                "cal_link": "https://kr.investing.com/economic-calendar/",
+                "cal_empty": "오늘 예정된 주요 미국 경제 지표 발표가 없거나 데이터를 가져오지 못했습니다.",
+                "news_h": "🇰🇷 국내 시장 뉴스",
+                "news_empty": "관련된 최신 뉴스가 없습니다.",
+            },
+            "cal": [[e['time'], e['event'], e['importance']] for e in sorted(calendar, key=lambda x: x['time'])],
+            "news": [[news_feed.SECTOR_LABELS.get(sector, sector), n['title'], n['link'], n.get('count', 1)] for sector, n in items[:NEWS_ITEMS]],
+        }, key="dashboard_events")
+
+    render_header()
+    # 장중 실시간 모드에서는 게이지 섹션만 짧은 주기로 다시 그림
+    market_every = REFRESH_SECONDS["intraday"] if st.session_state.get('intraday') else REFRESH_SECONDS["market"]
+    st.fragment(render_market, run_every=market_every)()
+    # AI 분석 대기 중일 때만 짧은 주기로 확인, 평소에는 일반 주기
+    briefing_every = AI_POLL_SECONDS if st.session_state.get('ai_pending') else REFRESH_SECONDS["briefing"]
+    st.fragment(render_briefing, run_every=briefing_every)()
+    render_events()
+
+    # --- 관심 종목 ---
+    # 수백 개 종목을 한 번에: 청크 병렬 수집 + 벡터 지표 계산, 히트맵과 정렬 가능한 표로 표시 (watchlist.py)
+    @st.fragment(run_every=REFRESH_SECONDS["watchlist"])
+    @metrics.traced("render.watchlist")
+    def render_watchlist():
+        lists = watchlist.load_watchlists()
+        w1, w2 = st.columns([2, 1])
+        name = w1.selectbox("목록", [*lists, "직접 입력"], key="watchlist_name")
+        sort_label = w2.selectbox("히트맵 정렬", list(watchlist.SORT_COLUMNS), key="watchlist_sort")
+        if name == "직접 입력":
+            labels = watchlist.parse_symbols(st.text_area(f"심볼 (쉼표/줄바꿈 구분, 최대 {watchlist.MAX_SYMBOLS}개)", key="watchlist_custom"))
+            s1, s2 = st.columns([2, 1])
+            new_name = s1.text_input("저장할 목록 이름", key="watchlist_new_name")
+            if s2.button("💾 목록 저장", disabled=not (labels and new_name)):
+                watchlist.save_watchlist(new_name, labels)
+                st.success(f"'{new_name}' 저장됨 ({len(labels)}개)")
         else:
-            sorted_cal = sorted(calendar, key=lambda x: x['time'])
-            for event in sorted_cal:
-                stars = "★" * event['importance']
-                st.markdown(f"""
-                <div class="news-item">
-                    <span class="cal-badge">Event</span>
-                    <span class="cal-time">{event['time']}</span>
-                    <span class="news-title">{event['event']}</span>
-                    <span class="cal-star">{stars}</span>
-                </div>
-                """, unsafe_allow_html=True)
-                
-    with n2:
-        st.markdown("### 🇰🇷 국내 반도체(Semi) 뉴스")
-        if not news['semi']: st.info("관련된 최신 뉴스가 없습니다.")
-        for n in news['semi']: st.markdown(f"""<div class="news-item"><span class="semi-badge">Chip</span><a href="{n['link']}" target="_blank" class="news-title">{n['title']}</a></div>""", unsafe_allow_html=True)
-
-time.sleep(300)
-st.rerun()
+            labels = lists[name]
+        if not labels:
+            st.info("종목을 입력하세요.")
+            return
+
+        table = watchlist.table(list(labels))
+        if table.empty:
+            st.info("시세를 가져오지 못했습니다.")
+            return
+        missing = len(labels) - len(table)
+        st.caption(f"{len(table)}개 종목" + (f" | {missing}개 수집 실패" if missing else "") + " | 표의 열 제목을 누르면 정렬됩니다.")
+        st.plotly_chart(watchlist.heatmap(table, labels, watchlist.SORT_COLUMNS[sort_label]), use_container_width=True)
+        st.dataframe(
+            watchlist.display_rows(table, labels), hide_index=True, use_container_width=True,
+            column_config={
+                "현재가": st.column_config.NumberColumn(format="%.2f"),
+                "등락률": st.column_config.NumberColumn("등락률(%)", format="%+.2f"),
+                **{col: st.column_config.NumberColumn(f"{col} 고점대비(%)", format="%.1f") for col in ("5일", "20일", "60일", "200일")},
+                "위치": st.column_config.ProgressColumn("범위 내 위치", min_value=0, max_value=100, format="%.0f"),
+                "차트": st.column_config.LinkColumn("차트", display_text="🔗"),
+            },
+        )
+
+    with st.expander("📋 관심 종목 히트맵"):
+        if st.toggle("관심 종목 불러오기", key="show_watchlist"):
+            render_watchlist()
+
+    # --- 외국인 순매수 추이 ---
+    # 저장소(flow_history)에 쌓인 일별 값만 읽음. 새 날짜 수집은 'flows' 소스가 TTL마다 증분으로 함
+    with st.expander("💹 외국인 순매수 추이"):
+        if st.toggle("수급 히스토리 보기", key="show_flows"):
+            flows = flow_history.history()
+            if flows.empty:
+                st.info("저장된 수급 히스토리가 없습니다. `python flow_history.py`로 먼저 받아 두세요.")
+            else:
+                market = st.radio("시장", ["합계", *flow_history.MARKETS], horizontal=True, key="flows_market")
+                column = "total" if market == "합계" else market
+                st.plotly_chart(flow_history.plot_flows(flows, column), use_container_width=True)
+                latest = {k: v.dropna() for k, v in flow_history.rolling_sums(flows[column].dropna()).items()}
+                st.caption(f"{len(flows)}거래일 ({flows.index.min():%Y-%m-%d} ~ {flows.index.max():%Y-%m-%d}) | "
+                           + " | ".join(f"{k[3:]}일 누적 {v.iloc[-1]:+,.0f}억" for k, v in latest.items() if len(v)))
+
+    # --- 위험도 히스토리 (가중치 검증) ---
+    # 로컬 가격 히스토리 전체를 한 번의 벡터 연산으로 점수화 -> 가중치를 바꿔 과거 하락 구간과 바로 비교
+    with st.expander("📉 위험도 히스토리 (가중치 검증)"):
+        if st.toggle("과거 위험도 계산", key="show_risk_history"):
+            w_cols = st.columns(len(RISK_WEIGHTS))
+            weights = {k: col.number_input(k, value=w, step=0.5, key=f"weight_{k}") for col, (k, w) in zip(w_cols, RISK_WEIGHTS.items())}
+            scores, kospi = backfill(weights=weights, extend=False)
+            if scores.empty:
+                st.info("로컬 가격 히스토리가 없습니다. `python risk.py --years 5`로 먼저 받아 두세요.")
+            else:
+                st.plotly_chart(plot_risk_history(scores, kospi), use_container_width=True)
+                if kospi is not None:
+                    ev = evaluate(scores, kospi)
+                    st.caption(f"{ev['days']}일 | 평균 위험도 {ev['mean_score']} | 이후 20거래일 KOSPI 최대 하락폭과의 상관 {ev['corr_fwd_dd']}")
+finally:
+    # st.rerun()(새로고침 버튼, AI 분석 대기)이나 오류로 중간에 멈춘 실행도 trace를 닫음
+    page_trace = metrics.end(page_run)
+
+# --- 실행 trace (디버그) ---
+# 이번 실행의 단계별 소요 시간. 전체 지표는 /metrics (Prometheus), 최근 trace는 /traces
+with st.sidebar.expander("⏱️ 이번 실행 trace"):
+    st.caption(f"trace {page_trace.id} | 전체 {page_trace.total_ms:.0f}ms")
+    if page_trace.sizes:
+        st.caption("보낸 데이터: " + ", ".join(f"{k} {v:,}B" for k, v in page_trace.sizes.items()))
+    st.dataframe(
+        [{"단계": s["name"], "ms": s["ms"], "스레드": s["thread"], "오류": s["error"]} for s in page_trace.spans],
+        hide_index=True, use_container_width=True,
+    )
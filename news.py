@@ -0,0 +1,178 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, quote, urlsplit
+
+import http_client
+import metrics
+import parsing
+
+# --- 뉴스 수집 (여러 키워드, 증분, 중복 제거) ---
+# 섹터별 키워드를 동시에 검색하고, 프로세스 공용 윈도(최근 WINDOW_SIZE건 / WINDOW_HOURS시간)에 쌓아 둠.
+# - 증분: 결과 목록 부분이 지난번과 같으면(해시) 파싱 생략, 다르면 위에서부터 이미 본 기사에서 멈춤
+# - 중복 제거: 정규화한 제목의 문자 2-gram 집합을 지문으로, 짧은 쪽 기준 DUP_OVERLAP 이상 겹치면 같은 기사로 합침
+#   (말머리/꼬리말만 다른 제목도 잡힘. 정규화 제목이 완전히 같으면 사전 조회 한 번으로 끝)
+#   (여러 키워드/언론사에 걸친 같은 소식은 한 건 + count로 남음 -> 많이 다뤄진 소식을 주요 이슈로)
+# - 윈도 밖으로 밀려난 기사는 '이미 본 기사' 목록에서도 빠지므로 메모리는 윈도 크기로 고정
+# 키워드 설정: MORNING_NEWS_KEYWORDS="semi=반도체,HBM;macro=환율,금리" (섹터=키워드,...;...)
+
+DEFAULT_KEYWORDS = {
+    "semi": ["반도체", "HBM", "파운드리"],
+    "battery": ["2차전지"],
+    "macro": ["환율", "금리", "FOMC"],
+    "flow": ["외국인 순매수"],
+}
+SECTOR_LABELS = {"semi": "Chip", "battery": "Battery", "macro": "Macro", "flow": "Flow"}
+
+WINDOW_SIZE = 200     # 보관할 기사 수 (중복 합친 뒤 기준)
+WINDOW_HOURS = 24     # 이보다 오래 전에 받은 기사는 버림
+PER_SECTOR = 10       # 섹터별로 내보내는 기사 수
+DUP_OVERLAP = 0.9     # 두 제목 지문이 짧은 쪽 기준으로 이만큼 겹치면 같은 기사
+FETCH_WORKERS = 8
+KEYS_PER_KEYWORD = 40  # 키워드별로 기억하는 최근 기사 키 수 (검색 결과 한 페이지보다 넉넉하게)
+
+def parse_keywords(text):
+    # "semi=반도체,HBM;macro=환율" -> {"semi": ["반도체", "HBM"], "macro": ["환율"]}
+    out = {}
+    for part in (text or "").split(";"):
+        sector, _, words = part.partition("=")
+        words = [w.strip() for w in words.split(",") if w.strip()]
+        if sector.strip() and words: out[sector.strip()] = words
+    return out
+
+KEYWORDS = parse_keywords(os.environ.get("MORNING_NEWS_KEYWORDS")) or DEFAULT_KEYWORDS
+
+# --- 지문 ---
+_BRACKETS = re.compile(r"\[[^\]]*\]|\([^)]*\)|【[^】]*】|<[^>]*>")
+_NOISE = re.compile(r"[^\w]+")
+
+def normalize_title(title):
+    # [속보], (종합), 말머리·문장부호·공백을 빼고 소문자로 -> 같은 소식의 변형 제목이 같은 문자열에 가까워짐
+    return _NOISE.sub("", _BRACKETS.sub("", title)).lower()
+
+def fingerprint(title):
+    # 정규화한 제목의 문자 2-gram 집합
+    text = normalize_title(title)
+    return frozenset(text[i:i + 2] for i in range(max(1, len(text) - 1)))
+
+def similar(a, b, threshold=DUP_OVERLAP):
+    # 짧은 쪽 지문 대비 겹친 비율 (한쪽에만 붙은 말머리/꼬리말에 덜 민감)
+    return bool(a and b) and len(a & b) / min(len(a), len(b)) >= threshold
+
+def article_key(href):
+    # 언론사 + 기사 번호 (같은 기사가 다른 검색 결과에 다시 나와도 같은 키)
+    q = parse_qs(urlsplit(href).query)
+    office, article = q.get("office_id", [""])[0], q.get("article_id", [""])[0]
+    return f"{office}:{article}" if article else href
+
+
+class NewsWindow:
+    def __init__(self, keywords=KEYWORDS, size=WINDOW_SIZE, hours=WINDOW_HOURS):
+        self.keywords, self.size, self.max_age = keywords, size, hours * 3600
+        self.items = OrderedDict()   # 대표 기사 키 -> 기사 dict (받은 순서)
+        self._seen = {}              # 기사 키 -> 대표 기사 키 (합쳐진 기사 포함)
+        self._titles = {}            # 정규화 제목 -> 대표 기사 키
+        self._pages = {}             # 키워드 -> (지난번 결과 목록 해시, 최근 기사 키 목록 (최신이 앞))
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="news")
+        self.stats = {"fetched": 0, "unchanged": 0, "new": 0, "merged": 0}
+
+    def _fetch(self, keyword):
+        # 반환: 새 기사 [(제목, href, 언론사, 날짜), ...] (목록이 그대로면 빈 리스트)
+        url = f"https://finance.naver.com/news/news_search.naver?q={quote(keyword.encode('euc-kr'))}"
+        res = http_client.get(url, timeout=5)
+        with metrics.span("parse.news"):
+            block = parsing.news_block(res.content.decode('euc-kr', 'replace'))
+            digest = hashlib.blake2b(block.encode(), digest_size=16).digest()
+            with self._lock:
+                last_digest, last_keys = self._pages.get(keyword, (None, []))
+            if digest == last_digest:
+                with self._lock:
+                    self.stats["unchanged"] += 1
+                return []
+            stop, new = set(last_keys), []
+            for entry in parsing.iter_news_entries(block):
+                if article_key(entry[1]) in stop: break  # 여기부터는 이 키워드로 지난번에 본 기사
+                new.append(entry)
+        with self._lock:
+            self._pages[keyword] = (digest, ([article_key(e[1]) for e in new] + last_keys)[:KEYS_PER_KEYWORD])
+        return new
+
+    def _add(self, sector, keyword, entry, now):
+        # 호출 쪽에서 self._lock을 잡고 있음
+        title, href, press, wdate = entry
+        key = article_key(href)
+        if key in self._seen:
+            # 같은 기사가 다른 키워드로도 검색됨 -> 키워드만 추가
+            item = self.items.get(self._seen[key])
+            if item and keyword not in item["keywords"]: item["keywords"].append(keyword)
+            return
+        norm, fp = normalize_title(title), fingerprint(title)
+        same = self.items.get(self._titles.get(norm))
+        for item in [same] if same else self.items.values():
+            if same or similar(fp, item["fp"]):
+                # 다른 언론사/기사 번호의 같은 소식 -> 한 건으로 합치고 몇 곳에서 다뤘는지만 셈
+                item["count"] += 1
+                if keyword not in item["keywords"]: item["keywords"].append(keyword)
+                self._seen[key] = item["key"]
+                self.stats["merged"] += 1
+                return
+        self.items[key] = {
+            "key": key, "title": title, "link": "https://finance.naver.com" + href, "press": press, "date": wdate,
+            "sector": sector, "keywords": [keyword], "count": 1, "fp": fp, "seen_at": now,
+        }
+        self._seen[key] = self._titles[norm] = key
+        self.stats["new"] += 1
+
+    def _prune(self, now):
+        # 오래됐거나 WINDOW_SIZE를 넘친 기사를 앞(먼저 받은 것)부터 버리고, 그 기사에 합쳐졌던 키도 같이 지움
+        dropped = set()
+        while self.items:
+            key, item = next(iter(self.items.items()))
+            if len(self.items) <= self.size and now - item["seen_at"] <= self.max_age: break
+            self.items.popitem(last=False)
+            dropped.add(key)
+        if dropped:
+            self._seen = {k: v for k, v in self._seen.items() if v not in dropped}
+            self._titles = {k: v for k, v in self._titles.items() if v not in dropped}
+
+    def refresh(self):
+        # 모든 키워드를 동시에 받아 윈도에 반영. 실패한 키워드는 건너뜀 (다음 갱신 때 다시)
+        pairs = [(sector, kw) for sector, words in self.keywords.items() for kw in words]
+        futures = [(sector, kw, self._pool.submit(self._fetch, kw)) for sector, kw in pairs]
+        now = time.time()
+        fetched = {}
+        for sector, kw, fut in futures:
+            try:
+                fetched[(sector, kw)] = fut.result()
+            except Exception:
+                metrics.count_error(f"news.{kw}")
+        with self._lock:
+            self.stats["fetched"] += len(fetched)
+            # 각 키워드 목록은 최신이 위 -> 오래된 것부터 넣어야 윈도 순서가 받은 시각 순서와 맞음
+            for (sector, kw), entries in fetched.items():
+                for entry in reversed(entries):
+                    self._add(sector, kw, entry, now)
+            self._prune(now)
+        if not fetched: raise RuntimeError("뉴스 검색 전부 실패")
+        return self.snapshot()
+
+    def snapshot(self, per_sector=PER_SECTOR):
+        # {섹터: [기사, ...]} 최신 날짜순, JSON으로 저장 가능한 필드만 (스냅샷/프롬프트용)
+        with self._lock:
+            items = list(self.items.values())
+        out = {sector: [] for sector in self.keywords}
+        for item in sorted(items, key=lambda x: (x["date"], x["seen_at"]), reverse=True):
+            bucket = out.setdefault(item["sector"], [])
+            if len(bucket) < per_sector:
+                bucket.append({**{k: item[k] for k in ("title", "link", "press", "date", "count")},
+                               "sector": item["sector"], "keywords": list(item["keywords"])})
+        return out
+
+
+# 프로세스 공용 윈도 (수집 데몬/페이지가 각자 한 번만 만듦)
+window = NewsWindow()
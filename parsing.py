@@ -0,0 +1,107 @@
+import io
+import re
+
+from lxml import etree, html as lxml_html
+
+# --- HTML 파싱 ---
+# 페이지 전체를 BeautifulSoup(html.parser) 트리로 만드는 대신:
+# 1) 필요한 영역의 시작/끝 표식으로 문자열을 먼저 잘라내고 그 조각만 lxml(C 파서)로 파싱
+# 2) 표식을 못 찾으면(레이아웃 변경) 페이지 전체를 lxml로 파싱해서 같은 XPath로 찾음
+# 3) 경제 일정 표는 iterparse로 <tr> 단위 스트림 처리 후 바로 메모리 해제
+# 기존 방식과 결과 비교: python bench/bench_parse.py
+
+def _cls(name):
+    # CSS 클래스 선택자(.name)와 같은 XPath 조건
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+def _fragment(text, start, end):
+    # text에서 start 표식이 들어있는 태그부터 그 뒤 첫 end까지를 잘라 lxml 트리로 만듦. 못 찾으면 전체 파싱
+    i = text.find(start)
+    if i >= 0:
+        i = text.rfind("<", 0, i)
+        j = text.find(end, i)
+        if i >= 0 and j >= 0:
+            return lxml_html.fragment_fromstring(text[i:j + len(end)], create_parent="div")
+    return lxml_html.document_fromstring(text)
+
+def _text(el):
+    return "".join(el.itertext()).strip() if el is not None else ""
+
+def parse_amount(text):
+    # 금액 문자열('+3,214억', '-2,187')에서 부호와 숫자만 남겨 정수로. 숫자가 없으면 0
+    try:
+        text = re.sub(r'[^\d\-]', '', text)
+        return int(text) if text else 0
+    except: return 0
+
+def parse_index_foreign(text):
+    # 네이버 sise_index: dl.lst_kos_info의 dt/dd 쌍에서 '외국인' 금액 문자열. 없으면 None
+    root = _fragment(text, 'lst_kos_info', '</dl>')
+    dts = root.xpath(f".//*[{_cls('lst_kos_info')}]//dt")
+    dds = root.xpath(f".//*[{_cls('lst_kos_info')}]//dd")
+    for dt, dd in zip(dts, dds):
+        if "외국인" in _text(dt):
+            span = dd.find(".//span")
+            return _text(span) if span is not None else None
+    return None
+
+def parse_daily_foreign(text):
+    # 네이버 investor.naver: table.type_1의 두 번째 행, 세 번째 칸(외국인). 없으면 None
+    root = _fragment(text, 'class="type_1"', '</table>')
+    rows = root.xpath(f".//table[{_cls('type_1')}]//tr[2]")
+    if not rows: return None
+    cols = rows[0].findall("td")
+    return _text(cols[2]) if len(cols) >= 3 else None
+
+def parse_daily_flows(text):
+    # 네이버 investor.naver 한 페이지의 모든 날짜 행: [(날짜 'YY.MM.DD', 외국인 금액 문자열), ...] (위가 최근)
+    root = _fragment(text, 'class="type_1"', '</table>')
+    out = []
+    for row in root.xpath(f".//table[{_cls('type_1')}]//tr[td]"):
+        cols = row.findall("td")
+        if len(cols) >= 3 and _text(cols[0]):
+            out.append((_text(cols[0]), _text(cols[2])))
+    return out
+
+def iter_calendar_rows(content):
+    # forexprostools 경제 일정: eventRowId* 행을 하나씩 스트림으로 내보냄 (time, event, importance)
+    i = content.find(b'economicCalendarData')
+    if i >= 0:
+        i = content.rfind(b"<", 0, i)
+        j = content.find(b"</table>", i)
+        if i >= 0 and j >= 0: content = content[i:j + len(b"</table>")]
+    for _, tr in etree.iterparse(io.BytesIO(content), events=("end",), tag="tr", html=True, encoding="utf-8"):
+        if tr.get("id", "").startswith("eventRowId"):
+            time_cell = tr.xpath(f".//*[{_cls('time')}]")
+            event_cell = tr.xpath(f".//*[{_cls('event')}]")
+            sentiment = tr.xpath(f".//*[{_cls('sentiment')}]")
+            importance = len(sentiment[0].xpath(f".//*[{_cls('grayFullBullishIcon')}]")) if sentiment else 0
+            yield {
+                "time": _text(time_cell[0]) if time_cell else "",
+                "event": _text(event_cell[0]) if event_cell else "",
+                "importance": importance,
+            }
+        # 처리한 행과 이미 지나간 형제 노드를 바로 해제해서 메모리에 표 전체가 쌓이지 않게 함
+        tr.clear()
+        parent = tr.getparent()
+        if parent is not None:
+            while tr.getprevious() is not None:
+                del parent[0]
+
+def news_block(text):
+    # 뉴스 검색 결과 목록(.newsSchResult ~ 첫 </ul>)만 잘라낸 문자열. 못 찾으면 전체 (바뀌었는지 해시로 비교하는 대상)
+    i = text.find('newsSchResult')
+    i = text.rfind("<", 0, i) if i >= 0 else -1
+    j = text.find('</ul>', i) if i >= 0 else -1
+    return text[i:j + len('</ul>')] if i >= 0 and j >= 0 else text
+
+def iter_news_entries(block):
+    # news_block() 결과에서 기사를 위(최신)부터 하나씩: (제목, href, 언론사, 'YYYY-MM-DD HH:MM')
+    # 호출 쪽이 이미 본 기사에서 멈추면 나머지 기사는 처리하지 않음
+    root = _fragment(block, 'newsSchResult', '</ul>')
+    for dl in root.xpath(f".//*[{_cls('newsList')}]//li//dl"):
+        a = dl.xpath(f".//*[{_cls('articleSubject')}]//a[@href]")
+        if not a: continue
+        press = dl.xpath(f".//*[{_cls('press')}]")
+        wdate = dl.xpath(f".//*[{_cls('wdate')}]")
+        yield _text(a[0]), a[0].get("href"), _text(press[0]) if press else "", _text(wdate[0]) if wdate else ""
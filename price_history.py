@@ -0,0 +1,182 @@
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import metrics
+
+# --- 로컬 가격 히스토리 저장소 ---
+# pandas/yfinance는 import가 무거워서(약 0.5초) 실제로 쓰는 함수 안에서만 import (cli.py 빠른 시작용)
+# 종목별 일봉(OHLCV)을 .npy 파일(구조화 배열)로 보관하고 np.load(mmap_mode='r')로 읽음.
+# 갱신할 때는 마지막 저장 봉 이후만 받아서 붙임. 마지막 봉은 장중에 값이 바뀌므로 항상 다시 받아 덮어씀.
+# -> 매번 10일치를 통째로 받던 것과 달리 요청당 1~2개 봉만 전송되고, 20/60/200일 지표도 추가 비용 없음.
+
+HISTORY_DIR = os.environ.get(
+    "MORNING_HISTORY_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "price_history"),
+)
+INITIAL_PERIOD = "1y"  # 처음 보는 종목은 1년치(약 250봉)로 시작 -> 200일 지표까지 커버
+LAGGARD_DAYS = 7       # 마지막 봉이 최신 종목보다 이만큼 넘게 뒤처지면 따로 받음
+DOWNLOAD_CHUNK = 50    # 한 번의 yf.download 요청에 묶는 최대 종목 수
+DOWNLOAD_WORKERS = 16  # 동시에 받는 청크 수 = 최대 동시 요청 수 (300종목이면 50개씩 6청크, 증분 갱신 기준 수 초)
+
+BAR_DTYPE = np.dtype([
+    ('date', 'datetime64[D]'),
+    ('open', 'f8'), ('high', 'f8'), ('low', 'f8'), ('close', 'f8'), ('volume', 'f8'),
+])
+
+# 벤치마크/오프라인 실행용: 설정하면 yfinance 대신 이 CSV(Date,Ticker,OHLCV 세로형)에서 읽음 (bench/make_fixtures.py)
+# 여러 파일은 os.pathsep(:)으로 이어서 지정
+YF_FIXTURE = os.environ.get("MORNING_YF_FIXTURE")
+
+_write_lock = threading.Lock()
+_fixture = None
+_fixture_lock = threading.Lock()
+
+def _path(symbol, base=HISTORY_DIR):
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in symbol)
+    return os.path.join(base, f"{safe}.npy")
+
+def load(symbol, base=HISTORY_DIR):
+    # 저장된 일봉 배열 (읽기 전용 mmap). 없으면 빈 배열
+    path = _path(symbol, base)
+    if not os.path.exists(path): return np.empty(0, dtype=BAR_DTYPE)
+    return np.load(path, mmap_mode='r')
+
+def _save(symbol, bars, base=HISTORY_DIR):
+    # 임시 파일에 쓰고 교체 -> 다른 프로세스(데몬/페이지)가 읽는 중이어도 깨진 파일을 보지 않음
+    os.makedirs(base, exist_ok=True)
+    path = _path(symbol, base)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, bars)
+    os.replace(tmp, path)
+
+def _fixture_download(symbols, period=None, start=None, **kwargs):
+    # yf.download와 같은 모양(컬럼: (Price, Ticker) MultiIndex)의 DataFrame을 픽스처에서 만듦
+    import pandas as pd
+
+    global _fixture
+    with _fixture_lock:
+        if _fixture is None:
+            # 심볼별로 미리 나눠 둬서 청크마다 전체를 훑지 않게 함
+            frames = [pd.read_csv(path, parse_dates=['Date']) for path in YF_FIXTURE.split(os.pathsep)]
+            _fixture = dict(tuple(pd.concat(frames, ignore_index=True).groupby('Ticker')))
+    found = [_fixture[s] for s in symbols if s in _fixture]
+    if not found: return None
+    df = pd.concat(found)
+    if start is not None:
+        df = df[df['Date'] >= pd.Timestamp(start)]
+    elif period and period.endswith("y"):
+        df = df[df['Date'] > df['Date'].max() - pd.DateOffset(years=int(period[:-1]))]
+    wide = df.pivot(index='Date', columns='Ticker', values=['Open', 'High', 'Low', 'Close', 'Volume'])
+    wide.columns.names = ['Price', 'Ticker']
+    return wide
+
+def _download_chunk(part, **kwargs):
+    # 청크 하나를 받아 {심볼: 일봉 배열}. 실패하면 빈 dict (해당 종목만 빠짐)
+    import pandas as pd
+
+    try:
+        # 픽스처도 같은 이름으로 기록 -> 부하 테스트(bench/load_test.py)가 /metrics에서 야후 요청 수를 셈
+        with metrics.span("yf.download"):
+            if YF_FIXTURE:
+                df = _fixture_download(part, **kwargs)
+            else:
+                import yfinance as yf
+                df = yf.download(part, progress=False, group_by='column', threads=False, auto_adjust=False, **kwargs)
+    except Exception:
+        return {}
+    if df is None or df.empty: return {}
+    out = {}
+    for symbol in part:
+        if isinstance(df.columns, pd.MultiIndex):
+            if symbol not in df.columns.get_level_values(1): continue
+            sub = df.xs(symbol, axis=1, level=1)
+        else:
+            sub = df
+        sub = sub.dropna(subset=['Close'])
+        if sub.empty: continue
+        bars = np.empty(len(sub), dtype=BAR_DTYPE)
+        bars['date'] = sub.index.values.astype('datetime64[D]')
+        for field in ('open', 'high', 'low', 'close', 'volume'):
+            col = field.capitalize()
+            bars[field] = sub[col].to_numpy(dtype=float) if col in sub else np.nan
+        out[symbol] = bars
+    return out
+
+def _download(symbols, **kwargs):
+    # {심볼: 일봉 배열}로 반환. DOWNLOAD_CHUNK개 이하는 yf.download 한 번(요청 하나)으로 받고,
+    # 그보다 많을 때만 DOWNLOAD_CHUNK개 이하의 비슷한 크기 청크로 나눠 최대 DOWNLOAD_WORKERS개씩 동시에 받음
+    if not symbols: return {}
+    if len(symbols) <= DOWNLOAD_CHUNK: return _download_chunk(symbols, **kwargs)
+    size = math.ceil(len(symbols) / math.ceil(len(symbols) / DOWNLOAD_CHUNK))
+    parts = [symbols[i:i + size] for i in range(0, len(symbols), size)]
+    out = {}
+    with ThreadPoolExecutor(min(DOWNLOAD_WORKERS, len(parts)), thread_name_prefix="history") as pool:
+        for result in pool.map(lambda part: _download_chunk(part, **kwargs), parts):
+            out.update(result)
+    return out
+
+def update(symbols, base=HISTORY_DIR):
+    # 종목별로 마지막 저장 봉 이후만 받아서 저장. 반환: {심볼: 새로 받은 봉 수}
+    last = {}
+    for symbol in symbols:
+        bars = load(symbol, base)
+        if len(bars): last[symbol] = bars['date'][-1]
+
+    fetched = {}
+    new_symbols = [s for s in symbols if s not in last]
+    if new_symbols:
+        fetched.update(_download(new_symbols, period=INITIAL_PERIOD))
+    if last:
+        # 가장 최근 마지막 봉에서 LAGGARD_DAYS 안인 종목은 한 번에 받고(휴장일 차이로 며칠 어긋나는 정도),
+        # 그보다 오래 밀린 종목(오래 안 본 목록 등)은 마지막 봉 날짜별로 따로 받음 -> 전체를 오래된 날짜부터 받지 않음
+        newest = max(last.values())
+        recent = [s for s, day in last.items() if newest - day <= np.timedelta64(LAGGARD_DAYS, 'D')]
+        groups = {min(last[s] for s in recent): recent}
+        for symbol, day in last.items():
+            if symbol not in recent: groups.setdefault(day, []).append(symbol)
+        for day, group in sorted(groups.items()):
+            fetched.update(_download(group, start=str(day)))
+
+    added = {}
+    with _write_lock:
+        for symbol, new in fetched.items():
+            if symbol in last: new = new[new['date'] >= last[symbol]]
+            added[symbol] = len(new)
+            # 파일은 지금 다시 읽음: 그 사이 다른 갱신(데몬/다른 프로세스)이 먼저 저장했을 수 있음
+            if len(new): _save(symbol, _merge(load(symbol, base), new), base)
+    return added
+
+def _merge(old, new):
+    # 날짜 순으로 합치고 같은 날짜는 new 값 하나만 남김 (마지막 봉은 장중 값이 바뀌므로 새로 받은 값으로 덮어씀).
+    # 이미 중복 날짜가 저장된 파일도 여기서 정리됨
+    merged = np.concatenate([np.asarray(old), new])[::-1]  # 뒤집어서 np.unique가 new 쪽(뒤쪽)을 고르게 함
+    _, idx = np.unique(merged['date'], return_index=True)
+    return merged[idx]
+
+def extend(symbols, period="5y", base=HISTORY_DIR):
+    # 저장된 첫 봉보다 과거 구간을 period만큼 채움 (백필/백테스트용, 평소 갱신 경로에서는 쓰지 않음)
+    fetched = _download(list(symbols), period=period)
+    with _write_lock:
+        for symbol, older in fetched.items():
+            old = load(symbol, base)
+            if len(old): older = older[older['date'] < old['date'][0]]
+            if len(older): _save(symbol, np.concatenate([older, np.asarray(old)]), base)
+    return {s: len(v) for s, v in fetched.items()}
+
+def closes(symbols, days=260, base=HISTORY_DIR):
+    # 최근 days개 봉(None이면 전체)의 종가 표 (행: 날짜, 열: 심볼). 종목별 휴장일 차이는 NaN
+    import pandas as pd
+
+    series = {}
+    for symbol in symbols:
+        bars = load(symbol, base)
+        if days: bars = bars[-days:]
+        if len(bars):
+            series[symbol] = pd.Series(bars['close'], index=pd.DatetimeIndex(bars['date']))
+    if not series: return pd.DataFrame(columns=symbols, dtype=float)
+    return pd.DataFrame(series).sort_index().reindex(columns=symbols)
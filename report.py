@@ -0,0 +1,67 @@
+# --- 브리핑 리포트 ---
+# Streamlit 없이도 쓰도록 페이지에서 분리 (morning.py, cli.py). 표준 라이브러리 외 import 없음.
+
+def top_headlines(news, n=5):
+    # 섹터 구분 없이 여러 곳에서 다룬 소식(count) 먼저, 같으면 최신 순 (예전 스냅샷의 기사에는 count/date가 없음)
+    items = [item for items in news.values() for item in items]
+    return sorted(items, key=lambda x: (x.get('count', 1), x.get('date', '')), reverse=True)[:n]
+
+def briefing_inputs(news, calendar):
+    # AI 프롬프트/메모 키에 들어가는 뉴스 요약, 일정 문자열
+    news_summary = " / ".join([n['title'] for n in top_headlines(news)])
+    calendar_str = "\n".join([f"{c['time']} {c['event']} (★{c['importance']})" for c in calendar])
+    return news_summary, calendar_str
+
+# --- 기본 분석 알고리즘 ---
+def get_basic_report(m, inv_kospi, inv_kosdaq, score, news, calendar):
+    res = {"headline": "", "portfolio": ""}
+    
+    if score >= 70: res["headline"] = "🚨 [매우 위험] 현금 100% 확보 권장. 소나기는 피해야 합니다."
+    elif score >= 50: res["headline"] = "⚠️ [경계] 시장 변동성 확대. 방어적 포지션 및 헷지 필요."
+    elif score >= 30: res["headline"] = "⚖️ [혼조세] 방향성 탐색 구간. 주도주 위주의 선별적 접근."
+    else: res["headline"] = "⛅ [양호] 투자 심리 안정. 조정 시 매수 관점 유효."
+
+    top_issue = ""
+    if calendar:
+        sorted_cal = sorted(calendar, key=lambda x: (-x['importance'], x['time']))
+        top_event = sorted_cal[0]
+        top_issue = f"오늘밤 {top_event['event']} 발표"
+    elif any(news.values()):
+        top_issue = top_headlines(news, 1)[0]['title']
+    
+    if top_issue:
+        if len(top_issue) > 35: top_issue = top_issue[:35] + "..."
+        res["headline"] += f"<br><span style='font-size:15px; color:#1565c0; font-weight:normal;'>📢 주요 이슈: {top_issue}</span>"
+
+    # [수정된 로직] 수치 나열 대신 전문적인 코멘트 생성
+    lines = []
+    
+    # 1. 대외 환경 (반도체/나스닥)
+    sox_pct = m['sox']['pct'] if 'sox' in m else 0.0  # 수집 실패 시 보합으로 간주
+    if sox_pct > 1.0:
+        lines.append("🇺🇸 <b>대외 환경:</b> 간밤 美 필라델피아 반도체 지수의 강세는 국내 반도체 투심에 긍정적인 훈풍으로 작용할 전망입니다.")
+    elif sox_pct < -1.0:
+        lines.append("🇺🇸 <b>대외 환경:</b> 美 반도체 지수 조정으로 인해 국내 기술주 전반에 차익 실현 매물 출회 가능성이 높습니다.")
+    else:
+        lines.append("🇺🇸 <b>대외 환경:</b> 글로벌 증시가 뚜렷한 방향성 없이 혼조세를 보이고 있어, 장 초반 눈치보기 장세가 예상됩니다.")
+
+    # 2. 수급 전망 (수치 대신 해석)
+    total_net = inv_kospi['val'] + inv_kosdaq['val']
+    if total_net > 500:
+        lines.append("💰 <b>수급 전망:</b> 외국인 투자자들의 의미 있는 유동성 유입이 포착되고 있어 지수 하방 경직성은 확보된 모습입니다.")
+    elif total_net < -500:
+        lines.append("💸 <b>수급 전망:</b> 외국인 매도 우위가 지속될 경우, 대형주 중심의 수급 공백이 발생할 수 있어 주의가 필요합니다.")
+    else:
+        # 데이터가 0이거나 미미할 때 자연스러운 문구
+        lines.append("👀 <b>수급 전망:</b> 아직 외국인의 뚜렷한 수급 방향이 결정되지 않았습니다. 장중 외국인 선물 및 현물 매매 동향을 예의주시해야 합니다.")
+
+    # 3. 대응 전략
+    if score >= 50:
+        lines.append("🛡️ <b>전략 가이드:</b> 리스크 관리가 최우선입니다. 추격 매수보다는 현금 비중을 유지하며 보수적으로 접근하십시오.")
+    elif score >= 30:
+        lines.append("⚖️ <b>전략 가이드:</b> 지수보다는 종목 장세가 예상됩니다. 실적 기반의 주도주(반도체/2차전지 등)로 압축 대응하는 것이 유리합니다.")
+    else:
+        lines.append("🚀 <b>전략 가이드:</b> 시장 에너지가 양호합니다. 조정 시 분할 매수 관점으로 접근하되, 외국인 수급이 쏠리는 섹터에 집중하십시오.")
+
+    res["portfolio"] = "<br><br>".join(lines)
+    return res
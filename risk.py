@@ -0,0 +1,198 @@
+import argparse
+
+import numpy as np
+
+import metrics
+
+# --- 위험도 산정 로직 강화 (V0.64: 종합 40~45 타겟팅) ---
+# Streamlit 페이지와 수집 데몬(collector.py)이 같이 쓰도록 분리.
+# 모든 계산은 NumPy 배열 단위라서 오늘 스냅샷 하나(0차원)든 수년치 일별 히스토리든 같은 코드로 한 번에 계산함.
+
+def calc_r(v, min_v, max_v): return np.clip((np.asarray(v, dtype=float) - min_v) / (max_v - min_v) * 100, 0, 100)
+
+# [수정 전략]
+# 주가 상승(호재)이 위험도를 0으로 만드는 것을 방지하기 위해, 환율과 금리의 위험 비중을 대폭 높임.
+# 현재: 환율(~1455원) -> 고위험 / 금리(TNX) -> 중위험 / 주가 -> 저위험(0)
+# 목표: 이들을 섞어서 40점대가 나오게 하려면 환율과 금리 가중치가 주가의 3~4배가 되어야 함.
+
+# 가중치 재조정 (종합점수 40~45 목표)
+RISK_WEIGHTS = {
+    'tnx': 2.0,     # 금리 압박 가중치 증가
+    'oil': 0.5,
+    'krw': 3.5,     # [핵심] 환율 가중치 3.5배 (시장 하락 방어 요인을 상쇄)
+    'vix': 1.0,
+    'sox': 1.0,
+    'mkt': 1.0,
+    'inv': 1.0,
+}
+
+# 엔진 입력 컬럼: 지표 레벨(tnx/oil/krw/vix), 등락률·하락률(sox_*, kospi_*), 외국인 순매수 합계(inv, 억)와 5/20거래일 누적(inv5/inv20)
+INPUT_COLUMNS = ('tnx', 'oil', 'krw', 'vix', 'sox_dd', 'sox_pct', 'kospi_dd', 'kospi_pct', 'inv', 'inv5', 'inv20')
+
+# 요인별 계산식. g(컬럼)은 입력 배열 (없으면 NaN)
+FACTORS = {
+    'tnx': lambda g: calc_r(g('tnx'), 3.2, 4.8),     # 3.2~4.8%
+    'oil': lambda g: calc_r(g('oil'), 65, 90),
+    'krw': lambda g: calc_r(g('krw'), 1300, 1500),   # 1300~1500 (1455면 약 77점)
+    'vix': lambda g: calc_r(g('vix'), 10, 30),       # [중요] 계산용 max는 30 유지 (50은 너무 널널함)
+    'sox': lambda g: np.maximum(calc_r(g('sox_dd'), 0, 8), calc_r(-g('sox_pct'), 0, 3)),
+    'mkt': lambda g: np.maximum(calc_r(g('kospi_dd'), 0, 5), calc_r(-g('kospi_pct'), 0, 2)),
+    # 당일 순매도와 누적 순매도(flow_history) 중 큰 쪽. 누적이 없으면(fmax는 NaN 무시) 당일 값만
+    'inv': lambda g: np.fmax(calc_r(-g('inv') / 10, 0, 500),
+                             np.fmax(calc_r(-g('inv5') / 10, 0, 2500), calc_r(-g('inv20') / 10, 0, 6000))),
+}
+
+# 시세 키(collect.TICKERS) -> 그 시세로 계산되는 요인. 장중 틱이 들어오면 이 요인 하나만 다시 계산 (intraday.py)
+MARKET_FACTORS = {'tnx': 'tnx', 'oil': 'oil', 'krw': 'krw', 'vix': 'vix', 'sox': 'sox', 'kospi': 'mkt'}
+
+def factor_arrays(cols, names=FACTORS):
+    # cols: {입력 컬럼: 배열 또는 스칼라} (DataFrame도 그대로 가능). 값이 없는(NaN) 요인은 NaN으로 남음
+    def g(k):
+        return np.asarray(cols[k] if k in cols else np.nan, dtype=float)
+
+    return {k: FACTORS[k](g) for k in names}
+
+def market_factor(key, m):
+    # 시세 키 하나의 지표(val/pct/dd)로 해당 요인만 계산. 반환: (요인 이름, 값 또는 None)
+    name = MARKET_FACTORS[key]
+    cols = {f'{key}_dd': m['dd'], f'{key}_pct': m['pct']} if key in ('sox', 'kospi') else {key: m['val']}
+    v = factor_arrays(cols, (name,))[name]
+    return name, None if np.isnan(v) else float(v)
+
+def score_arrays(factors, weights=RISK_WEIGHTS):
+    # 빠진 요인이 있으면 남은 요인의 가중치 합으로 정규화 (전부 있으면 기존과 동일하게 / 10.0)
+    num, den = 0.0, 0.0
+    for k, w in weights.items():
+        f = factors[k]
+        ok = ~np.isnan(f)
+        num = num + np.where(ok, f * w, 0.0)
+        den = den + np.where(ok, w, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(den > 0, np.floor(num / np.where(den > 0, den, 1.0)), 0.0)
+
+# --- 스냅샷(오늘 하루) 계산 ---
+def snapshot_inputs(data, inv_kospi, inv_kosdaq, inv_missing=False, flows=None):
+    cols = {k: data[k]['val'] for k in ('tnx', 'oil', 'krw', 'vix') if k in data}
+    for k in ('sox', 'kospi'):
+        if k in data:
+            cols[f'{k}_dd'], cols[f'{k}_pct'] = data[k]['dd'], data[k]['pct']
+    if not inv_missing:
+        cols['inv'] = inv_kospi['val'] + inv_kosdaq['val']
+    # flows: flow_history.sums() 결과 (누적 순매수 inv5/inv20)
+    cols.update({k: v for k, v in (flows or {}).items() if k in INPUT_COLUMNS})
+    return cols
+
+def compute_risk_factors(data, inv_kospi, inv_kosdaq, inv_missing=False, flows=None):
+    # 요인별 0~100 위험도. 데이터가 없는 요인은 None
+    factors = factor_arrays(snapshot_inputs(data, inv_kospi, inv_kosdaq, inv_missing, flows))
+    return {k: None if np.isnan(v) else float(v) for k, v in factors.items()}
+
+def compute_risk_score(risk_factors, weights=RISK_WEIGHTS):
+    factors = {k: np.asarray(np.nan if risk_factors.get(k) is None else risk_factors[k]) for k in weights}
+    return int(score_arrays(factors, weights))
+
+def compute_risk(data, inv_kospi, inv_kosdaq, inv_missing=False, flows=None):
+    with metrics.span("risk.score"):
+        risk_factors = compute_risk_factors(data, inv_kospi, inv_kosdaq, inv_missing, flows)
+        return risk_factors, compute_risk_score(risk_factors)
+
+# --- 히스토리 백필 (가중치 검증용) ---
+def history_inputs(closes, tickers, window=5, flows=None):
+    # closes: price_history.closes() 결과 (행: 날짜, 열: 심볼), tickers: {키: 심볼}
+    # 종목마다 자기 거래일 기준으로 등락률/하락률을 계산한 뒤 공통 날짜로 맞춤 (휴장일은 직전 값 유지)
+    # flows: 날짜별 외국인 순매수 합계(억) Series (flow_history.history()['total']) - 없으면 inv 요인은 빠진 채로 정규화됨
+    import pandas as pd
+
+    from flow_history import rolling_sums
+
+    cols = {}
+    for key in ('tnx', 'oil', 'krw', 'vix', 'sox', 'kospi'):
+        symbol = tickers.get(key)
+        if symbol not in closes: continue
+        s = closes[symbol].dropna()
+        if key in ('sox', 'kospi'):
+            high = s.rolling(window, min_periods=1).max()
+            cols[f'{key}_dd'] = (high - s) / high * 100
+            cols[f'{key}_pct'] = s.pct_change().fillna(0.0) * 100
+        else:
+            cols[key] = s
+    if flows is not None and len(flows):
+        flows = flows.dropna()
+        cols['inv'] = flows
+        cols.update(rolling_sums(flows))  # 국내 거래일 기준으로 누적한 뒤 공통 날짜로 맞춤
+    return pd.DataFrame(cols).sort_index().ffill()
+
+def score_history(inputs, weights=RISK_WEIGHTS):
+    # inputs: history_inputs() 결과. 반환: 요인별 위험도 + 'score' 컬럼 DataFrame (한 번의 벡터 연산)
+    import pandas as pd
+
+    factors = factor_arrays(inputs)
+    out = pd.DataFrame(factors, index=inputs.index)
+    out['score'] = score_arrays(factors, weights)
+    return out
+
+def evaluate(scores, kospi, horizon=20):
+    # 위험도가 이후 horizon 거래일 동안의 KOSPI 최대 하락폭을 얼마나 설명하는지 (상관계수)
+    import pandas as pd
+
+    kospi = kospi.dropna()
+    fwd_low = kospi[::-1].rolling(horizon, min_periods=1).min()[::-1].shift(-1)
+    fwd_dd = ((kospi - fwd_low) / kospi * 100).clip(lower=0)
+    joined = pd.concat([scores['score'], fwd_dd.rename('fwd_dd')], axis=1).dropna()
+    return {
+        "days": len(joined),
+        "mean_score": round(float(joined['score'].mean()), 1) if len(joined) else None,
+        "corr_fwd_dd": round(float(joined['score'].corr(joined['fwd_dd'])), 3) if len(joined) > 2 else None,
+    }
+
+def plot_risk_history(scores, kospi=None):
+    # 위험도 시계열 (plotly). kospi를 주면 보조축에 같이 그려서 과거 하락 구간과 비교
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=scores.index, y=scores['score'], name="위험도", line=dict(color="#D32F2F")))
+    if kospi is not None:
+        fig.add_trace(go.Scatter(x=kospi.index, y=kospi, name="KOSPI", yaxis="y2", line=dict(color="#1565c0", width=1)))
+    for level, color in ((50, "#FF9800"), (70, "#D32F2F")):
+        fig.add_hline(y=level, line_dash="dot", line_color=color)
+    fig.update_layout(
+        height=350, margin=dict(l=10, r=10, t=30, b=10), legend=dict(orientation="h"),
+        yaxis=dict(title="위험도", range=[0, 100]),
+        yaxis2=dict(title="KOSPI", overlaying="y", side="right", showgrid=False),
+    )
+    return fig
+
+def backfill(years=5, weights=RISK_WEIGHTS, extend=True):
+    # 로컬 가격/수급 히스토리로 과거 위험도 재계산. extend=True면 부족한 과거 구간을 먼저 받아 둠
+    import flow_history
+    import price_history
+    from collect import TICKERS
+
+    symbols = list(TICKERS.values())
+    if extend:
+        price_history.extend(symbols, period=f"{years}y")
+        flow_history.update()
+    closes = price_history.closes(symbols, days=None)
+    flows = flow_history.history()['total']
+    scores = score_history(history_inputs(closes, TICKERS, flows=flows), weights)
+    return scores, closes.get(TICKERS['kospi'])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="과거 위험도 백필 / 가중치 검증")
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--weight", action="append", default=[], metavar="KEY=W", help="가중치 변경 (예: krw=2.5)")
+    parser.add_argument("--horizon", type=int, default=20, help="평가용 이후 하락폭 구간 (거래일)")
+    parser.add_argument("--out", help="위험도 차트를 저장할 HTML 경로")
+    args = parser.parse_args()
+
+    weights = dict(RISK_WEIGHTS)
+    for item in args.weight:
+        k, v = item.split("=", 1)
+        weights[k] = float(v)
+
+    scores, kospi = backfill(args.years, weights)
+    print("가중치:", weights)
+    print("평가:", evaluate(scores, kospi, args.horizon) if kospi is not None else "KOSPI 히스토리 없음")
+    if args.out:
+        plot_risk_history(scores, kospi).write_html(args.out)
+        print("차트 저장:", args.out)
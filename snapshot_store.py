@@ -0,0 +1,58 @@
+import json
+import os
+import sqlite3
+import time
+
+# --- 스냅샷 저장소 (SQLite) ---
+# 수집 데몬(collector.py)이 쓰고 Streamlit 페이지는 최신 행만 읽음.
+# WAL 모드라 데몬이 쓰는 중에도 페이지 쪽 읽기가 막히지 않음.
+
+DEFAULT_DB = os.environ.get(
+    "MORNING_SNAPSHOT_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "morning_snapshots.db"),
+)
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=5)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS snapshots (ts REAL PRIMARY KEY, payload TEXT NOT NULL)")
+    return conn
+
+def save_snapshot(snapshot, path=DEFAULT_DB):
+    # snapshot은 JSON으로 직렬화 가능한 dict, 'ts'(epoch 초)를 키로 저장
+    ts = snapshot.setdefault("ts", time.time())
+    with _connect(path) as conn:
+        conn.execute("INSERT OR REPLACE INTO snapshots (ts, payload) VALUES (?, ?)",
+                     (ts, json.dumps(snapshot, ensure_ascii=False)))
+    conn.close()
+    return ts
+
+def load_latest(path=DEFAULT_DB, max_age=None):
+    # 가장 최근 스냅샷. 없거나 max_age(초)보다 오래됐으면 None
+    if not os.path.exists(path): return None
+    try:
+        conn = _connect(path)
+        row = conn.execute("SELECT ts, payload FROM snapshots ORDER BY ts DESC LIMIT 1").fetchone()
+        conn.close()
+    except sqlite3.Error:
+        return None
+    if not row: return None
+    if max_age is not None and time.time() - row[0] > max_age: return None
+    return json.loads(row[1])
+
+def latest_ts(path=DEFAULT_DB):
+    # 가장 최근 스냅샷의 ts만 (본문 JSON은 읽지 않음 -> 새 스냅샷이 생겼는지 자주 확인하는 용도). 없으면 None
+    if not os.path.exists(path): return None
+    try:
+        conn = _connect(path)
+        row = conn.execute("SELECT MAX(ts) FROM snapshots").fetchone()
+        conn.close()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+def prune(path=DEFAULT_DB, keep_days=30):
+    # 오래된 스냅샷 정리
+    with _connect(path) as conn:
+        conn.execute("DELETE FROM snapshots WHERE ts < ?", (time.time() - keep_days * 86400,))
+    conn.close()
@@ -0,0 +1,131 @@
+import threading
+import time
+
+# --- 프로세스 공용 소스 캐시 ---
+# Streamlit 세션(브라우저)마다 스크립트가 따로 돌지만 이 모듈은 프로세스에 한 번만 로드되므로
+# 여기 저장된 값은 모든 세션이 공유함.
+# - TTL 안: 캐시값 그대로 반환 (hit)
+# - TTL 지남: 기존 값을 바로 돌려주고(stale) 백그라운드에서 한 번만 갱신
+# - max_stale도 지남(갱신이 계속 실패): 너무 오래된 값은 주지 않고 값이 없을 때처럼 처리
+# - 값이 아예 없음: 처음 요청한 세션만 실제로 수집하고 나머지는 그 결과를 기다림 (single-flight).
+#   기다리는 쪽은 timeout초까지만 기다리고 TimeoutError (작업 스레드를 붙잡고 있지 않게)
+# - max_entries: 인자 조합이 많은 소스(워치리스트 등)는 이름별로 최근에 쓴 항목만 그 수만큼 남김 (LRU)
+
+class _Entry:
+    def __init__(self):
+        self.value = None
+        self.has_value = False
+        self.fetched_at = 0.0
+        self.used_at = 0.0       # 마지막 조회 시각 (max_entries 초과 시 오래된 것부터 버림)
+        self.loading = None      # 최초 수집 중일 때 대기용 threading.Event
+        self.error = None        # 최초 수집 실패 시 대기자에게 전달할 예외
+        self.refreshing = False  # 백그라운드 갱신 진행 여부
+
+
+class SourceCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._stats = {}
+
+    def _count(self, name, field):
+        counters = self._stats.setdefault(name, {"hit": 0, "stale": 0, "miss": 0, "wait": 0, "refresh": 0, "error": 0})
+        counters[field] += 1
+
+    def get(self, name, fn, ttl, args=(), accept=None, max_entries=None, timeout=None, max_stale=None):
+        # name: 통계용 소스 이름, ttl: 초, accept: 결과를 캐시에 넣을지 판단 (실패 기본값 저장 방지)
+        # max_entries: 이 이름으로 남겨 둘 최대 항목 수 (None이면 제한 없음)
+        # timeout: 다른 세션의 수집을 기다리는 최대 시간 (초), max_stale: stale 값을 줄 수 있는 최대 나이 (초)
+        key = (name, args)
+        with self._lock:
+            entry = self._entries.setdefault(key, _Entry())
+            entry.used_at = time.time()
+            age = time.time() - entry.fetched_at
+            if entry.has_value and age < ttl:
+                self._count(name, "hit")
+                return entry.value
+            if entry.has_value and (max_stale is None or age <= max_stale):
+                self._count(name, "stale")
+                if not entry.refreshing:
+                    entry.refreshing = True
+                    threading.Thread(target=self._refresh, args=(name, key, fn, args, accept),
+                                     name=f"refresh-{name}", daemon=True).start()
+                return entry.value
+            if entry.loading is not None:
+                self._count(name, "wait")
+                waiter = entry.loading
+            else:
+                self._count(name, "miss")
+                waiter = None
+                entry.loading = threading.Event()
+                entry.error = None
+
+        if waiter is not None:
+            if not waiter.wait(timeout): raise TimeoutError("timeout")
+            with self._lock:
+                if entry.error is not None: raise entry.error
+                return entry.value
+
+        try:
+            value = fn(*args)
+        except Exception as e:
+            with self._lock:
+                self._count(name, "error")
+                entry.error = e
+                entry.loading.set()
+                entry.loading = None
+            raise
+        with self._lock:
+            if accept is None or accept(value):
+                self._store(entry, value)
+                if max_entries is not None: self._evict(name, max_entries)
+            else:
+                entry.value = value  # 대기 중인 세션에는 이번 결과를 전달하되 캐시로 남기지는 않음
+            entry.loading.set()
+            entry.loading = None
+        return value
+
+    def _refresh(self, name, key, fn, args, accept):
+        try:
+            value = fn(*args)
+            ok = accept is None or accept(value)
+        except Exception:
+            value, ok = None, False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None: return  # 그 사이 clear()
+            entry.refreshing = False
+            self._count(name, "refresh" if ok else "error")
+            if ok: self._store(entry, value)  # 실패하면 기존(stale) 값을 계속 사용
+
+    def _evict(self, name, max_entries):
+        # 이름별 항목이 max_entries를 넘으면 가장 오래 안 쓴 것부터 버림 (수집/갱신 중인 항목은 남김)
+        keys = [k for k in self._entries if k[0] == name]
+        idle = sorted((k for k in keys if self._entries[k].loading is None and not self._entries[k].refreshing),
+                      key=lambda k: self._entries[k].used_at)
+        for k in idle[:max(0, len(keys) - max_entries)]:
+            del self._entries[k]
+
+    @staticmethod
+    def _store(entry, value):
+        entry.value = value
+        entry.has_value = True
+        entry.fetched_at = time.time()
+
+    def stats(self):
+        # 소스별 hit/stale/miss/wait/refresh/error 카운터와 마지막 수집 후 경과 시간(초)
+        with self._lock:
+            now = time.time()
+            rows = {name: dict(c) for name, c in self._stats.items()}
+            for (name, _), entry in self._entries.items():
+                if entry.has_value and name in rows:
+                    age = now - entry.fetched_at
+                    rows[name]["age"] = round(min(age, rows[name].get("age", age)), 1)
+            return rows
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+cache = SourceCache()
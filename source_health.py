@@ -0,0 +1,73 @@
+import threading
+import time
+
+# --- 소스별 상태 추적 ---
+# 엔드포인트마다 지연시간, 성공률, 마지막 성공 시각, 연속 실패 수를 기록.
+# 연속 실패가 DEAD_AFTER번 이상이면 DEAD_COOLDOWN 동안 '죽은 소스'로 보고 경로에서 건너뜀
+# (쿨다운이 지나면 한 번 다시 시도해서 살아났는지 확인).
+
+DEAD_AFTER = 3
+DEAD_COOLDOWN = 300  # 초
+EWMA_ALPHA = 0.3     # 지연시간 이동평균 가중치
+
+
+class SourceHealth:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _row(self, name):
+        return self._stats.setdefault(name, {
+            "calls": 0, "ok": 0, "fail": 0, "consecutive_fail": 0,
+            "latency_ms": None, "last_ok": None, "last_fail": None, "last_error": "",
+        })
+
+    def record(self, name, ok, latency, error=""):
+        with self._lock:
+            row = self._row(name)
+            row["calls"] += 1
+            ms = latency * 1000
+            row["latency_ms"] = ms if row["latency_ms"] is None else (1 - EWMA_ALPHA) * row["latency_ms"] + EWMA_ALPHA * ms
+            if ok:
+                row["ok"] += 1
+                row["consecutive_fail"] = 0
+                row["last_ok"] = time.time()
+            else:
+                row["fail"] += 1
+                row["consecutive_fail"] += 1
+                row["last_fail"] = time.time()
+                row["last_error"] = error
+
+    def call(self, name, fn, *args):
+        # fn을 실행하며 지연/성공 여부 기록. 빈 결과(None)도 실패로 기록하고 그대로 반환, 예외는 다시 던짐
+        start = time.monotonic()
+        try:
+            value = fn(*args)
+        except Exception as e:
+            self.record(name, False, time.monotonic() - start, str(e) or type(e).__name__)
+            raise
+        self.record(name, value is not None, time.monotonic() - start, "" if value is not None else "empty")
+        return value
+
+    def is_dead(self, name):
+        with self._lock:
+            row = self._stats.get(name)
+            if not row or row["consecutive_fail"] < DEAD_AFTER: return False
+            return time.time() - row["last_fail"] < DEAD_COOLDOWN
+
+    def stats(self):
+        with self._lock:
+            out = {}
+            for name, row in self._stats.items():
+                out[name] = {
+                    "calls": row["calls"],
+                    "success_rate": round(row["ok"] / row["calls"], 3) if row["calls"] else None,
+                    "latency_ms": round(row["latency_ms"], 1) if row["latency_ms"] is not None else None,
+                    "consecutive_fail": row["consecutive_fail"],
+                    "last_ok": row["last_ok"],
+                    "last_error": row["last_error"],
+                }
+            return out
+
+
+health = SourceHealth()
@@ -0,0 +1,133 @@
+import json
+import os
+import re
+from urllib.parse import quote
+
+import metrics
+import price_history
+from collect import DD_WINDOWS, TICKERS, calc_metrics
+from source_cache import cache
+
+# --- 관심 종목 (워치리스트) ---
+# 고정 12개 게이지와 별개로, 수백 개 종목을 한 표/히트맵으로 봄.
+# - 목록: 내장 목록 + watchlists.json (MORNING_WATCHLISTS)의 사용자 목록
+# - 수집: price_history.update가 청크 단위로 최대 DOWNLOAD_WORKERS개씩 동시에 받고, 이후엔 새 봉만 받음
+# - 지표: calc_metrics 한 번으로 전 종목 벡터 계산, 게이지 범위(lo/hi)도 히스토리에서 자동 산출
+# - 같은 목록은 프로세스 공용 캐시(source_cache)로 REFRESH_TTL 동안 공유 (최근 MAX_CACHED개 목록만 보관)
+
+WATCHLIST_FILE = os.environ.get(
+    "MORNING_WATCHLISTS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "watchlists.json"),
+)
+MAX_SYMBOLS = 500   # 목록 하나의 최대 종목 수
+REFRESH_TTL = 300   # 같은 목록을 다시 받기까지 (초)
+MAX_CACHED = 32     # 캐시에 남겨 둘 목록(심볼 조합) 수. 넘으면 가장 오래 안 본 목록부터 버림
+
+# 전체 KOSPI 200 같은 긴 목록은 watchlists.json에 넣어 씀 ({"이름": ["005930.KS", ...]} 또는 {"이름": {"심볼": "표시 이름"}})
+BUILTIN = {
+    "핵심 지표": {symbol: key for key, symbol in TICKERS.items()},
+    "반도체 (미국/ADR)": {s: s for s in (
+        "NVDA", "TSM", "AVGO", "ASML", "AMD", "QCOM", "TXN", "INTC", "MU", "AMAT", "LRCX", "KLAC", "ADI",
+        "MRVL", "NXPI", "MCHP", "ON", "ARM", "STM", "UMC", "ASX", "GFS", "MPWR", "TER", "ENTG", "SWKS",
+    )},
+    "코스피 대형주": {
+        "005930.KS": "삼성전자", "000660.KS": "SK하이닉스", "373220.KS": "LG에너지솔루션", "207940.KS": "삼성바이오로직스",
+        "005380.KS": "현대차", "000270.KS": "기아", "068270.KS": "셀트리온", "005490.KS": "POSCO홀딩스",
+        "035420.KS": "NAVER", "035720.KS": "카카오", "051910.KS": "LG화학", "006400.KS": "삼성SDI",
+        "105560.KS": "KB금융", "055550.KS": "신한지주", "012330.KS": "현대모비스", "028260.KS": "삼성물산",
+        "066570.KS": "LG전자", "003670.KS": "포스코퓨처엠", "096770.KS": "SK이노베이션", "034730.KS": "SK",
+        "015760.KS": "한국전력", "032830.KS": "삼성생명", "086790.KS": "하나금융지주", "017670.KS": "SK텔레콤",
+        "030200.KS": "KT", "033780.KS": "KT&G", "009150.KS": "삼성전기", "018260.KS": "삼성에스디에스",
+        "010130.KS": "고려아연", "011200.KS": "HMM", "012450.KS": "한화에어로스페이스", "042660.KS": "한화오션",
+        "329180.KS": "HD현대중공업", "009540.KS": "HD한국조선해양", "138040.KS": "메리츠금융지주", "316140.KS": "우리금융지주",
+        "000810.KS": "삼성화재", "003550.KS": "LG", "010950.KS": "S-Oil", "047050.KS": "포스코인터내셔널",
+    },
+}
+
+# 정렬 기준 (표시 이름 -> 컬럼)
+SORT_COLUMNS = {
+    "등락률": "pct", "5일 고점 대비": "dd", "20일 고점 대비": "dd20", "60일 고점 대비": "dd60",
+    "200일 고점 대비": "dd200", "범위 내 위치": "pos",
+}
+
+def chart_url(symbol):
+    return f"https://finance.yahoo.com/quote/{quote(symbol, safe='=')}"
+
+def parse_symbols(text):
+    # 쉼표/공백/줄바꿈으로 구분된 심볼 -> 중복 없이 입력 순서대로, 최대 MAX_SYMBOLS개
+    seen = {}
+    for token in re.split(r"[\s,;]+", text or ""):
+        token = token.strip().upper()
+        if token: seen.setdefault(token, token)
+    return dict(list(seen.items())[:MAX_SYMBOLS])
+
+def load_watchlists(path=WATCHLIST_FILE):
+    # 반환: {목록 이름: {심볼: 표시 이름}} (내장 목록 + 사용자 목록, 같은 이름이면 사용자 목록 우선)
+    lists = {name: dict(symbols) for name, symbols in BUILTIN.items()}
+    try:
+        with open(path, encoding="utf-8") as f:
+            user = json.load(f)
+    except (OSError, ValueError):
+        return lists
+    for name, symbols in user.items():
+        labels = symbols if isinstance(symbols, dict) else {s: s for s in symbols}
+        lists[name] = dict(list(labels.items())[:MAX_SYMBOLS])
+    return lists
+
+def save_watchlist(name, labels, path=WATCHLIST_FILE):
+    try:
+        with open(path, encoding="utf-8") as f:
+            user = json.load(f)
+    except (OSError, ValueError):
+        user = {}
+    user[name] = dict(list(labels.items())[:MAX_SYMBOLS])
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(user, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+def fetch_table(symbols):
+    # 전 종목 지표 표 (행: 심볼). pos = 게이지 범위 안에서 현재가 위치 (0~100)
+    symbols = list(symbols)
+    with metrics.span("watchlist.history_update"):
+        price_history.update(symbols)
+    with metrics.span("watchlist.metrics"):
+        table = calc_metrics(price_history.closes(symbols, days=max(DD_WINDOWS)))
+        span = (table['hi'] - table['lo']).where(table['hi'] > table['lo'])
+        table['pos'] = ((table['val'] - table['lo']) / span * 100).clip(0, 100)
+    return table
+
+def table(symbols):
+    return cache.get("watchlist", fetch_table, REFRESH_TTL, (tuple(symbols),), accept=lambda t: not t.empty,
+                     max_entries=MAX_CACHED)
+
+def display_rows(table, labels):
+    # st.dataframe용 (심볼 순서는 표 순서)
+    return [{
+        "종목": labels.get(symbol, symbol), "심볼": symbol, "현재가": row['val'], "등락률": row['pct'],
+        "5일": row['dd'], **{f"{n}일": row[f'dd{n}'] for n in DD_WINDOWS},
+        "범위": f"{row['lo']:,g} ~ {row['hi']:,g}", "위치": row['pos'], "차트": chart_url(symbol),
+    } for symbol, row in table.iterrows()]
+
+def heatmap(table, labels, sort_by="pct", columns=20):
+    # 등락률 색 히트맵 (한 칸 = 한 종목, 정렬 기준 내림차순으로 왼쪽 위부터). 상승 빨강 / 하락 파랑
+    import numpy as np
+    import plotly.graph_objects as go
+
+    t = table.sort_values(sort_by, ascending=False)
+    n = len(t)
+    rows = -(-n // columns)
+    pad = rows * columns - n
+    z = np.append(t['pct'].to_numpy(dtype=float), [np.nan] * pad).reshape(rows, columns)
+    names = [labels.get(s, s) for s in t.index] + [""] * pad
+    text = [f"{name}<br>{pct:+.1f}%" if name else "" for name, pct in zip(names, list(t['pct']) + [0.0] * pad)]
+    text = np.array(text, dtype=object).reshape(rows, columns)
+    limit = max(1.0, float(np.nanpercentile(np.abs(t['pct']), 95))) if n else 1.0
+    fig = go.Figure(go.Heatmap(
+        z=z, text=text, texttemplate="%{text}", textfont=dict(size=10), hoverinfo="text",
+        colorscale=[[0, "#1565c0"], [0.5, "#f5f5f5"], [1, "#D32F2F"]], zmid=0, zmin=-limit, zmax=limit,
+        xgap=2, ygap=2, showscale=False,
+    ))
+    fig.update_layout(height=max(160, rows * 42), margin=dict(l=0, r=0, t=0, b=0),
+                      xaxis=dict(visible=False), yaxis=dict(visible=False, autorange="reversed"))
+    return fig